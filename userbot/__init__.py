@@ -8,20 +8,21 @@
 import os
 import sys
 from distutils.util import strtobool as sb
+from hashlib import md5
 from logging import DEBUG, INFO, basicConfig, getLogger
 from pathlib import Path
-from platform import python_version
+from time import perf_counter
 
 from dotenv import load_dotenv
-from pylast import LastFMNetwork, md5
-from pySmartDL import SmartDL
-from requests import get
-from telethon import TelegramClient, version
+from telethon import TelegramClient
 from telethon.network.connection.tcpabridged import ConnectionTcpAbridged
 from telethon.sessions import StringSession
 
 from .storage import Storage
 
+# Start of the startup timings reported once the bot is running.
+STARTED = perf_counter()
+
 STORAGE = lambda n: Storage(Path("data") / n)
 
 load_dotenv("config.env")
@@ -90,6 +91,12 @@ CONSOLE_LOGGER_VERBOSE = sb(os.environ.get("CONSOLE_LOGGER_VERBOSE") or "False")
 # SQL Database URI
 DB_URI = os.environ.get("DATABASE_URL") or None
 
+# Cache SQL reads in memory, disable when several processes share the database
+DB_CACHE = sb(os.environ.get("DB_CACHE") or "True")
+
+# Import command modules the first time they are used instead of at startup
+LAZY_LOAD = sb(os.environ.get("LAZY_LOAD") or "False")
+
 # OCR API key
 OCR_SPACE_API_KEY = os.environ.get("OCR_SPACE_API_KEY") or None
 
@@ -126,6 +133,8 @@ TZ_NUMBER = int(os.environ.get("TZ_NUMBER") or 1)
 
 # Zipfile module
 ZIP_DOWNLOAD_DIRECTORY = os.environ.get("ZIP_DOWNLOAD_DIRECTORY") or "./zips"
+# Deflate level of new archives, 0 only stores the files
+ZIP_COMPRESSION_LEVEL = int(os.environ.get("ZIP_COMPRESSION_LEVEL") or 6)
 
 # Clean Welcome
 CLEAN_WELCOME = sb(os.environ.get("CLEAN_WELCOME") or "False")
@@ -138,16 +147,32 @@ LASTFM_API = os.environ.get("LASTFM_API") or None
 LASTFM_SECRET = os.environ.get("LASTFM_SECRET") or None
 LASTFM_USERNAME = os.environ.get("LASTFM_USERNAME") or None
 LASTFM_PASSWORD_PLAIN = os.environ.get("LASTFM_PASSWORD") or None
-LASTFM_PASS = md5(LASTFM_PASSWORD_PLAIN)
-if LASTFM_API and LASTFM_SECRET and LASTFM_USERNAME and LASTFM_PASS:
-    lastfm = LastFMNetwork(
-        api_key=LASTFM_API,
-        api_secret=LASTFM_SECRET,
-        username=LASTFM_USERNAME,
-        password_hash=LASTFM_PASS,
-    )
-else:
-    lastfm = None
+LASTFM_PASS = (
+    md5(LASTFM_PASSWORD_PLAIN.encode("utf-8")).hexdigest()
+    if LASTFM_PASSWORD_PLAIN
+    else None
+)
+
+
+def __getattr__(name):
+    """ Builds the last.fm client the first time a module imports it, pylast
+        logs in over the network as soon as the client is created. """
+    global lastfm
+    if name != "lastfm":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if LASTFM_API and LASTFM_SECRET and LASTFM_USERNAME and LASTFM_PASS:
+        from pylast import LastFMNetwork
+
+        lastfm = LastFMNetwork(
+            api_key=LASTFM_API,
+            api_secret=LASTFM_SECRET,
+            username=LASTFM_USERNAME,
+            password_hash=LASTFM_PASS,
+        )
+    else:
+        lastfm = None
+    return lastfm
+
 
 # Google Drive Module
 G_DRIVE_DATA = os.environ.get("G_DRIVE_DATA") or None
@@ -189,63 +214,6 @@ else:
     # pylint: disable=invalid-name
     bot = TelegramClient("userbot", API_KEY, API_HASH)
 
-
-async def check_botlog_chatid():
-    if not BOTLOG_CHATID and LOGSPAMMER:
-        LOGS.info(
-            "Você deve configurar a variável BOTLOG_CHATID nas variáveis config.env, para que o registro dos logs de erro funcione."
-        )
-        sys.exit(1)
-
-    elif not BOTLOG_CHATID and BOTLOG:
-        LOGS.info(
-            "Você deve configurar a variável BOTLOG_CHATID nas variáveis config.env, para que o recurso de registro do userbot funcione."
-        )
-        sys.exit(1)
-
-    elif not (BOTLOG and LOGSPAMMER):
-        return
-
-    entity = await bot.get_entity(BOTLOG_CHATID)
-    if entity.default_banned_rights.send_messages:
-        LOGS.info(
-            "Sua conta não tem permissão para enviar mensagens para BOTLOG_CHATID. "
-            " Verifique se você digitou o ID do bate-papo corretamente."
-        )
-        sys.exit(1)
-
-
-with bot:
-    try:
-        bot.loop.run_until_complete(check_botlog_chatid())
-    except BaseException:
-        LOGS.info(
-            "BOTLOG_CHATID não é uma variável válida "
-            " Verifique suas VARS ou arquivo config.env."
-        )
-        sys.exit(1)
-
-
-async def send_alive_status():
-    if BOTLOG_CHATID and LOGSPAMMER:
-        DEFAULTUSER = ALIVE_NAME or "Defina a ConfigVar `ALIVE_NAME`!"
-        message = (
-            f"👾 **LBot**   ➡️  `{LBOT_VERSION}` \n"
-            f"⚙️ **Telethon**      ➡️  `{version.__version__}` \n"
-            f"🐍 **Python**         ➡️  `{python_version()}` \n"
-            f"👤 **Usuário**       ➡️   `{DEFAULTUSER}` "
-            "\n\n__Userbot iniciado__ ☑️"
-        )
-        await bot.send_message(BOTLOG_CHATID, message)
-        return True
-
-
-with bot:
-    try:
-        bot.loop.run_until_complete(send_alive_status())
-    except:
-        pass
-
 # Global Variables
 COUNT_MSG = 0
 USERS = {}
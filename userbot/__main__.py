@@ -5,28 +5,28 @@
 #
 """ Userbot start point """
 
+import asyncio
 import sys
-from importlib import import_module
 
-from telethon.errors.rpcerrorlist import PhoneNumberInvalidError
-
-from userbot import LOGS, bot
+from userbot import LAZY_LOAD, LOGS, bot
+from userbot.events import ROUTER
+from userbot.loader import LOADER
 from userbot.modules import ALL_MODULES
+from userbot.startup import TIMER, start
+from userbot.utils import BROWSERS, close_session
 
-INVALID_PH = (
-    "\nErro: número de telefone inválido."
-    "\nDica: número de prefixo com código do país"
-    "\nou verifique o seu número de telefone e tente novamente."
-)
+start()
 
-try:
-    bot.start()
-except PhoneNumberInvalidError:
-    print(INVALID_PH)
-    sys.exit(1)
+LOADER.load_all(ALL_MODULES, lazy=LAZY_LOAD)
+TIMER.mark("módulos")
+TIMER.report()
+BROWSERS.warm()
 
-for module_name in ALL_MODULES:
-    imported_module = import_module("userbot.modules." + module_name)
+LOGS.info(
+    "%s handlers registrados, passivos: %s",
+    len(ROUTER.routes),
+    ", ".join(route.callback.__name__ for route in ROUTER.passive),
+)
 
 LOGS.info("Seu userbot está em execução!")
 
@@ -38,3 +38,5 @@ if len(sys.argv) not in (1, 3, 4):
     bot.disconnect()
 else:
     bot.run_until_disconnected()
+
+bot.loop.run_until_complete(asyncio.gather(close_session(), BROWSERS.close()))
@@ -6,31 +6,449 @@
 """ Userbot module for managing events.
  One of the main components of the userbot. """
 
+import asyncio
+import re
 import sys
 from asyncio import create_subprocess_shell as asyncsubshell
 from asyncio import subprocess as asyncsub
-from os import remove
-from time import gmtime, strftime
-from traceback import format_exc
+from hashlib import sha1
+from io import BytesIO
+from operator import attrgetter
+from time import gmtime, monotonic, strftime
+from traceback import extract_tb, format_exc
 
 from telethon import events
+from telethon.tl.types import UpdateUserName
 
 from userbot import BOTLOG_CHATID, LOGS, LOGSPAMMER, bot
 
+try:
+    from userbot.modules.sql_helper.blacklist_sql import is_blacklisted
+except Exception:
+
+    def is_blacklisted(chat_id):
+        return False
+
+
+UNSAFE_PATTERN = r"^[^/!#@\$A-Za-z]"
+# Index key for patterns starting with the unsafe prefix class above.
+UNSAFE = object()
+# Arguments the router knows how to filter by itself.
+ROUTED_ARGS = {"pattern", "incoming", "outgoing"}
+
+_unsafe_first_char = re.compile(UNSAFE_PATTERN).match
+_regex_special = frozenset(".^$*+?{}[]\\|()")
+_optional_quantifiers = ("?", "*", "{")
+
+
+def _has_top_level_alternation(pattern):
+    """ Whether a pattern has a '|' outside of any group or char class. """
+    depth = 0
+    escaped = in_class = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and not depth:
+            return True
+    return False
+
+
+def leading_trigger(pattern):
+    """ Returns the lowercased first character every match of the pattern
+        must start with, UNSAFE for the unsafe prefix class, or None when
+        it can't be told from the pattern alone. """
+    if pattern.startswith("(?i)"):
+        pattern = pattern[4:]
+    if _has_top_level_alternation(pattern):
+        return None
+    pattern = pattern[1:] if pattern.startswith("^") else pattern
+    if pattern.startswith(UNSAFE_PATTERN[1:]):
+        return UNSAFE
+    if pattern[:1] == "\\" and len(pattern) > 1 and not pattern[1].isalnum():
+        char, rest = pattern[1], pattern[2:]
+    elif pattern and pattern[0] not in _regex_special:
+        char, rest = pattern[0], pattern[1:]
+    else:
+        return None
+    if rest.startswith(_optional_quantifiers):
+        return None
+    return char.lower()
+
+
+class Route:
+    """ A registered handler together with the filters it is routed by. """
+
+    __slots__ = ("seq", "callback", "match", "trigger", "incoming", "outgoing", "edited")
+
+    def __init__(self, seq, callback, pattern, incoming, outgoing, edited):
+        self.seq = seq
+        self.callback = callback
+        self.match = re.compile(pattern).match if pattern else None
+        self.trigger = leading_trigger(pattern) if pattern else None
+        # Same defaults as telethon's NewMessage builder.
+        if incoming is None and outgoing is not None:
+            incoming = not outgoing
+        elif outgoing is None and incoming is not None:
+            outgoing = not incoming
+        self.incoming = incoming
+        self.outgoing = outgoing
+        self.edited = edited
+
+    def __repr__(self):
+        return f"<Route {self.callback.__module__}.{self.callback.__name__}>"
+
+    def accepts(self, out, edited):
+        if edited and not self.edited:
+            return False
+        if self.incoming and out:
+            return False
+        return not (self.outgoing and not out)
+
+
+class SelfUser:
+    """ Long-lived cache of client.get_me(), dropped on profile changes. """
+
+    def __init__(self):
+        self.user = None
+
+    async def get(self, client):
+        if self.user is None:
+            self.user = await client.get_me()
+        return self.user
+
+    def invalidate(self):
+        self.user = None
+
+    async def on_user_name(self, update):
+        if self.user is not None and update.user_id == self.user.id:
+            self.invalidate()
+
+
+SELF_USER = SelfUser()
+bot.add_event_handler(SELF_USER.on_user_name, events.Raw(UpdateUserName))
+
+
+class UpdateContext:
+    """ Entities of one update, resolved at most once and shared by
+        every handler the update is routed to. """
+
+    __slots__ = ("_event", "_sender", "_chat")
+
+    _unset = object()
+
+    def __init__(self, event):
+        self._event = event
+        self._sender = self._chat = self._unset
+
+    async def get_me(self):
+        return await SELF_USER.get(self._event.client)
+
+    async def get_sender(self):
+        if self._sender is self._unset:
+            self._sender = await self._event.get_sender()
+        return self._sender
+
+    async def get_chat(self):
+        if self._chat is self._unset:
+            self._chat = await self._event.get_chat()
+        return self._chat
+
+    async def sender_is_bot(self):
+        sender = await self.get_sender()
+        return bool(getattr(sender, "bot", False))
+
+
+class Router:
+    """ Routes every message update through one prefix-indexed table
+        instead of one telethon handler per registered function. """
+
+    # Distinct first characters whose candidate lists are kept around.
+    MAX_CACHED_TRIGGERS = 1024
+
+    def __init__(self):
+        self.routes = []
+        self.next_seq = 0
+        # Pattern-less handlers for incoming messages, run on every update.
+        self.passive = []
+        self._catch_all = []
+        self._unsafe = []
+        self._by_trigger = {}
+        self._candidates = {}
+
+    def add(self, callback, pattern=None, incoming=None, outgoing=None, edited=True):
+        route = Route(self.next_seq, callback, pattern, incoming, outgoing, edited)
+        self.next_seq += 1
+        self.routes.append(route)
+        if route.match is None:
+            (self.passive if route.incoming else self._catch_all).append(route)
+        elif route.trigger is UNSAFE:
+            self._unsafe.append(route)
+        elif route.trigger is None:
+            self._catch_all.append(route)
+        else:
+            self._by_trigger.setdefault(route.trigger, []).append(route)
+        self._candidates.clear()
+        return route
+
+    def remove(self, routes):
+        routes = set(routes)
+        for table in (
+            self.routes,
+            self.passive,
+            self._catch_all,
+            self._unsafe,
+            *self._by_trigger.values(),
+        ):
+            table[:] = [route for route in table if route not in routes]
+        self._candidates.clear()
+
+    def candidates(self, text):
+        """ Routes that may match a message text, in registration order. """
+        first = text[:1]
+        routes = self._candidates.get(first)
+        if routes is None:
+            routes = self._catch_all + self.passive
+            routes += self._by_trigger.get(first.lower(), [])
+            if first and _unsafe_first_char(first):
+                routes += self._unsafe
+            routes = tuple(sorted(routes, key=attrgetter("seq")))
+            if len(self._candidates) >= self.MAX_CACHED_TRIGGERS:
+                self._candidates.clear()
+            self._candidates[first] = routes
+        return routes
+
+    async def dispatch(self, event, edited=False):
+        if is_blacklisted(event.chat_id):
+            return
+        event.context = UpdateContext(event)
+        await self.run(event, self.candidates(event.message.message or ""), edited)
+
+    async def run(self, event, routes, edited=False):
+        """ Runs the routes that accept the event, in the given order. """
+        text = event.message.message or ""
+        out = event.message.out
+        for route in routes:
+            if not route.accepts(out, edited):
+                continue
+            if route.match is None:
+                event.pattern_match = None
+            else:
+                event.pattern_match = route.match(text)
+                if not event.pattern_match:
+                    continue
+            try:
+                await route.callback(event)
+            except events.StopPropagation:
+                raise
+            except Exception:
+                LOGS.exception("Erro não tratado em %r", route)
+
+    async def on_new_message(self, event):
+        await self.dispatch(event)
+
+    async def on_message_edited(self, event):
+        await self.dispatch(event, edited=True)
+
+
+ROUTER = Router()
+bot.add_event_handler(ROUTER.on_new_message, events.NewMessage())
+bot.add_event_handler(ROUTER.on_message_edited, events.MessageEdited())
+
+
+class ErrorReport:
+    """ One traceback and every time it happened before being sent. """
+
+    __slots__ = (
+        "client",
+        "chat_id",
+        "traceback",
+        "error",
+        "occurrences",
+        "count",
+        "send_at",
+    )
+
+    def __init__(self, client, chat_id, traceback, error, send_at):
+        self.client = client
+        self.chat_id = chat_id
+        self.traceback = traceback
+        self.error = error
+        self.occurrences = []
+        self.count = 0
+        self.send_at = send_at
+
+
+class ErrorReporter:
+    """ Sends handler error reports from a background task.
+
+        Errors with the same traceback fingerprint are batched into one
+        report, and a fingerprint is reported at most once per cooldown. """
+
+    # Seconds to wait for repeats before sending a new report.
+    BATCH_DELAY = 10
+    # Minimum seconds between two reports of the same error.
+    COOLDOWN = 600
+    # Occurrences listed in a report, the rest are only counted.
+    MAX_LISTED = 10
+
+    def __init__(self):
+        self.pending = {}
+        self.last_sent = {}
+        self.git_log = None
+        self._queue = None
+        self._worker = None
+
+    @staticmethod
+    def fingerprint():
+        error = sys.exc_info()[1]
+        frames = "".join(
+            f"{frame.filename}:{frame.name}:{frame.lineno}"
+            for frame in extract_tb(error.__traceback__)
+        )
+        return sha1(f"{type(error).__name__}{frames}".encode()).hexdigest()
+
+    def report(self, check):
+        """ Queues the exception being handled, never blocks the handler. """
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+        self._queue.put_nowait(
+            (
+                self.fingerprint(),
+                check.client,
+                BOTLOG_CHATID if LOGSPAMMER else check.chat_id,
+                strftime("%Y-%m-%d %H:%M:%S", gmtime()),
+                check.chat_id,
+                check.sender_id,
+                check.text,
+                format_exc(),
+                str(sys.exc_info()[1]),
+            )
+        )
+
+    def _merge(self, record):
+        fingerprint, client, dest, date, chat_id, sender_id, text, tb, error = record
+        key = (fingerprint, dest)
+        report = self.pending.get(key)
+        if report is None:
+            send_at = max(
+                monotonic() + self.BATCH_DELAY,
+                self.last_sent.get(key, -self.COOLDOWN) + self.COOLDOWN,
+            )
+            report = self.pending[key] = ErrorReport(client, dest, tb, error, send_at)
+        report.count += 1
+        if len(report.occurrences) < self.MAX_LISTED:
+            report.occurrences.append((date, chat_id, sender_id, text))
+
+    async def load_git_log(self):
+        """ Runs git log once, every report reuses its output. """
+        if self.git_log is None:
+            self.git_log = await self._get_git_log()
+
+    async def _run(self):
+        await self.load_git_log()
+        while True:
+            timeout = None
+            if self.pending:
+                next_at = min(report.send_at for report in self.pending.values())
+                timeout = max(next_at - monotonic(), 0)
+            try:
+                self._merge(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                pass
+            now = monotonic()
+            for key, report in list(self.pending.items()):
+                if report.send_at <= now:
+                    del self.pending[key]
+                    self.last_sent[key] = now
+                    try:
+                        await self._send(report)
+                    except Exception:
+                        LOGS.exception("Falha ao enviar o relatório de erro")
+
+    @staticmethod
+    async def _get_git_log():
+        command = 'git log --pretty=format:"%an: %s" -10'
+        process = await asyncsubshell(
+            command, stdout=asyncsub.PIPE, stderr=asyncsub.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        return str(stdout.decode().strip()) + str(stderr.decode().strip())
+
+    async def _send(self, report):
+        date, chat_id, sender_id, command = report.occurrences[0]
+
+        text = "**RELATÓRIO DE ERRO DO USERBOT**\n"
+        link = "[SUPORTE](https://t.me/Kircheiss)"
+        text += "Caso queira"
+        text += f"- encaminhe esta mensagem para {link}.\n"
+        text += "Nada será registrado, exceto o módulo do erro e a data\n"
+
+        ftext = "\nALERTA:\nEste arquivo foi carregado SOMENTE aqui, "
+        ftext += "registramos apenas o motivo do erro e a data, "
+        ftext += "Nós respeitamos sua privacidade, "
+        ftext += "você não deve relatar este erro caso existam "
+        ftext += "quaisquer dados confidenciais aqui, ninguém vai ver seus dados "
+        ftext += "se você escolher não fazer isso.\n\n"
+        ftext += "--------INÍCIO DO RELATÓRIO--------"
+        ftext += "\nData: " + date
+        ftext += "\nChat ID: " + str(chat_id)
+        ftext += "\nUser ID: " + str(sender_id)
+        ftext += "\n\nComando:\n"
+        ftext += str(command)
+        ftext += "\n\nInformações de traceback:\n"
+        ftext += str(report.traceback)
+        ftext += "\n\nTexto de erro:\n"
+        ftext += str(report.error)
+        if report.count > 1:
+            ftext += f"\n\nOcorrências: {report.count}\n"
+            for date, chat_id, sender_id, command in report.occurrences[1:]:
+                ftext += f"{date} - Chat ID: {chat_id} - User ID: {sender_id}\n"
+        ftext += "\n\n--------FIM DO RELATÓRIO--------"
+
+        ftext += "\n\n\nÚltimos 10 commits:\n"
+        ftext += self.git_log
+
+        file = BytesIO(ftext.encode())
+        file.name = "error.log"
+        await report.client.send_file(report.chat_id, file, caption=text)
+
+
+ERRORS = ErrorReporter()
+
+
+def route_pattern(pattern, ignore_unsafe=False):
+    """ The pattern register routes a handler by. """
+    if pattern and not ignore_unsafe:
+        return pattern.replace("^.", UNSAFE_PATTERN, 1)
+    if not pattern.startswith("(?i)"):
+        return "(?i)" + pattern
+    return pattern
+
 
 def register(**args):
     """ Register a new event. """
     pattern = args.get("pattern", None)
     disable_edited = args.get("disable_edited", False)
     ignore_unsafe = args.get("ignore_unsafe", False)
-    unsafe_pattern = r"^[^/!#@\$A-Za-z]"
     groups_only = args.get("groups_only", False)
     trigger_on_fwd = args.get("trigger_on_fwd", False)
     disable_errors = args.get("disable_errors", False)
     insecure = args.get("insecure", False)
 
-    if pattern is not None and not pattern.startswith("(?i)"):
-        args["pattern"] = "(?i)" + pattern
+    if pattern is not None:
+        args["pattern"] = route_pattern(pattern, ignore_unsafe)
 
     if "disable_edited" in args:
         del args["disable_edited"]
@@ -50,9 +468,6 @@ def register(**args):
     if "insecure" in args:
         del args["insecure"]
 
-    if pattern and not ignore_unsafe:
-        args["pattern"] = pattern.replace("^.", unsafe_pattern, 1)
-
     def decorator(func):
         async def wrapper(check):
             if check.edit_date and check.is_channel and not check.is_group:
@@ -67,15 +482,6 @@ def register(**args):
                 await check.respond("`Eu não acho que isso seja um grupo.`")
                 return
 
-            try:
-                from userbot.modules.sql_helper.blacklist_sql import get_blacklist
-
-                for blacklisted in get_blacklist():
-                    if str(check.chat_id) == blacklisted.chat_id:
-                        return
-            except Exception:
-                pass
-
             if check.via_bot_id and not insecure and check.out:
                 return
 
@@ -97,68 +503,24 @@ def register(**args):
                 # Check if we have to disable error logging.
                 if not disable_errors:
                     LOGS.exception(e)  # Log the error in console
+                    ERRORS.report(check)
 
-                    date = strftime("%Y-%m-%d %H:%M:%S", gmtime())
-
-                    text = "**RELATÓRIO DE ERRO DO USERBOT**\n"
-                    link = "[SUPORTE](https://t.me/Kircheiss)"
-                    text += "Caso queira"
-                    text += f"- encaminhe esta mensagem para {link}.\n"
-                    text += "Nada será registrado, exceto o módulo do erro e a data\n"
-
-                    ftext = "\nALERTA:\nEste arquivo foi carregado SOMENTE aqui, "
-                    ftext += "registramos apenas o motivo do erro e a data, "
-                    ftext += "Nós respeitamos sua privacidade, "
-                    ftext += "você não deve relatar este erro caso existam "
-                    ftext += "quaisquer dados confidenciais aqui, ninguém vai ver seus dados "
-                    ftext += "se você escolher não fazer isso.\n\n"
-                    ftext += "--------INÍCIO DO RELATÓRIO--------"
-                    ftext += "\nData: " + date
-                    ftext += "\nChat ID: " + str(check.chat_id)
-                    ftext += "\nUser ID: " + str(check.sender_id)
-                    ftext += "\n\nComando:\n"
-                    ftext += str(check.text)
-                    ftext += "\n\nInformações de traceback:\n"
-                    ftext += str(format_exc())
-                    ftext += "\n\nTexto de erro:\n"
-                    ftext += str(sys.exc_info()[1])
-                    ftext += "\n\n--------FIM DO RELATÓRIO--------"
-
-                    command = 'git log --pretty=format:"%an: %s" -10'
-
-                    ftext += "\n\n\nÚltimos 10 commits:\n"
-
-                    process = await asyncsubshell(
-                        command, stdout=asyncsub.PIPE, stderr=asyncsub.PIPE
-                    )
-                    stdout, stderr = await process.communicate()
-                    result = str(stdout.decode().strip()) + str(stderr.decode().strip())
-
-                    ftext += result
-
-                    with open("error.log", "w+") as file:
-                        file.write(ftext)
-
-                    if LOGSPAMMER:
-                        await check.client.send_file(
-                            BOTLOG_CHATID,
-                            "error.log",
-                            caption=text,
-                        )
-                    else:
-                        await check.client.send_file(
-                            check.chat_id,
-                            "error.log",
-                            caption=text,
-                        )
-
-                    remove("error.log")
-            else:
-                pass
+        wrapper.__name__ = func.__name__
+        wrapper.__module__ = func.__module__
+
+        if set(args) <= ROUTED_ARGS:
+            ROUTER.add(wrapper, edited=not disable_edited, **args)
+            return wrapper
+
+        # Filters the router doesn't know about are left to telethon.
+        async def unrouted(check):
+            if not is_blacklisted(check.chat_id):
+                check.context = UpdateContext(check)
+                await wrapper(check)
 
         if not disable_edited:
-            bot.add_event_handler(wrapper, events.MessageEdited(**args))
-        bot.add_event_handler(wrapper, events.NewMessage(**args))
+            bot.add_event_handler(unrouted, events.MessageEdited(**args))
+        bot.add_event_handler(unrouted, events.NewMessage(**args))
         return wrapper
 
     return decorator
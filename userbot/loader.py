@@ -0,0 +1,221 @@
+# Copyright (C) 2019 The Raphielscape Company LLC.
+#
+# Licensed under the Raphielscape Public License, Version 1.c (the "License");
+# you may not use this file except in compliance with the License.
+#
+""" Userbot module loader.
+ Modules can be imported at startup, or only the first time one of their
+ commands is used. """
+
+import ast
+import sys
+from importlib import import_module
+from os.path import dirname, join
+from time import perf_counter
+
+from telethon import events
+
+from userbot import LOGS
+from userbot.events import ROUTER, route_pattern
+
+PACKAGE = "userbot.modules"
+MODULES_DIR = join(dirname(__file__), "modules")
+# register arguments that only change what the wrapper does, so a command
+# can be routed before its module is imported.
+DEFERRABLE_ARGS = {
+    "pattern",
+    "incoming",
+    "outgoing",
+    "disable_edited",
+    "ignore_unsafe",
+    "groups_only",
+    "trigger_on_fwd",
+    "disable_errors",
+    "insecure",
+}
+
+
+class Command:
+    """ Literal arguments of one register call. """
+
+    __slots__ = ("pattern", "edited")
+
+    def __init__(self, args):
+        self.pattern = route_pattern(args["pattern"], args.get("ignore_unsafe", False))
+        self.edited = not args.get("disable_edited", False)
+
+
+class ModuleInfo:
+    """ What a module registers, read from its source without importing it. """
+
+    __slots__ = ("name", "commands", "help", "eager_reason")
+
+    def __init__(self, name):
+        self.name = name
+        self.commands = []
+        self.help = []
+        # Why the module must be imported at startup, None if it can wait.
+        self.eager_reason = None
+
+    @property
+    def eager(self):
+        return self.eager_reason is not None
+
+
+def _literal_args(call):
+    if call.args:
+        return None
+    args = {}
+    for keyword in call.keywords:
+        if keyword.arg is None:
+            return None
+        try:
+            args[keyword.arg] = ast.literal_eval(keyword.value)
+        except ValueError:
+            return None
+    return args
+
+
+def _is_call_to(node, name):
+    func = node.func
+    return (isinstance(func, ast.Name) and func.id == name) or (
+        isinstance(func, ast.Attribute) and func.attr == name
+    )
+
+
+def scan_module(name):
+    """ Reads the register calls and help entries of a module. """
+    info = ModuleInfo(name)
+    with open(join(MODULES_DIR, name + ".py"), encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        if _is_call_to(node, "register"):
+            args = _literal_args(node)
+            if args is None:
+                info.eager_reason = "argumentos não literais"
+            elif not args.get("pattern"):
+                info.eager_reason = "handler passivo"
+            elif args.get("incoming") or not args.get("outgoing"):
+                info.eager_reason = "handler de mensagens recebidas"
+            elif not set(args) <= DEFERRABLE_ARGS:
+                info.eager_reason = "filtros do telethon"
+            else:
+                info.commands.append(Command(args))
+        elif _is_call_to(node, "on") or _is_call_to(node, "add_event_handler"):
+            info.eager_reason = "handler do telethon"
+        elif (
+            _is_call_to(node, "update")
+            and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "CMD_HELP"
+            and node.args
+            and isinstance(node.args[0], ast.Dict)
+        ):
+            info.help.extend(
+                key.value
+                for key in node.args[0].keys
+                if isinstance(key, ast.Constant) and isinstance(key.value, str)
+            )
+    if not info.commands and info.eager_reason is None:
+        info.eager_reason = "sem comandos"
+    return info
+
+
+class ModuleLoader:
+    """ Imports modules, and routes the commands of deferred ones to a stub
+        that imports them and hands the message over to the real handlers. """
+
+    def __init__(self, router):
+        self.router = router
+        self.manifest = {}
+        self._stubs = {}
+
+    @staticmethod
+    def is_loaded(name):
+        return f"{PACKAGE}.{name}" in sys.modules
+
+    def import_module(self, name):
+        start = perf_counter()
+        module = import_module(f"{PACKAGE}.{name}")
+        elapsed = (perf_counter() - start) * 1000
+        LOGS.info("Módulo %s importado em %.0f ms", name, elapsed)
+        return module
+
+    def load_all(self, names, lazy=False):
+        start = perf_counter()
+        if lazy:
+            scan_start = perf_counter()
+            self.manifest = {name: scan_module(name) for name in names}
+            LOGS.info(
+                "Manifesto de módulos lido em %.0f ms",
+                (perf_counter() - scan_start) * 1000,
+            )
+        for name in names:
+            info = self.manifest.get(name)
+            if info is not None and info.eager:
+                LOGS.debug("Módulo %s não será adiado: %s", name, info.eager_reason)
+            if (info is None or info.eager) and not self.is_loaded(name):
+                self.import_module(name)
+        for name, info in self.manifest.items():
+            if not self.is_loaded(name):
+                self.defer(info)
+        LOGS.info(
+            "%s módulos importados e %s adiados em %.2f s",
+            len(names) - len(self._stubs),
+            len(self._stubs),
+            perf_counter() - start,
+        )
+
+    def defer(self, info):
+        async def stub(event):
+            routes = self.load(info.name)
+            edited = isinstance(event, events.MessageEdited.Event)
+            await self.router.run(event, routes, edited)
+
+        stub.__name__ = "lazy_" + info.name
+        stub.__module__ = f"{PACKAGE}.{info.name}"
+        self._stubs[info.name] = [
+            self.router.add(
+                stub, pattern=command.pattern, outgoing=True, edited=command.edited
+            )
+            for command in info.commands
+        ]
+
+    def load(self, name):
+        """ Imports a deferred module and returns the routes it added, none
+            if it was already imported. """
+        if self.is_loaded(name):
+            return []
+        first = self.router.next_seq
+        try:
+            self.import_module(name)
+        except Exception:
+            # Drop what the failed modules registered before raising, the
+            # stubs stay so the next command tries again.
+            self.router.remove(
+                route
+                for route in self.router.routes[:]
+                if route.seq >= first
+                and route.callback.__module__ not in sys.modules
+            )
+            raise
+        finally:
+            # The module may have imported other deferred ones.
+            for loaded in [other for other in self._stubs if self.is_loaded(other)]:
+                self.router.remove(self._stubs.pop(loaded))
+        return [route for route in self.router.routes if route.seq >= first]
+
+    def help_names(self):
+        """ Help entries of every module, imported or not. """
+        return {key for info in self.manifest.values() for key in info.help}
+
+    def load_help(self, key):
+        """ Imports the deferred module a help entry belongs to. """
+        for name, info in self.manifest.items():
+            if key in info.help and name in self._stubs:
+                self.load(name)
+
+
+LOADER = ModuleLoader(ROUTER)
@@ -304,6 +304,7 @@ async def spider(spdr):
     """
     # Check if the function running under SQL mode
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.spam_mute_sql import mute
     except AttributeError:
         return await spdr.edit(NO_SQL)
@@ -330,7 +331,7 @@ async def spider(spdr):
 
     # If everything goes well, do announcing and mute
     await spdr.edit("**Silenciando...**")
-    if mute(spdr.chat_id, user.id) is False:
+    if await run_sql(mute, spdr.chat_id, user.id) is False:
         return await spdr.edit("**Erro! O usuário provavelmente já está silenciado.**")
     try:
         await spdr.client(EditBannedRequest(spdr.chat_id, user.id, MUTE_RIGHTS))
@@ -370,6 +371,7 @@ async def unmoot(unmot):
 
     # Check if the function running under SQL mode
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.spam_mute_sql import unmute
     except AttributeError:
         return await unmot.edit(NO_SQL)
@@ -381,7 +383,7 @@ async def unmoot(unmot):
     if not user:
         return
 
-    if unmute(unmot.chat_id, user.id) is False:
+    if await run_sql(unmute, unmot.chat_id, user.id) is False:
         return await unmot.edit("**Erro! O usuário provavelmente já está desmutado.**")
     try:
         await unmot.client(EditBannedRequest(unmot.chat_id, user.id, UNBAN_RIGHTS))
@@ -404,10 +406,11 @@ async def unmoot(unmot):
 async def muter(moot):
     """ Used for deleting the messages of muted people """
     try:
-        from userbot.modules.sql_helper.spam_mute_sql import is_muted
+        from userbot.modules.sql_helper.spam_mute_sql import is_user_muted
     except AttributeError:
         return
-    muted = is_muted(moot.chat_id)
+    if not is_user_muted(moot.chat_id, moot.sender_id):
+        return
     rights = ChatBannedRights(
         until_date=None,
         send_messages=True,
@@ -418,21 +421,16 @@ async def muter(moot):
         send_inline=True,
         embed_links=True,
     )
-    if muted:
-        for i in muted:
-            if str(i.sender) == str(moot.sender_id):
-                try:
-                    await moot.delete()
-                    await moot.client(
-                        EditBannedRequest(moot.chat_id, moot.sender_id, rights)
-                    )
-                except (
-                    BadRequestError,
-                    UserAdminInvalidError,
-                    ChatAdminRequiredError,
-                    UserIdInvalidError,
-                ):
-                    await moot.client.send_read_acknowledge(moot.chat_id, moot.id)
+    try:
+        await moot.delete()
+        await moot.client(EditBannedRequest(moot.chat_id, moot.sender_id, rights))
+    except (
+        BadRequestError,
+        UserAdminInvalidError,
+        ChatAdminRequiredError,
+        UserIdInvalidError,
+    ):
+        await moot.client.send_read_acknowledge(moot.chat_id, moot.id)
 
 
 @register(outgoing=True, pattern=r"^\.zombies(?: |$)(.*)", groups_only=False)
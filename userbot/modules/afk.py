@@ -66,9 +66,8 @@ async def mention_afk(mention):
     global USERS
     global ISAFK
     if mention.message.mentioned and ISAFK:
-        is_bot = False
-        if (sender := await mention.get_sender()) :
-            is_bot = sender.bot
+        sender = await mention.context.get_sender()
+        is_bot = await mention.context.sender_is_bot()
         if not is_bot and mention.sender_id not in USERS:
             if AFKREASON:
                 await mention.reply("• `Oi! Neste exato momento eu estou ausente`" f"\n `Motivo:` **{AFKREASON}**")
@@ -98,13 +97,14 @@ async def afk_on_pm(sender):
     if (
         sender.is_private
         and sender.sender_id != 777000
-        and not (await sender.get_sender()).bot
+        and not await sender.context.sender_is_bot()
     ):
         if PM_AUTO_BAN:
             try:
+                from userbot.modules.sql_helper import run_sql
                 from userbot.modules.sql_helper.pm_permit_sql import is_approved
 
-                apprv = is_approved(sender.sender_id)
+                apprv = await run_sql(is_approved, sender.sender_id)
             except AttributeError:
                 apprv = True
         else:
@@ -4,15 +4,16 @@
 # you may not use this file except in compliance with the License.
 #
 
+import asyncio
 from io import BytesIO
 from random import choice, randint
 from textwrap import wrap
 
 from PIL import Image, ImageDraw, ImageFont
-from requests import get
 
 from userbot import CMD_HELP
 from userbot.events import register
+from userbot.utils import http_get
 
 
 @register(outgoing=True, pattern="^.saylie (.*)")
@@ -58,8 +59,11 @@ async def f_load(message):
         return
 
     url = "https://raw.githubusercontent.com/KeyZenD/AmongUs/master/"
-    font = ImageFont.truetype(BytesIO(get(url + "bold.ttf").content), 60)
-    imposter = Image.open(BytesIO(get(f"{url}{clr}.png").content))
+    font, imposter = await asyncio.gather(
+        http_get(url + "bold.ttf"), http_get(f"{url}{clr}.png")
+    )
+    font = ImageFont.truetype(BytesIO(font.content), 60)
+    imposter = Image.open(BytesIO(imposter.content))
     text_ = "\n".join(["\n".join(wrap(part, 30)) for part in text.split("\n")])
     w, h = ImageDraw.Draw(Image.new("RGB", (1, 1))).multiline_textsize(
         text_, font, stroke_width=2
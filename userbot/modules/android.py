@@ -5,14 +5,14 @@
 #
 """ Userbot module containing commands related to android"""
 
-import json
+import asyncio
 import re
 
 from bs4 import BeautifulSoup
-from requests import get
 
 from userbot import CMD_HELP
 from userbot.events import register
+from userbot.utils import http_get
 
 GITHUB = "https://github.com"
 
@@ -26,8 +26,9 @@ async def magisk(request):
         "Canary": "https://raw.githubusercontent.com/topjohnwu/magisk_files/canary/canary.json",
     }
     releases = "Últimos lançamentos do Magisk:\n"
-    for name, release_url in magisk_dict.items():
-        data = get(release_url).json()
+    responses = await asyncio.gather(*map(http_get, magisk_dict.values()))
+    for name, response in zip(magisk_dict, responses):
+        data = response.json()
         if str(name) == "Canary":
             data["magisk"]["link"] = (
                 "https://github.com/topjohnwu/magisk_files/raw/canary/"
@@ -61,12 +62,12 @@ async def device_info(request):
     else:
         await request.edit("**Uso:** `.device <codinome/modelo>`")
         return
-    data = json.loads(
-        get(
+    data = (
+        await http_get(
             "https://raw.githubusercontent.com/androidtrackers/"
             "certified-android-devices/master/by_device.json"
-        ).text
-    )
+        )
+    ).json()
     results = data.get(codename)
     if results:
         reply = f"**Resultados da busca por** `{codename}`:\n\n"
@@ -97,12 +98,12 @@ async def codename_info(request):
         await request.edit("**Uso:** `.codename <marca> <dispositivo>`")
         return
 
-    data = json.loads(
-        get(
+    data = (
+        await http_get(
             "https://raw.githubusercontent.com/androidtrackers/"
             "certified-android-devices/master/by_brand.json"
-        ).text
-    )
+        )
+    ).json()
     devices_lower = {k.lower(): v for k, v in data.items()}  # Lower brand names in JSON
     devices = devices_lower.get(brand)
     results = [
@@ -141,7 +142,10 @@ async def devices_specifications(request):
         return
     all_brands = (
         BeautifulSoup(
-            get("https://www.devicespecifications.com/en/brand-more").content, "lxml"
+            (
+                await http_get("https://www.devicespecifications.com/en/brand-more")
+            ).content,
+            "lxml",
         )
         .find("div", {"class": "brand-listing-container-news"})
         .findAll("a")
@@ -153,7 +157,7 @@ async def devices_specifications(request):
         ][0]
     except IndexError:
         await request.edit(f"`{brand}` **é uma marca desconhecida!**")
-    devices = BeautifulSoup(get(brand_page_url).content, "lxml").findAll(
+    devices = BeautifulSoup((await http_get(brand_page_url)).content, "lxml").findAll(
         "div", {"class": "model-listing-container-80"}
     )
     device_page_url = None
@@ -169,7 +173,7 @@ async def devices_specifications(request):
         device_page_url = device_page_url[:2]
     reply = ""
     for url in device_page_url:
-        info = BeautifulSoup(get(url).content, "lxml")
+        info = BeautifulSoup((await http_get(url)).content, "lxml")
         reply = "\n" + info.title.text.split("-")[0].strip() + "\n"
         info = info.find("div", {"id": "model-brief-specifications"})
         specifications = re.findall(r"<b>.*?<br/>", str(info))
@@ -197,8 +201,8 @@ async def twrp(request):
     else:
         await request.edit("**Uso:** `.twrp <codinome>`")
         return
-    url = get(f"https://dl.twrp.me/{device}/")
-    if url.status_code == 404:
+    url = await http_get(f"https://dl.twrp.me/{device}/")
+    if url.status == 404:
         reply = f"**Não foi possível encontrar downloads do TWRP para** `{device}`!`\n"
         await request.edit(reply)
         return
@@ -7,7 +7,7 @@
 
 from asyncio import sleep
 
-from requests import get
+import aiohttp
 from telethon.events import ChatAction
 from telethon.tl.types import ChannelParticipantsAdmins, Message
 
@@ -19,6 +19,7 @@ from userbot import (
     CMD_HELP,
     bot,
 )
+from userbot.utils import http_get
 
 
 @bot.on(ChatAction)
@@ -89,7 +90,9 @@ async def ANTI_SPAMBOTS(welcm):
                     try:
                         # https://t.me/combotnews/283
                         cas_url = f"https://api.cas.chat/check?user_id={check_user.id}"
-                        r = get(cas_url, timeout=3)
+                        r = await http_get(
+                            cas_url, retries=0, timeout=aiohttp.ClientTimeout(total=3)
+                        )
                         data = r.json()
                     except BaseException:
                         print(
@@ -3,8 +3,10 @@
 # Licensed under the Raphielscape Public License, Version 1.c (the "License");
 # you may not use this file except in compliance with the License.
 
+import asyncio
 import math
 import os
+import threading
 from asyncio import sleep
 from subprocess import PIPE, Popen
 
@@ -13,7 +15,7 @@ from requests import get
 
 from userbot import CMD_HELP, LOGS, TEMP_DOWNLOAD_DIRECTORY
 from userbot.events import register
-from userbot.utils import humanbytes
+from userbot.utils import PROGRESS, humanbytes
 
 
 def subprocess_run(cmd):
@@ -69,6 +71,128 @@ aria2 = aria2p.API(aria2p.Client(host="http://localhost", port=8210, secret=""))
 aria2.set_global_options({"dir": download_path})
 
 
+class Watch:
+    """ A tracked download and the message showing it. """
+
+    __slots__ = ("event", "header", "shown", "done", "failures")
+
+    def __init__(self, event, header, done):
+        self.event = event
+        self.header = header
+        self.shown = None
+        self.done = done
+        self.failures = 0
+
+
+class Aria2Monitor:
+    """
+    Single tracker for every download followed by a message. Each tick
+    fetches the status of all tracked gids in one multicall, and aria2's
+    websocket notifications (start, stop, complete, error) wake it up right
+    away instead of waiting for the next tick.
+    """
+
+    TICK = 15
+    MAX_FAILURES = 3
+
+    def __init__(self):
+        self.watches = {}
+        self._wake = None
+        self._task = None
+        self._listening = False
+
+    async def track(self, gid, event, header=""):
+        """ Shows the progress of gid in event until it completes, fails
+            or is removed, then returns its last Download. """
+        loop = asyncio.get_event_loop()
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        self._listen(loop)
+        watch = self.watches.get(gid)
+        if watch is None:
+            watch = self.watches[gid] = Watch(event, header, loop.create_future())
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        self._wake.set()
+        return await asyncio.shield(watch.done)
+
+    def _listen(self, loop):
+        if self._listening:
+            return
+        self._listening = True
+
+        def notify(gid):
+            if gid in self.watches:
+                loop.call_soon_threadsafe(self._wake.set)
+
+        def listen():
+            try:
+                aria2.client.listen_to_notifications(
+                    on_download_start=notify,
+                    on_download_pause=notify,
+                    on_download_stop=notify,
+                    on_download_complete=notify,
+                    on_download_error=notify,
+                    on_bt_download_complete=notify,
+                    handle_signals=False,
+                )
+            except Exception as e:
+                LOGS.info(f"Notificações do aria2 indisponíveis: {e}")
+
+        # A daemon thread, aria2p's own would keep the userbot from exiting.
+        threading.Thread(target=listen, name="aria2-notify", daemon=True).start()
+
+    def _fetch(self, gids):
+        calls = [(aria2p.Client.TELL_STATUS, [gid]) for gid in gids]
+        statuses = {}
+        for gid, result in zip(gids, aria2.client.multicall2(calls)):
+            # Every call answers [status], or a fault when the gid is gone
+            statuses[gid] = (
+                aria2p.Download(aria2, result[0]) if isinstance(result, list) else None
+            )
+        return statuses
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while self.watches:
+            self._wake.clear()
+            gids = list(self.watches)
+            try:
+                statuses = await loop.run_in_executor(None, self._fetch, gids)
+            except Exception as e:
+                # Retried on the next tick, a watch only fails once it has
+                # failed MAX_FAILURES ticks in a row.
+                LOGS.warning(f"Falha ao consultar o aria2: {e}")
+                statuses = {}
+                for gid in gids:
+                    watch = self.watches[gid]
+                    watch.failures += 1
+                    if watch.failures >= self.MAX_FAILURES:
+                        del self.watches[gid]
+                        watch.done.set_exception(e)
+            for gid, file in statuses.items():
+                watch = self.watches[gid]
+                watch.failures = 0
+                if file is None or file.status in ("complete", "error", "removed"):
+                    del self.watches[gid]
+                    watch.done.set_result(file)
+                    continue
+                msg = watch.header + render_progress(file)
+                if msg != watch.shown:
+                    watch.shown = msg
+                    try:
+                        await PROGRESS.edit(watch.event, msg)
+                    except Exception:
+                        pass
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.TICK)
+            except asyncio.TimeoutError:
+                pass
+
+
+MONITOR = Aria2Monitor()
+
+
 @register(outgoing=True, pattern=r"^\.amag(?: |$)(.*)")
 async def magnet_download(event):
     magnet_uri = event.pattern_match.group(1)
@@ -78,11 +202,7 @@ async def magnet_download(event):
     except Exception as e:
         LOGS.info(str(e))
         return await event.edit(f"**Erro:**\n`{e}`")
-    gid = download.gid
-    await check_progress_for_dl(gid=gid, event=event, previous=None)
-    await sleep(15)
-    new_gid = await check_metadata(gid)
-    await check_progress_for_dl(gid=new_gid, event=event, previous=None)
+    await check_progress_for_dl(download.gid, event)
 
 
 @register(outgoing=True, pattern=r"^\.ator(?: |$)(.*)")
@@ -95,8 +215,7 @@ async def torrent_download(event):
         )
     except Exception as e:
         return await event.edit(f"**Erro:**\n`{e}`")
-    gid = download.gid
-    await check_progress_for_dl(gid=gid, event=event, previous=None)
+    await check_progress_for_dl(download.gid, event)
 
 
 @register(outgoing=True, pattern=r"^\.aurl(?: |$)(.*)")
@@ -107,12 +226,7 @@ async def aurl_download(event):
     except Exception as e:
         LOGS.info(str(e))
         return await event.edit(f"**Erro:**\n`{e}`")
-    gid = download.gid
-    await check_progress_for_dl(gid=gid, event=event, previous=None)
-    file = aria2.get_download(gid)
-    if file.followed_by_ids:
-        new_gid = await check_metadata(gid)
-        await check_progress_for_dl(gid=new_gid, event=event, previous=None)
+    await check_progress_for_dl(download.gid, event)
 
 
 @register(outgoing=True, pattern=r"^\.aclear(?: |$)(.*)")
@@ -187,62 +301,43 @@ async def show_all(event):
     await event.delete()
 
 
-async def check_metadata(gid):
-    file = aria2.get_download(gid)
-    new_gid = file.followed_by_ids[0]
-    LOGS.info("Alterando GID " + gid + " to" + new_gid)
-    return new_gid
-
-
-async def check_progress_for_dl(gid, event, previous):
-    complete = None
-    while not complete:
-        file = aria2.get_download(gid)
-        complete = file.is_complete
-        try:
-            if complete or file.error_message:
-                await event.edit(f"`{msg}`")
-            else:
-                percentage = int(file.progress)
-                downloaded = percentage * int(file.total_length) / 100
-                prog_str = "**Baixando:** `[{}{}]` **{}**".format(
-                    "".join("●" for _ in range(math.floor(percentage / 10))),
-                    "".join("○" for _ in range(10 - math.floor(percentage / 10))),
-                    file.progress_string(),
-                )
-
-                msg = (
-                    f"**Nome:** `{file.name}`\n"
-                    f"**Status:** {file.status.capitalize()}\n"
-                    f"{prog_str}\n"
-                    f"{humanbytes(downloaded)} de {file.total_length_string()}"
-                    f" @ {file.download_speed_string()}\n"
-                    f"**Tempo estimado:** {file.eta_string()}\n"
-                )
-                if msg != previous:
-                    await event.edit(msg)
-                    msg = previous
-            await sleep(15)
-            await check_progress_for_dl(gid, event, previous)
-            file = aria2.get_download(gid)
-            complete = file.is_complete
-            if complete:
-                return await event.edit(
-                    "**Baixado com sucesso!**\n\n"
-                    f"**Nome:** `{file.name}`\n"
-                    f"**Tamanho:** {file.total_length_string()}\n"
-                    f"**Local:** `{TEMP_DOWNLOAD_DIRECTORY + file.name}`\n"
-                )
-        except Exception as e:
-            if " not found" in str(e) or "'file'" in str(e):
-                await event.edit(f"**Download cancelado:**\n`{file.name}`")
-                await sleep(2.5)
-                return await event.delete()
-            if " depth exceeded" in str(e):
-                file.remove(force=True)
-                await event.edit(
-                    f"**Download cancelado automaticamente:**\n`{file.name}`\n**O link/torrent fornecido não existe.**"
-                )
+def render_progress(file):
+    percentage = int(file.progress)
+    downloaded = percentage * int(file.total_length) / 100
+    prog_str = "**Baixando:** `[{}{}]` **{}**".format(
+        "".join("●" for _ in range(math.floor(percentage / 10))),
+        "".join("○" for _ in range(10 - math.floor(percentage / 10))),
+        file.progress_string(),
+    )
+    return (
+        f"**Nome:** `{file.name}`\n"
+        f"**Status:** {file.status.capitalize()}\n"
+        f"{prog_str}\n"
+        f"{humanbytes(downloaded)} de {file.total_length_string()}"
+        f" @ {file.download_speed_string()}\n"
+        f"**Tempo estimado:** {file.eta_string()}\n"
+    )
+
+
+async def check_progress_for_dl(gid, event):
+    """ Follows gid, and the download its metadata leads to, until done. """
+    file = await MONITOR.track(gid, event)
+    while file is not None and file.is_complete and file.followed_by_ids:
+        file = await MONITOR.track(file.followed_by_ids[0], event)
+    if file is None or file.status == "removed":
+        await event.edit("**Download cancelado.**")
+        await sleep(2.5)
+        return await event.delete()
+    if file.has_failed:
+        return await event.edit(
+            f"**Download falhou:**\n`{file.name}`\n**Motivo:** `{file.error_message}`"
+        )
+    return await event.edit(
+        "**Baixado com sucesso!**\n\n"
+        f"**Nome:** `{file.name}`\n"
+        f"**Tamanho:** {file.total_length_string()}\n"
+        f"**Local:** `{TEMP_DOWNLOAD_DIRECTORY + file.name}`\n"
+    )
 
 
 CMD_HELP.update(
@@ -10,6 +10,7 @@ from userbot.events import register
 async def blacklist(event):
     """Adds given chat to blacklist."""
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.blacklist_sql import add_blacklist
     except IntegrityError:
         return await event.edit("**Executando em modo não SQL!**")
@@ -25,7 +26,7 @@ async def blacklist(event):
         return await event.edit("**Erro: nome de usuário/ID inválido fornecido.**")
 
     try:
-        add_blacklist(str(chat_id))
+        await run_sql(add_blacklist, str(chat_id))
     except IntegrityError:
         return await event.edit("**O bate-papo já está na lista negra.**")
 
@@ -36,6 +37,7 @@ async def blacklist(event):
 async def unblacklist(event):
     """Unblacklists given chat."""
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.blacklist_sql import (
             del_blacklist,
             get_blacklist,
@@ -52,18 +54,18 @@ async def unblacklist(event):
     if chat_id == "all":
         from userbot.modules.sql_helper.blacklist_sql import del_blacklist_all
 
-        del_blacklist_all()
+        await run_sql(del_blacklist_all)
         return await event.edit("**Apagadas todas as listas negras!**")
 
     id_exists = False
-    for i in get_blacklist():
+    for i in await run_sql(get_blacklist):
         if chat_id == i.chat_id:
             id_exists = True
 
     if not id_exists:
         return await event.edit("**Este bate-papo não está na lista negra.**")
 
-    del_blacklist(chat_id)
+    await run_sql(del_blacklist, chat_id)
     await event.edit("**Bate-papo removido da lista negra!**")
 
 
@@ -71,11 +73,12 @@ async def unblacklist(event):
 async def list_blacklist(event):
     """Lists all blacklisted chats."""
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.blacklist_sql import get_blacklist
     except IntegrityError:
         return await event.edit("**Executando em modo não SQL!**")
 
-    chat_list = get_blacklist()
+    chat_list = await run_sql(get_blacklist)
     if not chat_list:
         return await event.edit("**Você ainda não colocou nenhum bate-papo na lista negra!**")
 
@@ -83,10 +83,11 @@ async def kickme(leave):
 async def unmute_chat(unm_e):
     """ For .unmutechat command, unmute a muted chat. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.keep_read_sql import unkread
     except AttributeError:
         return await unm_e.edit("**Executando em modo não SQL!**")
-    unkread(str(unm_e.chat_id))
+    await run_sql(unkread, str(unm_e.chat_id))
     await unm_e.edit("**Chat desmutado com sucesso!**")
     await sleep(2)
     await unm_e.delete()
@@ -96,11 +97,12 @@ async def unmute_chat(unm_e):
 async def mute_chat(mute_e):
     """ For .mutechat command, mute any chat. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.keep_read_sql import kread
     except AttributeError:
         return await mute_e.edit("**Executando em modo não SQL!**")
     await mute_e.edit(str(mute_e.chat_id))
-    kread(str(mute_e.chat_id))
+    await run_sql(kread, str(mute_e.chat_id))
     await mute_e.edit("**Shhh! Este chat será silenciado!**")
     await sleep(2)
     await mute_e.delete()
@@ -114,24 +116,22 @@ async def mute_chat(mute_e):
 async def keep_read(message):
     """ The mute logic. """
     try:
-        from userbot.modules.sql_helper.keep_read_sql import is_kread
+        from userbot.modules.sql_helper.keep_read_sql import is_chat_kread
     except AttributeError:
         return
-    kread = is_kread()
-    if kread:
-        for i in kread:
-            if i.groupid == str(message.chat_id):
-                await message.client.send_read_acknowledge(message.chat_id)
+    if is_chat_kread(message.chat_id):
+        await message.client.send_read_acknowledge(message.chat_id)
 
 
 @register(outgoing=True, pattern=r"^s/")
 async def sedNinja(event):
     """For regex-ninja module, auto delete command starting with s/"""
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.globals import gvarstatus
     except AttributeError:
         return await event.edit("**Executando em modo não SQL!**")
-    if gvarstatus("regexNinja"):
+    if await run_sql(gvarstatus, "regexNinja"):
         await event.delete()
 
 
@@ -140,19 +140,21 @@ async def sedNinjaToggle(event):
     """ Enables or disables the regex ninja module. """
     if event.pattern_match.group(1) == "on":
         try:
+            from userbot.modules.sql_helper import run_sql
             from userbot.modules.sql_helper.globals import addgvar
         except AttributeError:
             return await event.edit("**Executando em modo não SQL!**")
-        addgvar("regexNinja", True)
+        await run_sql(addgvar, "regexNinja", True)
         await event.edit("**Modo ninja ativado com sucesso para Regexbot.**")
         await sleep(1)
         await event.delete()
     elif event.pattern_match.group(1) == "off":
         try:
+            from userbot.modules.sql_helper import run_sql
             from userbot.modules.sql_helper.globals import delgvar
         except AttributeError:
             return await event.edit("**Executando em modo não SQL!**")
-        delgvar("regexNinja")
+        await run_sql(delgvar, "regexNinja")
         await event.edit("**Modo ninja desativado com sucesso para Regexbot.**")
         await sleep(1)
         await event.delete()
@@ -9,11 +9,11 @@ from time import time
 from deezloader import Login
 from hachoir.metadata import extractMetadata
 from hachoir.parser import createParser
-from requests import get
 from telethon.tl.types import DocumentAttributeAudio
 
 from userbot import CMD_HELP, DEEZER_ARL_TOKEN, TEMP_DOWNLOAD_DIRECTORY
 from userbot.events import register
+from userbot.utils import http_get
 
 if not TEMP_DOWNLOAD_DIRECTORY.endswith("/"):
     TEMP_DOWNLOAD_DIRECTORY += "/"
@@ -30,7 +30,7 @@ async def deeznuts(event):
         return await event.edit(f"**Erro:** `{e}`")
 
     try:
-        link = get(event.pattern_match.group(1)).url
+        link = (await http_get(event.pattern_match.group(1))).url
     except:
         return await event.edit("**Erro: Link inválido fornecido.**")
 
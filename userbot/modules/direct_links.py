@@ -14,14 +14,12 @@ from asyncio import create_subprocess_shell as asyncSubprocess
 from asyncio.subprocess import PIPE as asyncPIPE
 from random import choice
 
-import aiohttp
-import requests
 from bs4 import BeautifulSoup
 from humanize import naturalsize
 
 from userbot import CMD_HELP, USR_TOKEN
 from userbot.events import register
-from userbot.utils import time_formatter
+from userbot.utils import http_get, http_post, time_formatter
 
 
 async def subprocess_run(cmd):
@@ -99,26 +97,21 @@ async def zippy_share(url: str) -> str:
     }
     reply = ""
     try:
-        session = requests.Session()
-        session.headers.update(_headers)
-        with session as ses:
-            match = re.match(regex_link, url)
-            if not match:
-                raise ValueError("URL inválida: " + str(url))
-            server, id_ = match.group(1), match.group(2)
-            res = ses.get(url)
-            res.raise_for_status()
-            match = re.search(regex_result, res.text)
-            if not match:
-                raise ValueError("Resposta inválida!")
-            val_1 = int(match.group(1))
-            val_2 = math.floor(val_1 / 3)
-            val_3 = int(match.group(2))
-            val = val_1 + val_2 % val_3
-            name = match.group(3)
-            d_l = "https://www{}.zippyshare.com/d/{}/{}/{}".format(
-                server, id_, val, name
-            )
+        match = re.match(regex_link, url)
+        if not match:
+            raise ValueError("URL inválida: " + str(url))
+        server, id_ = match.group(1), match.group(2)
+        res = await http_get(url, headers=_headers)
+        res.raise_for_status()
+        match = re.search(regex_result, res.text)
+        if not match:
+            raise ValueError("Resposta inválida!")
+        val_1 = int(match.group(1))
+        val_2 = math.floor(val_1 / 3)
+        val_3 = int(match.group(2))
+        val = val_1 + val_2 % val_3
+        name = match.group(3)
+        d_l = "https://www{}.zippyshare.com/d/{}/{}/{}".format(server, id_, val, name)
         name = urllib.parse.unquote(d_l.split("/")[-1])
         reply += f"[{name}]({d_l})\n"
     except Exception as err:
@@ -137,7 +130,7 @@ async def yandex_disk(url: str) -> str:
         return reply
     api = "https://cloud-api.yandex.net/v1/disk/public/resources/download?public_key={}"
     try:
-        dl_url = requests.get(api.format(link)).json()["href"]
+        dl_url = (await http_get(api.format(link))).json()["href"]
         name = dl_url.split("filename=")[1].split("&disposition")[0]
         reply += f"[{name}]({dl_url})\n"
     except KeyError:
@@ -180,7 +173,7 @@ async def mediafire(url: str) -> str:
         reply = "**Nenhum link MediaFire encontrado.**\n"
         return reply
     reply = ""
-    page = BeautifulSoup(requests.get(link).content, "lxml")
+    page = BeautifulSoup((await http_get(link)).content, "lxml")
     info = page.find("a", {"aria-label": "Download file"})
     dl_url = info.get("href")
     size = re.findall(r"\(.*\)", info.text)[0]
@@ -203,7 +196,7 @@ async def sourceforge(url: str) -> str:
         f"https://sourceforge.net/settings/mirror_choices?"
         f"projectname={project}&filename={file_path}"
     )
-    page = BeautifulSoup(requests.get(mirrors).content, "html.parser")
+    page = BeautifulSoup((await http_get(mirrors)).content, "html.parser")
     info = page.find("ul", {"id": "mirrorList"}).findAll("li")
     for mirror in info[1:]:
         name = re.findall(r"\((.*)\)", mirror.text.strip())[0]
@@ -222,7 +215,7 @@ async def osdn(url: str) -> str:
     except IndexError:
         reply = "**Nenhum link OSDN encontrado.**\n"
         return reply
-    page = BeautifulSoup(requests.get(link, allow_redirects=True).content, "lxml")
+    page = BeautifulSoup((await http_get(link)).content, "lxml")
     info = page.find("a", {"class": "mirror_link"})
     link = urllib.parse.unquote(osdn_link + info["href"])
     reply = f"Mirrors for __{link.split('/')[-1]}__\n"
@@ -244,7 +237,7 @@ async def github(url: str) -> str:
         return reply
     reply = ""
     dl_url = ""
-    download = requests.get(url, stream=True, allow_redirects=False)
+    download = await http_get(url, allow_redirects=False)
     try:
         dl_url = download.headers["location"]
     except KeyError:
@@ -262,10 +255,9 @@ async def androidfilehost(url: str) -> str:
         reply = "**Nenhum link AFH encontrado.**\n"
         return reply
     fid = re.findall(r"\?fid=(.*)", link)[0]
-    session = requests.Session()
     user_agent = await useragent()
     headers = {"user-agent": user_agent}
-    res = session.get(link, headers=headers, allow_redirects=True)
+    res = await http_get(link, headers=headers)
     headers = {
         "origin": "https://androidfilehost.com",
         "accept-encoding": "gzip, deflate, br",
@@ -283,7 +275,7 @@ async def androidfilehost(url: str) -> str:
     reply = ""
     error = "**Erro: Não é possível encontrar mirrors para o link fornecido.**\n"
     try:
-        req = session.post(
+        req = await http_post(
             "https://androidfilehost.com/libs/otf/mirrors.otf.php",
             headers=headers,
             data=data,
@@ -318,60 +310,42 @@ async def uptobox(request, url: str) -> str:
     """ Retrieve file informations """
     uri = f"{origin}/info?fileCodes={FILE_CODE}"
     await request.edit("**Recuperando informações do arquivo...**")
-    async with aiohttp.ClientSession() as session:
-        async with session.get(uri) as response:
-            result = json.loads(await response.text())
-            data = result.get("data").get("list")[0]
-            if "error" in data:
-                await request.edit(
-                    "**Erro!**\n"
-                    f"**Status**: `{data.get('error').get('code')}`\n"
-                    f"**Motivo**: `{data.get('error').get('message')}`"
-                )
-                return
-            file_name = data.get("file_name")
-            file_size = naturalsize(data.get("file_size"))
+    result = (await http_get(uri)).json()
+    data = result.get("data").get("list")[0]
+    if "error" in data:
+        await request.edit(
+            "**Erro!**\n"
+            f"**Status**: `{data.get('error').get('code')}`\n"
+            f"**Motivo**: `{data.get('error').get('message')}`"
+        )
+        return
+    file_name = data.get("file_name")
+    file_size = naturalsize(data.get("file_size"))
     """ Get waiting token and direct download link """
     uri = f"{origin}?token={USR_TOKEN}&file_code={FILE_CODE}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(uri) as response:
-            result = json.loads(await response.text())
-            status = result.get("message")
-            if status == "Waiting needed":
-                wait = result.get("data").get("waiting")
-                waitingToken = result.get("data").get("waitingToken")
-                await request.edit(f"**Esperando por cerca de {time_formatter(wait)}...**")
-                # for some reason it doesn't go as i planned
-                # so make it 1 minute just to be save enough
-                await asyncio.sleep(wait + 60)
-                uri += f"&waitingToken={waitingToken}"
-                async with session.get(uri) as response:
-                    await request.edit("**Gerando link de download direto...**")
-                    result = json.loads(await response.text())
-                    status = result.get("message")
-                    if status == "Success":
-                        webLink = result.get("data").get("dlLink")
-                        await request.edit(f"[{file_name} ({file_size})]({webLink})")
-                    else:
-                        await request.edit(
-                            "**Erro!**\n"
-                            f"**Código de Status**: `{result.get('statusCode')}`\n"
-                            f"**Motivo**: `{result.get('data')}`\n"
-                            f"**Status**: `{status}`"
-                        )
-                    return
-            elif status == "Success":
-                webLink = result.get("data").get("dlLink")
-                await request.edit(f"[{file_name} ({file_size})]({webLink})")
-                return
-            else:
-                await request.edit(
-                    "**Erro!**\n"
-                    f"**Código de Status**: `{result.get('statusCode')}`\n"
-                    f"**Motivo**: `{result.get('data')}`\n"
-                    f"**Status**: `{status}`"
-                )
-                return
+    result = (await http_get(uri)).json()
+    status = result.get("message")
+    if status == "Waiting needed":
+        wait = result.get("data").get("waiting")
+        waitingToken = result.get("data").get("waitingToken")
+        await request.edit(f"**Esperando por cerca de {time_formatter(wait)}...**")
+        # for some reason it doesn't go as i planned
+        # so make it 1 minute just to be save enough
+        await asyncio.sleep(wait + 60)
+        uri += f"&waitingToken={waitingToken}"
+        await request.edit("**Gerando link de download direto...**")
+        result = (await http_get(uri)).json()
+        status = result.get("message")
+    if status == "Success":
+        webLink = result.get("data").get("dlLink")
+        await request.edit(f"[{file_name} ({file_size})]({webLink})")
+    else:
+        await request.edit(
+            "**Erro!**\n"
+            f"**Código de Status**: `{result.get('statusCode')}`\n"
+            f"**Motivo**: `{result.get('data')}`\n"
+            f"**Status**: `{status}`"
+        )
 
 
 async def useragent():
@@ -379,9 +353,11 @@ async def useragent():
     useragent random setter
     """
     useragents = BeautifulSoup(
-        requests.get(
-            "https://developers.whatismybrowser.com/"
-            "useragents/explore/operating_system_name/android/"
+        (
+            await http_get(
+                "https://developers.whatismybrowser.com/"
+                "useragents/explore/operating_system_name/android/"
+            )
         ).content,
         "lxml",
     ).findAll("td", {"class": "useragent"})
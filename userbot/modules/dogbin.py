@@ -5,12 +5,14 @@
 #
 """ Userbot module containing commands for interacting with dogbin(https://del.dog)"""
 
+import asyncio
 import os
 
-from requests import exceptions, get, post
+import aiohttp
 
 from userbot import BOTLOG, BOTLOG_CHATID, CMD_HELP, TEMP_DOWNLOAD_DIRECTORY
 from userbot.events import register
+from userbot.utils import http_get, http_post
 
 DOGBIN_URL = "https://del.dog/"
 NEKOBIN_URL = "https://nekobin.com/"
@@ -47,9 +49,9 @@ async def neko(nekobin):
 
     # Nekobin
     await nekobin.edit("**Colando texto . . .**")
-    resp = post(NEKOBIN_URL + "api/documents", json={"content": message})
+    resp = await http_post(NEKOBIN_URL + "api/documents", json={"content": message})
 
-    if resp.status_code == 201:
+    if resp.status == 201:
         response = resp.json()
         key = response["result"]["key"]
         nekobin_final_url = NEKOBIN_URL + key
@@ -101,9 +103,9 @@ async def paste(pstl):
 
     # Dogbin
     await pstl.edit("**Colando texto...**")
-    resp = post(DOGBIN_URL + "documents", data=message.encode("utf-8"))
+    resp = await http_post(DOGBIN_URL + "documents", data=message.encode("utf-8"))
 
-    if resp.status_code == 200:
+    if resp.status == 200:
         response = resp.json()
         key = response["key"]
         dogbin_final_url = DOGBIN_URL + key
@@ -156,24 +158,23 @@ async def get_dogbin_content(dog_url):
         await dog_url.edit("**Isso é mesmo um url dogbin?**")
         return
 
-    resp = get(f"{DOGBIN_URL}raw/{message}")
-
     try:
+        resp = await http_get(f"{DOGBIN_URL}raw/{message}")
         resp.raise_for_status()
-    except exceptions.HTTPError as HTTPErr:
+    except aiohttp.TooManyRedirects as RedirectsErr:
         await dog_url.edit(
-            "A solicitação retornou um código de status malsucedido.\n\n" + str(HTTPErr)
+            "A solicitação excedeu o número configurado de redirecionamentos máximos."
+            + str(RedirectsErr)
         )
         return
-    except exceptions.Timeout as TimeoutErr:
-        await dog_url.edit("Pedido expirou." + str(TimeoutErr))
-        return
-    except exceptions.TooManyRedirects as RedirectsErr:
+    except aiohttp.ClientResponseError as HTTPErr:
         await dog_url.edit(
-            "A solicitação excedeu o número configurado de redirecionamentos máximos."
-            + str(RedirectsErr)
+            "A solicitação retornou um código de status malsucedido.\n\n" + str(HTTPErr)
         )
         return
+    except asyncio.TimeoutError as TimeoutErr:
+        await dog_url.edit("Pedido expirou." + str(TimeoutErr))
+        return
 
     reply_text = (
         "`Conteúdo do URL dogbin obtido com sucesso!\n\n**Conteúdo:** " + resp.text
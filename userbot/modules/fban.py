@@ -10,6 +10,7 @@ from userbot.events import register
 async def fban(event):
     """Bans a user from connected federations."""
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.fban_sql import get_flist
     except IntegrityError:
         return await event.edit("**Executando em modo não SQL!**")
@@ -33,7 +34,7 @@ async def fban(event):
             "**Erro: Esta ação foi impedida pelos protocolos de autopreservação.**"
         )
 
-    if len(fed_list := get_flist()) == 0:
+    if len(fed_list := await run_sql(get_flist)) == 0:
         return await event.edit("**Você ainda não se conectou a nenhuma federação!**")
 
     user_link = f"[{fban_id}](tg://user?id={fban_id})"
@@ -81,6 +82,7 @@ async def fban(event):
 async def unfban(event):
     """Unbans a user from connected federations."""
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.fban_sql import get_flist
     except IntegrityError:
         return await event.edit("**Executando em modo não SQL!**")
@@ -102,7 +104,7 @@ async def unfban(event):
     if event.sender_id == unfban_id:
         return await event.edit("**Espere, isso é ilegal**")
 
-    if len(fed_list := get_flist()) == 0:
+    if len(fed_list := await run_sql(get_flist)) == 0:
         return await event.edit("**Você ainda não se conectou a nenhuma federação!**")
 
     user_link = f"[{unfban_id}](tg://user?id={unfban_id})"
@@ -150,6 +152,7 @@ async def unfban(event):
 async def addf(event):
     """Adds current chat to connected federations."""
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.fban_sql import add_flist
     except IntegrityError:
         return await event.edit("**Executando em modo não SQL!**")
@@ -158,7 +161,7 @@ async def addf(event):
         return await event.edit("**Passe um nome para se conectar a este grupo!**")
 
     try:
-        add_flist(event.chat_id, fed_name)
+        await run_sql(add_flist, event.chat_id, fed_name)
     except IntegrityError:
         return await event.edit(
             "**Este grupo já está conectado à lista de federações.**"
@@ -171,11 +174,12 @@ async def addf(event):
 async def delf(event):
     """Removes current chat from connected federations."""
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.fban_sql import del_flist
     except IntegrityError:
         return await event.edit("**Executando em modo não SQL!**")
 
-    del_flist(event.chat_id)
+    await run_sql(del_flist, event.chat_id)
     await event.edit("**Removido este grupo da lista de federações!**")
 
 
@@ -183,11 +187,12 @@ async def delf(event):
 async def listf(event):
     """List all connected federations."""
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.fban_sql import get_flist
     except IntegrityError:
         return await event.edit("**Executando em modo não SQL!**")
 
-    if len(fed_list := get_flist()) == 0:
+    if len(fed_list := await run_sql(get_flist)) == 0:
         return await event.edit("**Você ainda não se conectou a nenhuma federação!**")
 
     msg = "**Federações conectadas:**\n\n"
@@ -202,11 +207,12 @@ async def listf(event):
 async def clearf(event):
     """Removes all chats from connected federations."""
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.fban_sql import del_flist_all
     except IntegrityError:
         return await event.edit("**Executando em modo não SQL!**")
 
-    del_flist_all()
+    await run_sql(del_flist_all)
     await event.edit("**Desconectado de todas as federações conectadas!**")
 
 
@@ -5,37 +5,86 @@
 #
 """ Userbot module for filter commands """
 
+import re
 from asyncio import sleep
-from re import IGNORECASE, fullmatch
 
 from userbot import BOTLOG, BOTLOG_CHATID, CMD_HELP
 from userbot.events import register
+from userbot.utils import send_saved_message
+
+# Keywords saved by .filter, matched case insensitively without a regex.
+PLAIN_KEYWORD = re.compile(r"@?\w*")
+MATCHERS = {}
+
+
+class FilterMatcher:
+    """ Matches a message against the filters of a chat, compiled once. """
+
+    def __init__(self, filters):
+        self.filters = filters
+        # Plain keywords are looked up by their text, the others are legacy
+        # patterns matched one by one. Both keep their position in filters,
+        # so the replies follow the order the filters were saved in.
+        self.exact = {}
+        self.patterns = []
+        for position, trigger in enumerate(filters):
+            if PLAIN_KEYWORD.fullmatch(trigger.keyword):
+                self.exact.setdefault(trigger.keyword.lower(), []).append(position)
+                continue
+            try:
+                regex = re.compile(trigger.keyword, re.IGNORECASE)
+            except re.error:
+                continue
+            self.patterns.append((position, regex))
+
+    def match(self, text):
+        """ Returns every filter triggered by text. """
+        positions = self.exact.get(text.lower(), [])
+        if self.patterns:
+            positions = sorted(
+                positions
+                + [
+                    position
+                    for position, regex in self.patterns
+                    if regex.fullmatch(text)
+                ]
+            )
+        return [self.filters[position] for position in positions]
+
+
+def get_matcher(chat_id, filters):
+    """ Returns the chat's matcher, rebuilt whenever its filters change. """
+    matcher = MATCHERS.get(chat_id)
+    if matcher is None or matcher.filters is not filters:
+        matcher = MATCHERS[chat_id] = FilterMatcher(filters)
+    return matcher
 
 
 @register(incoming=True, disable_edited=True, disable_errors=True)
 async def filter_incoming_handler(handler):
     """ Checks if the incoming message contains handler of a filter """
     try:
-        if not (await handler.get_sender()).bot:
+        if not await handler.context.sender_is_bot():
             try:
+                from userbot.modules.sql_helper import run_sql
                 from userbot.modules.sql_helper.filter_sql import get_filters
             except AttributeError:
                 await handler.edit("`Executando em modo não SQL!`")
                 return
             name = handler.raw_text
-            filters = get_filters(handler.chat_id)
+            filters = await run_sql(get_filters, handler.chat_id)
             if not filters:
+                MATCHERS.pop(handler.chat_id, None)
                 return
-            for trigger in filters:
-                pro = fullmatch(trigger.keyword, name, flags=IGNORECASE)
-                if pro:
-                    if trigger.f_mesg_id:
-                        msg_o = await handler.client.get_messages(
-                            entity=BOTLOG_CHATID, ids=int(trigger.f_mesg_id)
-                        )
-                        await handler.reply(msg_o.message, file=msg_o.media)
-                    elif trigger.reply:
-                        await handler.reply(trigger.reply)
+            for trigger in get_matcher(handler.chat_id, filters).match(name):
+                if trigger.f_mesg_id:
+                    await send_saved_message(
+                        handler.client,
+                        trigger.f_mesg_id,
+                        lambda text, media: handler.reply(text, file=media),
+                    )
+                elif trigger.reply:
+                    await handler.reply(trigger.reply)
     except AttributeError:
         pass
 
@@ -44,6 +93,7 @@ async def filter_incoming_handler(handler):
 async def add_new_filter(new_handler):
     """ For .filter command, allows adding new filters in a chat """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.filter_sql import add_filter
     except AttributeError:
         await new_handler.edit("`Executando em modo não SQL!`")
@@ -74,7 +124,10 @@ async def add_new_filter(new_handler):
         rep_msg = await new_handler.get_reply_message()
         string = rep_msg.text
     success = "`Filtro` **{}** `{} com sucesso`"
-    if add_filter(str(new_handler.chat_id), keyword, string, msg_id) is True:
+    if (
+        await run_sql(add_filter, str(new_handler.chat_id), keyword, string, msg_id)
+        is True
+    ):
         await new_handler.edit(success.format(keyword, "adicionado"))
     else:
         await new_handler.edit(success.format(keyword, "atualizado"))
@@ -84,11 +137,12 @@ async def add_new_filter(new_handler):
 async def remove_a_filter(r_handler):
     """ For .stop command, allows you to remove a filter from a chat. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.filter_sql import remove_filter
     except AttributeError:
         return await r_handler.edit("`Executando em modo não SQL!`")
     filt = r_handler.pattern_match.group(1)
-    if not remove_filter(r_handler.chat_id, filt):
+    if not await run_sql(remove_filter, r_handler.chat_id, filt):
         await r_handler.edit(f"`Filtro` **{filt}** `não existe.`")
     else:
         await r_handler.edit(f"`Filtro` **{filt}** `foi excluído com sucesso`")
@@ -123,11 +177,12 @@ async def kick_marie_filter(event):
 async def filters_active(event):
     """ For .filters command, lists all of the active filters in a chat. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.filter_sql import get_filters
     except AttributeError:
         return await event.edit("`Executando em modo não SQL!`")
     transact = "`Não há filtros neste chat.`"
-    filters = get_filters(event.chat_id)
+    filters = await run_sql(get_filters, event.chat_id)
     for filt in filters:
         if transact == "`Não há filtros neste chat.`":
             transact = "Filtros ativos neste chat:\n"
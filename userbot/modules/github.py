@@ -4,10 +4,9 @@
 # you may not use this file except in compliance with the License.
 #
 
-import aiohttp
-
 from userbot import CMD_HELP
 from userbot.events import register
+from userbot.utils import get_session
 
 GIT_TEMP_DIR = "./userbot/temp/"
 
@@ -16,45 +15,45 @@ GIT_TEMP_DIR = "./userbot/temp/"
 async def github(event):
     URL = f"https://api.github.com/users/{event.pattern_match.group(1)}"
     await event.get_chat()
-    async with aiohttp.ClientSession() as session:
-        async with session.get(URL) as request:
+    session = get_session()
+    async with session.get(URL) as request:
+        if request.status == 404:
+            await event.reply("`" + event.pattern_match.group(1) + " não encontrado`")
+            return
+
+        result = await request.json()
+
+        url = result.get("html_url", None)
+        name = result.get("name", None)
+        company = result.get("company", None)
+        bio = result.get("bio", None)
+        created_at = result.get("created_at", "Not Found")
+
+        REPLY = f"Informações GitHub para `{event.pattern_match.group(1)}`\
+        \nNome de usuário: `{name}`\
+        \nBio: `{bio}`\
+        \nURL: {url}\
+        \nCompanhia: `{company}`\
+        \nCriado em: `{created_at}`\
+        \nMais informações : [Aqui](https://api.github.com/users/{event.pattern_match.group(1)}/events/public)"
+
+        if not result.get("repos_url", None):
+            await event.edit(REPLY)
+            return
+        async with session.get(result.get("repos_url", None)) as request:
+            result = request.json
             if request.status == 404:
-                await event.reply("`" + event.pattern_match.group(1) + " não encontrado`")
-                return
-
-            result = await request.json()
-
-            url = result.get("html_url", None)
-            name = result.get("name", None)
-            company = result.get("company", None)
-            bio = result.get("bio", None)
-            created_at = result.get("created_at", "Not Found")
-
-            REPLY = f"Informações GitHub para `{event.pattern_match.group(1)}`\
-            \nNome de usuário: `{name}`\
-            \nBio: `{bio}`\
-            \nURL: {url}\
-            \nCompanhia: `{company}`\
-            \nCriado em: `{created_at}`\
-            \nMais informações : [Aqui](https://api.github.com/users/{event.pattern_match.group(1)}/events/public)"
-
-            if not result.get("repos_url", None):
                 await event.edit(REPLY)
                 return
-            async with session.get(result.get("repos_url", None)) as request:
-                result = request.json
-                if request.status == 404:
-                    await event.edit(REPLY)
-                    return
 
-                result = await request.json()
+            result = await request.json()
 
-                REPLY += "\nRepos:\n"
+            REPLY += "\nRepos:\n"
 
-                for nr in range(len(result)):
-                    REPLY += f"[{result[nr].get('name', None)}]({result[nr].get('html_url', None)})\n"
+            for nr in range(len(result)):
+                REPLY += f"[{result[nr].get('name', None)}]({result[nr].get('html_url', None)})\n"
 
-                await event.edit(REPLY)
+            await event.edit(REPLY)
 
 
 CMD_HELP.update({"github": "`.git`" "\n**Uso:** Como .whois, mas para nomes de usuário do GitHub."})
@@ -20,22 +20,20 @@ import base64
 import io
 import json
 import logging
-import math
 import os
 import pickle
 import re
 import time
+from contextlib import AsyncExitStack
 from mimetypes import guess_type
 from os.path import getctime, isdir, isfile, join
 from urllib.parse import quote
 
-import requests
+import aiohttp
 from bs4 import BeautifulSoup
-from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from googleapiclient.http import MediaIoBaseDownload
 from telethon import events
 
 import userbot.modules.sql_helper.google_drive_sql as helper
@@ -51,8 +49,16 @@ from userbot import (
     TEMP_DOWNLOAD_DIRECTORY,
 )
 from userbot.events import register
-from userbot.modules.aria import aria2, check_metadata
-from userbot.utils import human_to_bytes, humanbytes, progress, time_formatter
+from userbot.modules.aria import MONITOR, aria2
+from userbot.modules.sql_helper import run_sql
+from userbot.utils import (
+    PROGRESS,
+    get_session,
+    human_to_bytes,
+    humanbytes,
+    track_progress,
+)
+from userbot.utils.drive import AdaptiveMediaUpload, Drive, refresh_credentials, run
 from userbot.utils.exceptions import CancelProcess
 
 # =========================================================== #
@@ -66,6 +72,9 @@ SCOPES = [
     "https://www.googleapis.com/auth/drive.metadata",
 ]
 REDIRECT_URI = "urn:ietf:wg:oauth:2.0:oob"
+# Public links are streamed, with no limit on the whole transfer.
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
 # =========================================================== #
 #      STATIC CASE FOR G_DRIVE_FOLDER_ID IF VALUE IS URL      #
 # =========================================================== #
@@ -108,7 +117,7 @@ logger.setLevel(logging.ERROR)
 @register(pattern=r"^\.gdauth(?: |$)", outgoing=True)
 async def generate_credentials(gdrive):
     """ - Only generate once for long run - """
-    if helper.get_credentials(str(gdrive.sender_id)) is not None:
+    if await run_sql(helper.get_credentials, str(gdrive.sender_id)) is not None:
         await gdrive.edit("**Você já autorizou o bot.**")
         await asyncio.sleep(1.5)
         await gdrive.delete()
@@ -158,14 +167,14 @@ async def generate_credentials(gdrive):
         # Unpack credential objects into strings
         creds = base64.b64encode(pickle.dumps(creds)).decode()
         await gdrive.edit("**Credenciais criadas.**")
-    helper.save_credentials(str(gdrive.sender_id), creds)
+    await run_sql(helper.save_credentials, str(gdrive.sender_id), creds)
     await gdrive.delete()
     return
 
 
 async def create_app(gdrive):
     """ - Create google drive service app - """
-    creds = helper.get_credentials(str(gdrive.sender_id))
+    creds = await run_sql(helper.get_credentials, str(gdrive.sender_id))
     if creds is not None:
         # Repack credential objects from strings
         creds = pickle.loads(base64.b64decode(creds.encode()))
@@ -173,21 +182,23 @@ async def create_app(gdrive):
         if creds and creds.expired and creds.refresh_token:
             await gdrive.edit("**Atualizando credenciais...**")
             # Refresh credentials
-            creds.refresh(Request())
-            helper.save_credentials(
-                str(gdrive.sender_id), base64.b64encode(pickle.dumps(creds)).decode()
+            await refresh_credentials(creds)
+            await run_sql(
+                helper.save_credentials,
+                str(gdrive.sender_id),
+                base64.b64encode(pickle.dumps(creds)).decode(),
             )
         else:
             await gdrive.edit("**Credenciais não encontradas, gere-as.**")
             return False
-    return build("drive", "v3", credentials=creds, cache_discovery=False)
+    return await Drive.create(creds)
 
 
 @register(pattern=r"^\.gdreset(?: |$)", outgoing=True)
 async def reset_credentials(gdrive):
     """ - Reset credentials or change account - """
     await gdrive.edit("**Redefinindo credenciais...**")
-    helper.clear_credentials(str(gdrive.sender_id))
+    await run_sql(helper.clear_credentials, str(gdrive.sender_id))
     await gdrive.edit("**As credenciais foram redefinidas.**")
     await asyncio.sleep(1)
     await gdrive.delete()
@@ -222,35 +233,19 @@ async def download(gdrive, service, uri=None):
         else:
             uri = [uri]
             downloads = aria2.add_uris(uri, options={"dir": full_path}, position=None)
-        gid = downloads.gid
-        await check_progress_for_dl(gdrive, gid, previous=None)
-        file = aria2.get_download(gid)
-        filename = file.name
-        if file.followed_by_ids:
-            new_gid = await check_metadata(gid)
-            await check_progress_for_dl(gdrive, new_gid, previous=None)
-        try:
-            required_file_name = TEMP_DOWNLOAD_DIRECTORY + filenames
-        except Exception:
-            required_file_name = TEMP_DOWNLOAD_DIRECTORY + filename
+        file = await check_progress_for_dl(gdrive, downloads.gid)
+        required_file_name = TEMP_DOWNLOAD_DIRECTORY + file.name
     else:
         try:
-            current_time = time.time()
             is_cancelled = False
-            downloaded_file_name = await gdrive.client.download_media(
-                await gdrive.get_reply_message(),
-                TEMP_DOWNLOAD_DIRECTORY,
-                progress_callback=lambda d, t: asyncio.get_event_loop().create_task(
-                    progress(
-                        d,
-                        t,
-                        gdrive,
-                        current_time,
-                        "**GDrive - Download**",
-                        is_cancelled=is_cancelled,
-                    )
-                ),
-            )
+            async with track_progress(
+                gdrive, "GDrive - Download", cancelled=lambda: is_cancelled
+            ) as prog:
+                downloaded_file_name = await gdrive.client.download_media(
+                    await gdrive.get_reply_message(),
+                    TEMP_DOWNLOAD_DIRECTORY,
+                    progress_callback=prog.update,
+                )
         except CancelProcess:
             names = [
                 join(TEMP_DOWNLOAD_DIRECTORY, name)
@@ -286,20 +281,16 @@ async def download(gdrive, service, uri=None):
                     reply += f"\n**Índice:** [Link]({index_url})"
                 return reply
         else:
-            global parent_Id
             folder = await create_dir(service, file_name)
-            parent_Id = folder.get("id")
-            webViewURL = "https://drive.google.com/drive/folders/" + parent_Id
+            folder_id = folder.get("id")
+            webViewURL = "https://drive.google.com/drive/folders/" + folder_id
             try:
-                await task_directory(gdrive, service, required_file_name)
+                await task_directory(gdrive, service, required_file_name, folder_id)
             except CancelProcess:
                 reply = "**GDrive - Upload de pasta**\n\n" "**Status:** Cancelado."
-                await reset_parentId()
                 return reply
-            except Exception:
-                await reset_parentId()
             else:
-                folder_size = await count_dir_size(service, parent_Id)
+                folder_size = await count_dir_size(service, folder_id)
                 reply = f"**GDrive - Upload de pasta**\n\n[{file_name}]({webViewURL})"
                 reply += f"\n**Tamanho:** {humanbytes(folder_size)}"
                 if G_DRIVE_INDEX_URL:
@@ -307,7 +298,6 @@ async def download(gdrive, service, uri=None):
                         G_DRIVE_INDEX_URL.rstrip("/") + "/" + quote(file_name) + "/"
                     )
                     reply += f"\n**Índice:** [Link]({index_url})"
-                await reset_parentId()
                 return reply
     except Exception as e:
         reply = f"**GDrive**\n\n" "**Status:** Falha.\n" f"**Motivo:** `{str(e)}`"
@@ -348,93 +338,68 @@ async def download_gdrive(gdrive, service, uri):
             drive = "https://drive.google.com"
             url = f"{drive}/uc?export=download&id={file_Id}"
 
-            session = requests.session()
-            download = session.get(url, stream=True)
-
+            session = get_session()
+            download = await session.get(url, timeout=DOWNLOAD_TIMEOUT)
             try:
-                download.headers["Content-Disposition"]
-            except KeyError:
-                page = BeautifulSoup(download.content, "lxml")
-                try:
-                    export = drive + page.find("a", {"id": "uc-download-link"}).get(
-                        "href"
-                    )
-                except AttributeError:
+                if "Content-Disposition" not in download.headers:
+                    page = BeautifulSoup(await download.read(), "lxml")
                     try:
-                        error = (
-                            page.find("p", {"class": "uc-error-caption"}).text
-                            + "\n"
-                            + page.find("p", {"class": "uc-error-subcaption"}).text
-                        )
-                    except Exception:
-                        reply = (
-                            "**GDrive - Download**\n\n"
-                            "**Status:** Falha.\n"
-                            "**Motivo:** Erro desconhecido."
-                        )
-                    else:
-                        reply = (
-                            "**GDrive - Download**\n\n"
-                            "**Status:** Falha.\n"
-                            f"**Motivo:** `{error}`."
-                        )
-                    return reply
-                download = session.get(export, stream=True)
-                file_size = human_to_bytes(
-                    page.find("span", {"class": "uc-name-size"})
-                    .text.split()[-1]
-                    .strip("()")
-                )
-            else:
-                file_size = int(download.headers["Content-Length"])
-
-            file_name = re.search(
-                'filename="(.*)"', download.headers["Content-Disposition"]
-            ).group(1)
-            file_path = TEMP_DOWNLOAD_DIRECTORY + file_name
-            with io.FileIO(file_path, "wb") as files:
-                CHUNK_SIZE = None
-                current_time = time.time()
-                display_message = None
-                first = True
-                is_cancelled = False
-                for chunk in download.iter_content(CHUNK_SIZE):
-                    if is_cancelled:
-                        raise CancelProcess
-
-                    if not chunk:
-                        break
-
-                    diff = time.time() - current_time
-                    if first:
-                        downloaded = len(chunk)
-                        first = False
-                    else:
-                        downloaded += len(chunk)
-                    percentage = downloaded / file_size * 100
-                    speed = round(downloaded / diff, 2)
-                    eta = round((file_size - downloaded) / speed)
-                    prog_str = "**Baixando:** `[{}{}]` **{}%**".format(
-                        "".join(["●" for _ in range(math.floor(percentage / 10))]),
-                        "".join(["○" for _ in range(10 - math.floor(percentage / 10))]),
-                        round(percentage, 2),
+                        export = drive + page.find(
+                            "a", {"id": "uc-download-link"}
+                        ).get("href")
+                    except AttributeError:
+                        try:
+                            error = (
+                                page.find("p", {"class": "uc-error-caption"}).text
+                                + "\n"
+                                + page.find("p", {"class": "uc-error-subcaption"}).text
+                            )
+                        except Exception:
+                            reply = (
+                                "**GDrive - Download**\n\n"
+                                "**Status:** Falha.\n"
+                                "**Motivo:** Erro desconhecido."
+                            )
+                        else:
+                            reply = (
+                                "**GDrive - Download**\n\n"
+                                "**Status:** Falha.\n"
+                                f"**Motivo:** `{error}`."
+                            )
+                        return reply
+                    # The confirmation link only works with the cookie
+                    # google set on the warning page.
+                    cookies = download.cookies
+                    download.release()
+                    download = await session.get(
+                        export, cookies=cookies, timeout=DOWNLOAD_TIMEOUT
                     )
-                    current_message = (
-                        "**GDrive - Download**\n\n"
-                        f"**{file_name}**\n"
-                        f"{prog_str}\n"
-                        f"{humanbytes(downloaded)} de {humanbytes(file_size)}"
-                        f" @ {humanbytes(speed)}\n"
-                        f"**Tempo estimado:** {time_formatter(eta)}"
+                    file_size = human_to_bytes(
+                        page.find("span", {"class": "uc-name-size"})
+                        .text.split()[-1]
+                        .strip("()")
                     )
-                    if (
-                        round(diff % 15.00) == 0
-                        and (display_message != current_message)
-                        or (downloaded == file_size)
-                    ):
-                        await gdrive.edit(current_message)
-                        display_message = current_message
-                    files.write(chunk)
+                else:
+                    file_size = int(download.headers["Content-Length"])
+
+                file_name = re.search(
+                    'filename="(.*)"', download.headers["Content-Disposition"]
+                ).group(1)
+                file_path = TEMP_DOWNLOAD_DIRECTORY + file_name
+                with io.FileIO(file_path, "wb") as files:
+                    downloaded = 0
+                    is_cancelled = False
+                    async with track_progress(
+                        gdrive, "GDrive - Download", file_name, lambda: is_cancelled
+                    ) as prog:
+                        async for chunk in download.content.iter_chunked(
+                            DOWNLOAD_CHUNK_SIZE
+                        ):
+                            downloaded += len(chunk)
+                            prog.update(downloaded, file_size)
+                            files.write(chunk)
+            finally:
+                download.release()
     else:
         file_name = file.get("name")
         mimeType = file.get("mimeType")
@@ -443,45 +408,25 @@ async def download_gdrive(gdrive, service, uri):
             return False
         file_path = TEMP_DOWNLOAD_DIRECTORY + file_name
         request = service.files().get_media(fileId=file_Id, supportsAllDrives=True)
+        # Chunks are fetched from the drive threads, one after the other,
+        # so this download gets an http of its own.
+        request.http = service.new_http()
         with io.FileIO(file_path, "wb") as df:
             downloader = MediaIoBaseDownload(df, request)
             complete = False
             is_cancelled = False
-            current_time = time.time()
-            display_message = None
-            while not complete:
-                if is_cancelled:
-                    raise CancelProcess
-
-                status, complete = downloader.next_chunk()
-                if status:
-                    file_size = status.total_size or 0
-                    diff = time.time() - current_time
-                    downloaded = status.resumable_progress
-                    percentage = downloaded / file_size * 100
-                    speed = round(downloaded / diff, 2)
-                    eta = round((file_size - downloaded) / speed)
-                    prog_str = "**Baixando:** `[{}{}]` **{}%**".format(
-                        "".join("●" for _ in range(math.floor(percentage / 10))),
-                        "".join("○" for _ in range(10 - math.floor(percentage / 10))),
-                        round(percentage, 2),
-                    )
+            file_size = 0
+            async with track_progress(
+                gdrive, "GDrive - Download", file_name, lambda: is_cancelled
+            ) as prog:
+                while not complete:
+                    if is_cancelled:
+                        raise CancelProcess
 
-                    current_message = (
-                        "**GDrive - Download**\n\n"
-                        f"**{file_name}**\n"
-                        f"{prog_str}\n"
-                        f"{humanbytes(downloaded)} de {humanbytes(file_size)}"
-                        f" @ {humanbytes(speed)}\n"
-                        f"**Tempo estimado:** {time_formatter(eta)}"
-                    )
-                    if (
-                        round(diff % 15.00) == 0
-                        and (display_message != current_message)
-                        or (downloaded == file_size)
-                    ):
-                        await gdrive.edit(current_message)
-                        display_message = current_message
+                    status, complete = await run(downloader.next_chunk)
+                    if status:
+                        file_size = status.total_size or 0
+                        prog.update(status.resumable_progress, file_size)
     await gdrive.edit(
         "**GDrive - Download**\n\n"
         f"**Nome:** `{file_name}`\n"
@@ -525,7 +470,7 @@ async def download_gdrive(gdrive, service, uri):
 async def change_permission(service, Id):
     permission = {"role": "reader", "type": "anyone"}
     try:
-        service.permissions().create(fileId=Id, body=permission).execute()
+        await service.execute(service.permissions().create(fileId=Id, body=permission))
     except HttpError as e:
         # it's not possible to change permission per file for teamdrive
         if f'"Arquivo não encontrado: {Id}."' in str(e) or (
@@ -539,62 +484,78 @@ async def change_permission(service, Id):
 
 
 async def get_information(service, Id):
-    return (
-        service.files()
-        .get(
+    return await service.execute(
+        service.files().get(
             fileId=Id,
             fields="name, id, size, mimeType, "
             "webViewLink, webContentLink,"
             "description",
             supportsAllDrives=True,
         )
-        .execute()
     )
 
 
-async def create_dir(service, folder_name):
+def get_parent_id():
+    """ - Upload folder set by .gdfset, else G_DRIVE_FOLDER_ID or root - """
+    try:
+        return parent_Id
+    except NameError:
+        return G_DRIVE_FOLDER_ID
+
+
+async def create_dir(service, folder_name, parent_id=None):
     metadata = {
         "name": folder_name,
         "mimeType": "application/vnd.google-apps.folder",
     }
-    try:
-        len(parent_Id)
-    except NameError:
-        # Fallback to G_DRIVE_FOLDER_ID else root dir
-        if G_DRIVE_FOLDER_ID is not None:
-            metadata["parents"] = [G_DRIVE_FOLDER_ID]
-    else:
-        # Override G_DRIVE_FOLDER_ID because parent_Id not empty
-        metadata["parents"] = [parent_Id]
-    folder = (
-        service.files()
-        .create(body=metadata, fields="id, webViewLink", supportsAllDrives=True)
-        .execute()
+    if parent_id is None:
+        parent_id = get_parent_id()
+    if parent_id is not None:
+        metadata["parents"] = [parent_id]
+    folder = await service.execute(
+        service.files().create(
+            body=metadata, fields="id, webViewLink", supportsAllDrives=True
+        )
     )
     await change_permission(service, folder.get("id"))
     return folder
 
 
-async def upload(gdrive, service, file_path, file_name, mimeType):
-    try:
-        await gdrive.edit("**Processando upload...**")
-    except Exception:
-        pass
+async def upload(
+    gdrive, service, file_path, file_name, mimeType, parent_id=None, report=True
+):
+    """
+    Directory tasks pass report=False, they reset is_cancelled once
+    and show the progress of the whole folder themselves.
+    The session of the upload is saved after every chunk, so uploading
+    the same unchanged file again continues where it stopped.
+    """
+    global is_cancelled
+    if report:
+        try:
+            await gdrive.edit("**Processando upload...**")
+        except Exception:
+            pass
+        is_cancelled = False
     body = {
         "name": file_name,
         "description": "Carregado do Telegram usando PurpleBot.",
         "mimeType": mimeType,
     }
-    try:
-        len(parent_Id)
-    except NameError:
-        # Fallback to G_DRIVE_FOLDER_ID else root dir
-        if G_DRIVE_FOLDER_ID is not None:
-            body["parents"] = [G_DRIVE_FOLDER_ID]
-    else:
-        # Override G_DRIVE_FOLDER_ID because parent_Id not empty
-        body["parents"] = [parent_Id]
-    media_body = MediaFileUpload(file_path, mimetype=mimeType, resumable=True)
+    if parent_id is None:
+        parent_id = get_parent_id()
+    if parent_id is not None:
+        body["parents"] = [parent_id]
+    file_stat = os.stat(file_path)
+    session = await run_sql(helper.get_upload, file_path)
+    if session is not None and (session.file_size, session.mtime) != (
+        file_stat.st_size,
+        int(file_stat.st_mtime),
+    ):
+        # The file changed since, its session is useless
+        await run_sql(helper.clear_upload, file_path)
+        session = None
+    media_body = AdaptiveMediaUpload(file_path, mimetype=mimeType)
     # Start upload process
     file = service.files().create(
         body=body,
@@ -602,44 +563,50 @@ async def upload(gdrive, service, file_path, file_name, mimeType):
         fields="id, size, webContentLink",
         supportsAllDrives=True,
     )
-    global is_cancelled
-    current_time = time.time()
+    if session is not None:
+        file.resumable_uri = session.uri
+        # Makes the next chunk ask google for the confirmed offset first
+        file._in_error_state = True
     response = None
-    display_message = None
-    is_cancelled = False
-    while response is None:
-        if is_cancelled:
-            raise CancelProcess
-
-        status, response = file.next_chunk()
-        if status:
-            file_size = status.total_size
-            diff = time.time() - current_time
-            uploaded = status.resumable_progress
-            percentage = uploaded / file_size * 100
-            speed = round(uploaded / diff, 2)
-            eta = round((file_size - uploaded) / speed)
-            prog_str = "**Enviando:** `[{}{}]` **{}%**".format(
-                "".join("●" for _ in range(math.floor(percentage / 10))),
-                "".join("○" for _ in range(10 - math.floor(percentage / 10))),
-                round(percentage, 2),
+    async with AsyncExitStack() as stack:
+        if report:
+            prog = await stack.enter_async_context(
+                track_progress(gdrive, "GDrive - Upload", file_name)
             )
+        while response is None:
+            if is_cancelled:
+                await run_sql(helper.clear_upload, file_path)
+                raise CancelProcess
 
-            current_message = (
-                "**GDrive - Upload**\n\n"
-                f"`{file_name}`\n"
-                f"{prog_str}\n"
-                f"{humanbytes(uploaded)} de {humanbytes(file_size)} "
-                f"@ {humanbytes(speed)}\n"
-                f"**Tempo estimado:** {time_formatter(eta)}"
+            chunk_size = media_body.chunksize()
+            chunk_time = time.time()
+            try:
+                status, response = await service.next_chunk(file)
+            except HttpError as e:
+                if file.resumable_uri is None or e.resp.status not in (404, 410):
+                    raise
+                # The session expired, start a new one
+                await run_sql(helper.clear_upload, file_path)
+                file.resumable_uri = None
+                file.resumable_progress = 0
+                file._in_error_state = False
+                continue
+            if not status:
+                continue
+            media_body.adapt(chunk_size, time.time() - chunk_time)
+            await run_sql(
+                helper.save_upload,
+                file_path,
+                file.resumable_uri,
+                file_stat.st_size,
+                int(file_stat.st_mtime),
+                status.resumable_progress,
+                parent_id,
+                mimeType,
             )
-            if (
-                round(diff % 15.00) == 0
-                and (display_message != current_message)
-                or (uploaded == file_size)
-            ):
-                await gdrive.edit(current_message)
-                display_message = current_message
+            if report:
+                prog.update(status.resumable_progress, status.total_size)
+    await run_sql(helper.clear_upload, file_path)
     file_id = response.get("id")
     file_size = response.get("size")
     downloadURL = response.get("webContentLink")
@@ -648,41 +615,58 @@ async def upload(gdrive, service, file_path, file_name, mimeType):
     return int(file_size), downloadURL
 
 
-async def task_directory(gdrive, service, folder_path):
-    global parent_Id
+async def task_directory(gdrive, service, folder_path, parent_id):
+    """
+    Uploads the content of folder_path into the drive folder parent_id.
+    Subfolders are walked at the same time and files share the throttle
+    of the service, so only a few of them are uploaded at once.
+    """
     global is_cancelled
     is_cancelled = False
-    lists = os.listdir(folder_path)
-    if len(lists) == 0:
-        return parent_Id
-    root_parent_Id = None
-    for f in lists:
-        if is_cancelled:
-            raise CancelProcess
-
-        current_f_name = join(folder_path, f)
-        if isdir(current_f_name):
-            folder = await create_dir(service, f)
-            parent_Id = folder.get("id")
-            root_parent_Id = await task_directory(gdrive, service, current_f_name)
-        else:
-            file_name = await get_raw_name(current_f_name)
-            mimeType = await get_mimeType(current_f_name)
-            await upload(gdrive, service, current_f_name, file_name, mimeType)
-            root_parent_Id = parent_Id
-    return root_parent_Id
-
+    folder_name = await get_raw_name(folder_path)
+    done = []
+    last_edit = time.time()
+
+    async def upload_file(path, parent_id):
+        nonlocal last_edit
+        async with service.throttle:
+            if is_cancelled:
+                raise CancelProcess
+            file_name = await get_raw_name(path)
+            mimeType = await get_mimeType(path)
+            await upload(
+                gdrive, service, path, file_name, mimeType, parent_id, report=False
+            )
+        done.append(file_name)
+        if time.time() - last_edit >= 15:
+            last_edit = time.time()
+            try:
+                await PROGRESS.edit(
+                    gdrive,
+                    "**GDrive - Upload de pasta**\n\n"
+                    f"`{folder_name}`\n"
+                    f"**Enviados:** {len(done)} arquivos\n"
+                    f"**Último:** `{file_name}`"
+                )
+            except Exception:
+                pass
+
+    async def walk(path, parent_id):
+        jobs = []
+        for f in sorted(os.listdir(path)):
+            if is_cancelled:
+                raise CancelProcess
+
+            current_f_name = join(path, f)
+            if isdir(current_f_name):
+                folder = await create_dir(service, f, parent_id)
+                jobs.append(walk(current_f_name, folder.get("id")))
+            else:
+                jobs.append(upload_file(current_f_name, parent_id))
+        await service.gather(*jobs)
 
-async def reset_parentId():
-    global parent_Id
-    try:
-        len(parent_Id)
-    except NameError:
-        if G_DRIVE_FOLDER_ID is not None:
-            parent_Id = G_DRIVE_FOLDER_ID
-    else:
-        del parent_Id
-    return
+    await walk(folder_path, parent_id)
+    return parent_id
 
 
 @register(pattern=r"^\.gdlist(?: |$)(-l \d+)?(?: |$)?(.*)?(?: |$)", outgoing=True)
@@ -724,22 +708,22 @@ async def lists(gdrive):
     )
     page_token = None
     result = []
+    message_folders = ""
+    message_files = ""
     while True:
         try:
-            response = (
-                service.files()
-                .list(
+            response = await service.execute(
+                service.files().list(
                     supportsAllDrives=True,
                     includeTeamDriveItems=True,
                     q=query,
                     spaces="drive",
                     corpora="allDrives",
                     fields=fields,
-                    pageSize=page_size,
+                    pageSize=page_size - len(result),
                     orderBy="modifiedTime desc, folder",
                     pageToken=page_token,
                 )
-                .execute()
             )
         except HttpError as e:
             await gdrive.edit(f"Error: {str(e)}")
@@ -750,8 +734,6 @@ async def lists(gdrive):
 
             file_name = files.get("name")
             file_size = files.get("size", 0)
-            message_folders = ""
-            message_files = ""
 
             if files.get("mimeType") == "application/vnd.google-apps.folder":
                 link = files.get("webViewLink")
@@ -778,7 +760,7 @@ async def lists(gdrive):
     if message_folders:
         message += f"**Pastas:**\n\n{message_folders}\n"
     if message_files:
-        message += f"**Arquivos:**\n\n{files}"
+        message += f"**Arquivos:**\n\n{message_files}"
 
     if len(message) > 4096:
         await gdrive.edit("**O resultado é muito grande, enviando como arquivo...**")
@@ -807,23 +789,9 @@ async def google_drive_managers(gdrive):
     for name_or_id in f_name:
         # in case given name has a space beetween ;
         name_or_id = name_or_id.strip()
-        metadata = {
-            "name": name_or_id,
-            "mimeType": "application/vnd.google-apps.folder",
-        }
-        try:
-            len(parent_Id)
-        except NameError:
-            # Fallback to G_DRIVE_FOLDER_ID else to root dir
-            if G_DRIVE_FOLDER_ID is not None:
-                metadata["parents"] = [G_DRIVE_FOLDER_ID]
-        else:
-            # Override G_DRIVE_FOLDER_ID because parent_Id not empty
-            metadata["parents"] = [parent_Id]
         page_token = None
-        result = (
-            service.files()
-            .list(
+        result = await service.execute(
+            service.files().list(
                 q=f'name="{name_or_id}"',
                 spaces="drive",
                 fields=(
@@ -833,7 +801,6 @@ async def google_drive_managers(gdrive):
                 supportsAllDrives=True,
                 pageToken=page_token,
             )
-            .execute()
         )
         if exe == "mkdir":
             # Create a directory, abort if exist when parent not given
@@ -885,7 +852,9 @@ async def google_drive_managers(gdrive):
             else:
                 status = "**Arquivo excluído.**"
             try:
-                service.files().delete(fileId=f_id, supportsAllDrives=True).execute()
+                await service.execute(
+                    service.files().delete(fileId=f_id, supportsAllDrives=True)
+                )
             except HttpError as e:
                 reply = f"**Erro:** {str(e)}\n"
                 continue
@@ -944,6 +913,44 @@ async def cancel_process(gdrive):
     await gdrive.delete()
 
 
+@register(pattern=r"^\.gdresume(?: |$)", outgoing=True)
+async def resume_uploads(gdrive):
+    """ - Resume the uploads interrupted by a restart - """
+    sessions = await run_sql(helper.get_uploads)
+    if not sessions:
+        await gdrive.edit("**Nenhum upload para retomar.**")
+        return None
+    service = await create_app(gdrive)
+    if service is False:
+        return None
+    replies = []
+    for session in sessions:
+        file_name = await get_raw_name(session.file_path)
+        if not isfile(session.file_path):
+            await run_sql(helper.clear_upload, session.file_path)
+            replies.append(f"`{file_name}`: arquivo não encontrado.")
+            continue
+        try:
+            result = await upload(
+                gdrive,
+                service,
+                session.file_path,
+                file_name,
+                session.mime_type,
+                session.parent_id,
+            )
+        except CancelProcess:
+            replies.append(f"`{file_name}`: cancelado.")
+            break
+        except Exception as e:
+            replies.append(f"`{file_name}`: **Erro:** `{str(e)}`")
+            continue
+        replies.append(f"[{file_name}]({result[1]}) ({humanbytes(result[0])})")
+    await gdrive.edit(
+        "**GDrive - Uploads retomados**\n\n" + "\n".join(replies), link_preview=False
+    )
+
+
 @register(pattern=r"^\.gd(?: |$)(.*)", outgoing=True)
 async def google_drive(gdrive):
     # Parsing all google drive function
@@ -967,26 +974,23 @@ async def google_drive(gdrive):
             file_path = None
     elif isdir(value):
         folder_path = value
-        global parent_Id
         folder_name = await get_raw_name(folder_path)
         folder = await create_dir(service, folder_name)
-        parent_Id = folder.get("id")
-        webViewURL = "https://drive.google.com/drive/folders/" + parent_Id
+        folder_id = folder.get("id")
+        webViewURL = "https://drive.google.com/drive/folders/" + folder_id
         try:
-            await task_directory(gdrive, service, folder_path)
+            await task_directory(gdrive, service, folder_path, folder_id)
         except CancelProcess:
             await gdrive.respond(
                 "**GDrive - Upload de pasta**\n\n" "**Status:** Cancelado."
             )
-            await reset_parentId()
             await gdrive.delete()
             return True
         except Exception as e:
             await gdrive.edit(f"**Erro:** `{str(e)}`")
-            await reset_parentId()
             return False
         else:
-            folder_size = await count_dir_size(service, parent_Id)
+            folder_size = await count_dir_size(service, folder_id)
             msg = f"**GDrive - Upload de pasta**\n\n[{folder_name}]({webViewURL})"
             msg += f"\n**Tamanho:** {humanbytes(folder_size)}"
             if G_DRIVE_INDEX_URL:
@@ -995,7 +999,6 @@ async def google_drive(gdrive):
                 )
                 msg += f"\n[URL da índice]({index_url})"
             await gdrive.edit(msg, link_preview=False)
-            await reset_parentId()
             return True
     elif not value and gdrive.reply_to_msg_id:
         reply = str(await download(gdrive, service))
@@ -1051,6 +1054,9 @@ async def google_drive(gdrive):
         for dl in uri:
             try:
                 reply = await download(gdrive, service, dl)
+            except CancelProcess:
+                reply = "**GDrive - Baixar arquivo**\n\n" "**Status:** Cancelado."
+                break
             except Exception as e:
                 if " not found" in str(e) or "'file'" in str(e):
                     reply = "**GDrive - Baixar arquivo**\n\n" "**Status:** Cancelado."
@@ -1138,93 +1144,21 @@ async def set_upload_folder(gdrive):
     return
 
 
-async def check_progress_for_dl(gdrive, gid, previous):
-    complete = None
+async def check_progress_for_dl(gdrive, gid):
+    """ - Wait for an aria2 download, and the one its metadata leads to - """
     global is_cancelled
-    global filenames
     is_cancelled = False
-    while not complete:
-        if is_cancelled:
-            raise CancelProcess
-
-        file = aria2.get_download(gid)
-        complete = file.is_complete
-        try:
-            filenames = file.name
-        except IndexError:
-            pass
-        try:
-            if not complete and not file.error_message:
-                percentage = int(file.progress)
-                downloaded = percentage * int(file.total_length) / 100
-                prog_str = "**Baixando:** `[{}{}]` **{}**".format(
-                    "".join("●" for _ in range(math.floor(percentage / 10))),
-                    "".join("○" for _ in range(10 - math.floor(percentage / 10))),
-                    file.progress_string(),
-                )
-
-                msg = (
-                    "**URI - Download**\n\n"
-                    f"`{file.name}`\n"
-                    f"**Status:** {file.status.capitalize()}\n"
-                    f"{prog_str}\n"
-                    f"{humanbytes(downloaded)} de"
-                    f" {file.total_length_string()}"
-                    f" @ {file.download_speed_string()}\n"
-                    f"**Tempo estimado:** {file.eta_string()}"
-                )
-                if msg != previous or downloaded == file.total_length_string():
-                    await gdrive.edit(msg)
-                    msg = previous
-            else:
-                await gdrive.edit(f"`{msg}`")
-            await asyncio.sleep(15)
-            await check_progress_for_dl(gdrive, gid, previous)
-            file = aria2.get_download(gid)
-            complete = file.is_complete
-            if complete:
-                await gdrive.edit(f"**Baixado com sucesso.**\n\n`{file.name}`")
-                return True
-        except Exception as e:
-            if " depth exceeded" in str(e):
-                file.remove(force=True)
-                try:
-                    await gdrive.edit(
-                        "**URI - Download**\n\n"
-                        f"`{file.name}`\n"
-                        "**Status:** URI/Torrent não encontrado."
-                    )
-                except Exception:
-                    pass
-
-
-async def list_drive_dir(service, file_id: str) -> list:
-    query = f"'{file_id}' in parents and (name contains '*')"
-    fields = "nextPageToken, files(id, name, mimeType, size)"
-    page_token = None
-    page_size = 100
-    files = []
-    while True:
-        response = (
-            service.files()
-            .list(
-                supportsAllDrives=True,
-                includeItemsFromAllDrives=True,
-                q=query,
-                spaces="drive",
-                fields=fields,
-                pageToken=page_token,
-                pageSize=page_size,
-                corpora="allDrives",
-                orderBy="folder, name",
-            )
-            .execute()
-        )
-        files.extend(response.get("files", []))
-        page_token = response.get("nextPageToken", None)
-        if page_token is None:
-            break
-    return files
+    header = "**URI - Download**\n\n"
+    file = await MONITOR.track(gid, gdrive, header)
+    while file is not None and file.is_complete and file.followed_by_ids:
+        file = await MONITOR.track(file.followed_by_ids[0], gdrive, header)
+    if is_cancelled or file is None or file.status == "removed":
+        raise CancelProcess
+    if file.has_failed:
+        file.remove(force=True)
+        raise Exception(f"{file.name}: {file.error_message}")
+    await gdrive.edit(f"**Baixado com sucesso.**\n\n`{file.name}`")
+    return file
 
 
 async def create_folder(service, folder_name: str, parent_id: str) -> str:
@@ -1234,10 +1168,8 @@ async def create_folder(service, folder_name: str, parent_id: str) -> str:
     }
     if parent_id is not None:
         metadata["parents"] = [parent_id]
-    folder = (
-        service.files()
-        .create(body=metadata, fields="id", supportsAllDrives=True)
-        .execute()
+    folder = await service.execute(
+        service.files().create(body=metadata, fields="id", supportsAllDrives=True)
     )
     return folder["id"]
 
@@ -1246,42 +1178,65 @@ async def copy_file(service, file_id: str, parent_id: str) -> str:
     body = {}
     if parent_id:
         body["parents"] = [parent_id]
-    drive_file = (
-        service.files()
-        .copy(body=body, fileId=file_id, supportsTeamDrives=True)
-        .execute()
+    drive_file = await service.execute(
+        service.files().copy(body=body, fileId=file_id, supportsTeamDrives=True)
     )
     return drive_file["id"]
 
 
-async def copy_dir(service, file_id: str, parent_id: str) -> str:
-    files = await list_drive_dir(service, file_id)
-    if len(files) == 0:
-        return parent_id
-    new_id = None
-    for file_ in files:
-        if file_["mimeType"] == G_DRIVE_DIR_MIME_TYPE:
-            dir_id = await create_folder(service, file_["name"], parent_id)
-            new_id = await copy_dir(service, file_["id"], dir_id)
-        else:
-            await copy_file(service, file_["id"], parent_id)
-            await asyncio.sleep(0.5)  # due to user rate limits
-            new_id = parent_id
-    return new_id
+async def copy_dir(service, file_id: str, parent_id: str) -> int:
+    """
+    Copies a folder tree level by level, the folders and files of each
+    level in batched requests. Returns how many items couldn't be copied.
+    """
+    new_ids = {file_id: parent_id}
+    failed = 0
+    async for level in service.walk(file_id):
+        folders = []
+        folder_requests = []
+        copy_requests = []
+        for folder_id, files in level.items():
+            new_parent = new_ids.get(folder_id)
+            if new_parent is None:
+                # The copy of this folder couldn't be created
+                continue
+            for file_ in files:
+                if file_["mimeType"] == G_DRIVE_DIR_MIME_TYPE:
+                    folders.append(file_["id"])
+                    folder_requests.append(
+                        service.files().create(
+                            body={
+                                "name": file_["name"],
+                                "mimeType": G_DRIVE_DIR_MIME_TYPE,
+                                "parents": [new_parent],
+                            },
+                            fields="id",
+                            supportsAllDrives=True,
+                        )
+                    )
+                else:
+                    copy_requests.append(
+                        service.files().copy(
+                            body={"parents": [new_parent]},
+                            fileId=file_["id"],
+                            supportsTeamDrives=True,
+                        )
+                    )
+        responses = await service.execute_batch(folder_requests + copy_requests)
+        for source_id, response in zip(folders, responses):
+            if not isinstance(response, Exception):
+                new_ids[source_id] = response["id"]
+        failed += sum(isinstance(response, Exception) for response in responses)
+    return failed
 
 
 async def count_dir_size(service, file_id: str) -> int:
     _size = 0
-    files = await list_drive_dir(service, file_id)
-    for _file in files:
-        try:
-            if _file.get("mimeType") == G_DRIVE_DIR_MIME_TYPE:
-                dir_id = _file.get("id")
-                _size += int(await count_dir_size(service, dir_id))
-            else:
-                _size += int(_file.get("size"))
-        except TypeError:
-            pass
+    async for level in service.walk(file_id):
+        for files in level.values():
+            for _file in files:
+                if _file.get("mimeType") != G_DRIVE_DIR_MIME_TYPE:
+                    _size += int(_file.get("size") or 0)
     return _size
 
 
@@ -1311,9 +1266,10 @@ async def gdrive_clone(event):
     _drive_file = await get_information(service, _file_id)
     if _drive_file["mimeType"] == G_DRIVE_DIR_MIME_TYPE:
         dir_id = await create_folder(service, _drive_file["name"], G_DRIVE_FOLDER_ID)
-        await copy_dir(service, _file_id, dir_id)
+        failed = await copy_dir(service, _file_id, dir_id)
         ret_id = dir_id
     else:
+        failed = 0
         ret_id = await copy_file(service, _file_id, G_DRIVE_FOLDER_ID)
     _drive_meta = await get_information(service, ret_id)
     _name = _drive_meta.get("name")
@@ -1329,6 +1285,8 @@ async def gdrive_clone(event):
     drive_link = f"[{_name}]({_link})"
     msg += f"**GDrive - Clone {_type}**\n\n{drive_link}"
     msg += f"\n**Tamanho:** {humanbytes(int(_size))}"
+    if failed:
+        msg += f"\n**Falharam:** {failed} itens"
     if G_DRIVE_INDEX_URL:
         index_url = G_DRIVE_INDEX_URL.rstrip("/") + "/" + quote(_name)
         if _drive_meta.get("mimeType") == G_DRIVE_DIR_MIME_TYPE:
@@ -1347,6 +1305,9 @@ CMD_HELP.update(
         "\n\n>`.gd`"
         "\n**Uso**: Upload de arquivo local ou URI/URL/drivelink para o GDrive."
         "\npara drivelink, só faz o upload se você quiser."
+        "\n\n>`.gdresume`"
+        "\n**Uso**: Retoma os uploads interrompidos por uma reinicialização."
+        "\nEnviar o mesmo arquivo com .gd também continua de onde parou."
         "\n\n>`.gdabort`"
         "\n**Uso**: Aborta processos GDrive em execução."
         "\n\n>`.gdlist`"
@@ -5,53 +5,46 @@
 #
 """ Userbot module containing hash and encode/decode commands. """
 
-from subprocess import PIPE
-from subprocess import run as runapp
+import io
 
 import pybase64
 
 from userbot import CMD_HELP
 from userbot.events import register
+from userbot.utils.FastTelethon import stream_file
+from userbot.utils.hashing import hash_bytes, hash_stream
 
 
-@register(outgoing=True, pattern=r"^\.hash (.*)")
+@register(outgoing=True, pattern=r"^\.hash(?: |$)(.*)")
 async def gethash(hash_q):
-    """ For .hash command, find the md5, sha1, sha256, sha512 of the string. """
+    """ For .hash command, find the md5, sha1, sha256, sha512 of the string,
+        or of the replied file as it is downloaded. """
     hashtxt_ = hash_q.pattern_match.group(1)
-    with open("hashdis.txt", "w+") as hashtxt:
-        hashtxt.write(hashtxt_)
-    md5 = runapp(["md5sum", "hashdis.txt"], stdout=PIPE)
-    md5 = md5.stdout.decode()
-    sha1 = runapp(["sha1sum", "hashdis.txt"], stdout=PIPE)
-    sha1 = sha1.stdout.decode()
-    sha256 = runapp(["sha256sum", "hashdis.txt"], stdout=PIPE)
-    sha256 = sha256.stdout.decode()
-    sha512 = runapp(["sha512sum", "hashdis.txt"], stdout=PIPE)
-    runapp(["rm", "hashdis.txt"], stdout=PIPE)
-    sha512 = sha512.stdout.decode()
-    ans = (
-        "Text: `"
-        + hashtxt_
-        + "`\nMD5: `"
-        + md5
-        + "`SHA1: `"
-        + sha1
-        + "`SHA256: `"
-        + sha256
-        + "`SHA512: `"
-        + sha512[:-1]
-        + "`"
-    )
+    if hashtxt_:
+        digests = await hash_bytes(hashtxt_.encode("utf-8"))
+        ans = "Text: `" + hashtxt_ + "`"
+    else:
+        reply = await hash_q.get_reply_message()
+        if reply is None or reply.file is None:
+            return await hash_q.edit("**Escreva um texto ou responda a um arquivo.**")
+        await hash_q.edit("**Calculando hashes...**")
+        if reply.document:
+            chunks = stream_file(hash_q.client, reply.document)
+        else:
+            chunks = hash_q.client.iter_download(reply.media)
+        digests = await hash_stream(chunks)
+        ans = "Arquivo: `" + (reply.file.name or "sem nome") + "`"
+    for name, digest in digests.items():
+        ans += f"\n{name.upper()}: `{digest}`"
     if len(ans) > 4096:
-        with open("hashes.txt", "w+") as hashfile:
-            hashfile.write(ans)
+        hashfile = io.BytesIO(ans.encode("utf-8"))
+        hashfile.name = "hashes.txt"
         await hash_q.client.send_file(
             hash_q.chat_id,
-            "hashes.txt",
+            hashfile,
             reply_to=hash_q.id,
             caption="`É muito grande, enviando um arquivo de texto. `",
         )
-        runapp(["rm", "hashes.txt"], stdout=PIPE)
     else:
         await hash_q.reply(ans)
 
@@ -75,8 +68,8 @@ async def endecrypt(query):
 
 CMD_HELP.update(
     {
-        "hash": ">`.hash`"
-        "\n**Uso:** Encontra o md5, sha1, sha256, sha512 da string quando escrita em um arquivo txt.",
+        "hash": ">`.hash` <texto ou responder a um arquivo>"
+        "\n**Uso:** Encontra o md5, sha1, sha256, sha512 da string ou do arquivo respondido.",
         "base64": ">`.base64 [en ou de]`"
         "\n**Uso:** Encontra a codificação base64 da string dada ou a decodifica.",
     }
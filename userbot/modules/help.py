@@ -7,6 +7,7 @@
 
 from userbot import CMD_HELP
 from userbot.events import register
+from userbot.loader import LOADER
 
 
 @register(outgoing=True, pattern=r"^\.help(?: |$)(.*)")
@@ -18,6 +19,8 @@ async def help(event):
         await event.edit("`O comando de ajuda não é permitido em canais`")
         return
     if args:
+        if args not in CMD_HELP:
+            LOADER.load_help(args)
         if args in CMD_HELP:
             await event.edit(str(CMD_HELP[args]))
         else:
@@ -27,7 +30,7 @@ async def help(event):
                  \nEspecifique para qual módulo você deseja ajuda! \
                  \n**Uso:** `.help` <nome do módulo>\n\n"
 
-        temp = "".join(str(i) + " " for i in CMD_HELP)
+        temp = "".join(str(i) + " " for i in CMD_HELP.keys() | LOADER.help_names())
         temp = sorted(temp.split())
         for i in temp:
             final += "`" + str(i)
@@ -7,11 +7,11 @@
 import math
 import os
 
-import aiohttp
 import heroku3
 
 from userbot import BOTLOG, BOTLOG_CHATID, CMD_HELP, HEROKU_API_KEY, HEROKU_APP_NAME
 from userbot.events import register
+from userbot.utils import get_session
 
 heroku_api = "https://api.heroku.com"
 if HEROKU_APP_NAME is not None and HEROKU_API_KEY is not None:
@@ -124,53 +124,53 @@ async def dyno_usage(dyno):
     await dyno.edit("**Em processamento...**")
     user_id = Heroku.account().id
     path = "/accounts/" + user_id + "/actions/get-quota"
-    async with aiohttp.ClientSession() as session:
-        useragent = (
-            "Mozilla/5.0 (Linux; Android 10; SM-G975F) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/81.0.4044.117 Mobile Safari/537.36"
-        )
-        headers = {
-            "User-Agent": useragent,
-            "Authorization": f"Bearer {HEROKU_API_KEY}",
-            "Accept": "application/vnd.heroku+json; version=3.account-quotas",
-        }
-        async with session.get(heroku_api + path, headers=headers) as r:
-            if r.status != 200:
-                await dyno.client.send_message(
-                    dyno.chat_id, f"`{r.reason}`", reply_to=dyno.id
-                )
-                await dyno.edit("**Erro: Heroku está sendo Heroku.**")
-                return False
-            result = await r.json()
-            quota = result["account_quota"]
-            quota_used = result["quota_used"]
-            """ - User Quota Limit and Used - """
-            remaining_quota = quota - quota_used
-            percentage = math.floor(remaining_quota / quota * 100)
-            minutes_remaining = remaining_quota / 60
-            hours = math.floor(minutes_remaining / 60)
-            minutes = math.floor(minutes_remaining % 60)
-            """ - User App Used Quota - """
-            Apps = result["apps"]
-            for apps in Apps:
-                if apps.get("app_uuid") == app.id:
-                    AppQuotaUsed = apps.get("quota_used") / 60
-                    AppPercentage = math.floor(apps.get("quota_used") * 100 / quota)
-                    break
-            else:
-                AppQuotaUsed = 0
-                AppPercentage = 0
-
-            AppHours = math.floor(AppQuotaUsed / 60)
-            AppMinutes = math.floor(AppQuotaUsed % 60)
-
-            await dyno.edit(
-                "**Estatísticas de horas do dinamômetro Heroku para o mês atual**\n\n"
-                f"**Uso ({app.name}):** {AppHours} hour(s), {AppMinutes} minute(s) - {AppPercentage}%\n"
-                f"**Remanescente (total):** {hours} hour(s), {minutes} minute(s) - {percentage}%"
+    session = get_session()
+    useragent = (
+        "Mozilla/5.0 (Linux; Android 10; SM-G975F) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/81.0.4044.117 Mobile Safari/537.36"
+    )
+    headers = {
+        "User-Agent": useragent,
+        "Authorization": f"Bearer {HEROKU_API_KEY}",
+        "Accept": "application/vnd.heroku+json; version=3.account-quotas",
+    }
+    async with session.get(heroku_api + path, headers=headers) as r:
+        if r.status != 200:
+            await dyno.client.send_message(
+                dyno.chat_id, f"`{r.reason}`", reply_to=dyno.id
             )
-            return True
+            await dyno.edit("**Erro: Heroku está sendo Heroku.**")
+            return False
+        result = await r.json()
+        quota = result["account_quota"]
+        quota_used = result["quota_used"]
+        """ - User Quota Limit and Used - """
+        remaining_quota = quota - quota_used
+        percentage = math.floor(remaining_quota / quota * 100)
+        minutes_remaining = remaining_quota / 60
+        hours = math.floor(minutes_remaining / 60)
+        minutes = math.floor(minutes_remaining % 60)
+        """ - User App Used Quota - """
+        Apps = result["apps"]
+        for apps in Apps:
+            if apps.get("app_uuid") == app.id:
+                AppQuotaUsed = apps.get("quota_used") / 60
+                AppPercentage = math.floor(apps.get("quota_used") * 100 / quota)
+                break
+        else:
+            AppQuotaUsed = 0
+            AppPercentage = 0
+
+        AppHours = math.floor(AppQuotaUsed / 60)
+        AppMinutes = math.floor(AppQuotaUsed % 60)
+
+        await dyno.edit(
+            "**Estatísticas de horas do dinamômetro Heroku para o mês atual**\n\n"
+            f"**Uso ({app.name}):** {AppHours} hour(s), {AppMinutes} minute(s) - {AppPercentage}%\n"
+            f"**Remanescente (total):** {hours} hour(s), {minutes} minute(s) - {percentage}%"
+        )
+        return True
 
 
 @register(outgoing=True, pattern=r"^\.logs")
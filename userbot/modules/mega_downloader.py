@@ -21,11 +21,9 @@
 import asyncio
 import errno
 import json
-import math
 import multiprocessing
 import os
 import re
-import time
 from asyncio import create_subprocess_shell as asyncSubprocess
 from asyncio.subprocess import PIPE as asyncPIPE
 from urllib.error import HTTPError
@@ -34,7 +32,7 @@ from pySmartDL import SmartDL
 
 from userbot import CMD_HELP, LOGS, TEMP_DOWNLOAD_DIRECTORY
 from userbot.events import register
-from userbot.utils import humanbytes, time_formatter
+from userbot.utils import time_formatter, track_progress
 
 
 async def subprocess_run(megadl, cmd):
@@ -98,49 +96,22 @@ async def mega_downloader(megadl):
             await megadl.edit(f"`{e}`")
             return None
     downloader = SmartDL(file_url, temp_file_path, progress_bar=False)
-    display_message = None
     try:
         downloader.start(blocking=False)
     except HTTPError as e:
         await megadl.edit(f"**Erro HTTP**: `{e}`")
         return None
-    start = time.time()
-    while not downloader.isFinished():
-        status = downloader.get_status().capitalize()
-        total_length = downloader.filesize or None
-        downloaded = downloader.get_dl_size()
-        percentage = int(downloader.get_progress() * 100)
-        speed = downloader.get_speed(human=True)
-        estimated_total_time = round(downloader.get_eta())
-        progress_str = "**{}:** `[{}{}]` **{}%**".format(
-            status,
-            "".join("●" for _ in range(math.floor(percentage / 10))),
-            "".join("○" for _ in range(10 - math.floor(percentage / 10))),
-            round(percentage, 2),
-        )
-
-        diff = time.time() - start
-        try:
-            current_message = (
-                f"**Nome:** `{file_name}`\n"
-                f"{progress_str}\n"
-                f"{humanbytes(downloaded)} de {humanbytes(total_length)}"
-                f" @ {speed}\n"
-                f"**Duração:** {time_formatter(round(diff))}\n"
-                f"**Tempo Estimado:** {time_formatter(estimated_total_time)}"
-            )
-            if round(diff % 15.00) == 0 and (
-                display_message != current_message or total_length == downloaded
-            ):
-                await megadl.edit(current_message)
-                await asyncio.sleep(0.2)
-                display_message = current_message
-        except Exception:
-            pass
-        finally:
+    wait = 0
+    async with track_progress(megadl, "MEGA - Download", file_name) as prog:
+        while not downloader.isFinished():
+            status = downloader.get_status().capitalize()
+            prog.status = status
+            prog.update(downloader.get_dl_size(), downloader.filesize or 0)
             if status == "Combining":
                 wait = round(downloader.get_eta())
                 await asyncio.sleep(wait)
+            else:
+                await asyncio.sleep(1)
     if downloader.isSuccessful():
         download_time = round(downloader.get_dl_time() + wait)
         try:
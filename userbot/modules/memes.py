@@ -8,12 +8,12 @@ from asyncio import sleep
 from random import choice, getrandbits, randint
 from re import sub
 
-import requests
 from cowpy import cow
 
 from userbot import CMD_HELP
 from userbot.events import register
 from userbot.modules.admin import get_user_from_event
+from userbot.utils import http_get
 
 # ================= CONSTANT =================
 METOOSTR = [
@@ -1236,9 +1236,9 @@ async def decide(event):
     decision = event.pattern_match.group(1).lower()
     message_id = event.reply_to_msg_id or None
     if decision != "decide":
-        r = requests.get(f"https://yesno.wtf/api?force={decision}").json()
+        r = (await http_get(f"https://yesno.wtf/api?force={decision}")).json()
     else:
-        r = requests.get("https://yesno.wtf/api").json()
+        r = (await http_get("https://yesno.wtf/api")).json()
     await event.delete()
     await event.client.send_message(
         event.chat_id, str(r["answer"]).upper(), reply_to=message_id, file=r["image"]
@@ -1534,7 +1534,7 @@ async def let_me_google_that_for_you(lmgtfy_q):
     query_encoded = query.replace(" ", "+")
     lfy_url = f"http://lmgtfy.com/?s=g&iie=1&q={query_encoded}"
     payload = {"format": "json", "url": lfy_url}
-    r = requests.get("http://is.gd/create.php", params=payload)
+    r = await http_get("http://is.gd/create.php", params=payload)
     await lmgtfy_q.edit(
         f"Aqui está, fique a vontade.\
     \n[{query}]({r.json()['shorturl']})"
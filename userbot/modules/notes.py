@@ -9,17 +9,19 @@ from asyncio import sleep
 
 from userbot import BOTLOG, BOTLOG_CHATID, CMD_HELP
 from userbot.events import register
+from userbot.utils import send_saved_message
 
 
 @register(outgoing=True, pattern=r"^\.notes$")
 async def notes_active(svd):
     """ For .notes command, list all of the notes saved in a chat. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.notes_sql import get_notes
     except AttributeError:
         return await svd.edit("**Executando em modo não SQL!**")
     message = "**Não há notas salvas neste bate-papo**"
-    notes = get_notes(svd.chat_id)
+    notes = await run_sql(get_notes, svd.chat_id)
     for note in notes:
         if message == "**Não há notas salvas neste bate-papo**":
             message = "Notas salvas neste bate-papo:\n"
@@ -31,11 +33,12 @@ async def notes_active(svd):
 async def remove_notes(clr):
     """ For .clear command, clear note with the given name."""
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.notes_sql import rm_note
     except AttributeError:
         return await clr.edit("**Executando em modo não SQL!**")
     notename = clr.pattern_match.group(1)
-    if rm_note(clr.chat_id, notename) is False:
+    if await run_sql(rm_note, clr.chat_id, notename) is False:
         return await clr.edit(f"**Não foi possível encontrar a nota:** **{notename}**")
     else:
         return await clr.edit(f"**Nota excluída com sucesso:** **{notename}**")
@@ -45,6 +48,7 @@ async def remove_notes(clr):
 async def add_note(fltr):
     """ For .save command, saves notes in a chat. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.notes_sql import add_note
     except AttributeError:
         return await fltr.edit("**Executando em modo não SQL!**")
@@ -71,7 +75,7 @@ async def add_note(fltr):
         rep_msg = await fltr.get_reply_message()
         string = rep_msg.text
     success = "**Nota {} com sucesso. Use** `#{}` **para obtê-la.**"
-    if add_note(str(fltr.chat_id), keyword, string, msg_id) is False:
+    if await run_sql(add_note, str(fltr.chat_id), keyword, string, msg_id) is False:
         return await fltr.edit(success.format("atualizada", keyword))
     return await fltr.edit(success.format("adicionado", keyword))
 
@@ -82,26 +86,28 @@ async def add_note(fltr):
 async def incom_note(getnt):
     """ Notes logic. """
     try:
-        if not (await getnt.get_sender()).bot:
+        if not await getnt.context.sender_is_bot():
             try:
+                from userbot.modules.sql_helper import run_sql
                 from userbot.modules.sql_helper.notes_sql import get_note
             except AttributeError:
                 return
             notename = getnt.text[1:]
-            note = get_note(getnt.chat_id, notename)
+            note = await run_sql(get_note, getnt.chat_id, notename)
             message_id_to_reply = getnt.message.reply_to_msg_id
             if not message_id_to_reply:
                 message_id_to_reply = None
             if note:
                 if note.f_mesg_id:
-                    msg_o = await getnt.client.get_messages(
-                        entity=BOTLOG_CHATID, ids=int(note.f_mesg_id)
-                    )
-                    await getnt.client.send_message(
-                        getnt.chat_id,
-                        msg_o.mesage,
-                        reply_to=message_id_to_reply,
-                        file=msg_o.media,
+                    await send_saved_message(
+                        getnt.client,
+                        note.f_mesg_id,
+                        lambda text, media: getnt.client.send_message(
+                            getnt.chat_id,
+                            text,
+                            reply_to=message_id_to_reply,
+                            file=media,
+                        ),
                     )
                 elif note.reply:
                     await getnt.client.send_message(
@@ -5,10 +5,11 @@
 
 import os
 
-import requests
+import aiohttp
 
 from userbot import CMD_HELP, OCR_SPACE_API_KEY, TEMP_DOWNLOAD_DIRECTORY, bot
 from userbot.events import register
+from userbot.utils import http_post
 
 
 async def ocr_space_file(
@@ -32,12 +33,12 @@ async def ocr_space_file(
         "apikey": api_key,
         "language": language,
     }
+    data = aiohttp.FormData()
+    for key, value in payload.items():
+        data.add_field(key, str(value))
     with open(filename, "rb") as f:
-        r = requests.post(
-            "https://api.ocr.space/parse/image",
-            files={filename: f},
-            data=payload,
-        )
+        data.add_field(filename, f, filename=os.path.basename(filename))
+        r = await http_post("https://api.ocr.space/parse/image", data=data)
     return r.json()
 
 
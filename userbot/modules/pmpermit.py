@@ -33,25 +33,25 @@ DEF_UNAPPROVED_MSG = (
 async def permitpm(event):
     """ Prohibits people from PMing you without approval. \
         Will block retarded nibbas automatically. """
-    if not PM_AUTO_BAN:
+    if not PM_AUTO_BAN or not event.is_private:
         return
-    self_user = await event.client.get_me()
+    self_user = await event.context.get_me()
     if (
-        event.is_private
-        and event.chat_id != 777000
+        event.chat_id != 777000
         and event.chat_id != self_user.id
-        and not (await event.get_sender()).bot
+        and not await event.context.sender_is_bot()
     ):
         try:
+            from userbot.modules.sql_helper import run_sql
             from userbot.modules.sql_helper.globals import gvarstatus
             from userbot.modules.sql_helper.pm_permit_sql import is_approved
         except AttributeError:
             return
-        apprv = is_approved(event.chat_id)
-        notifsoff = gvarstatus("NOTIF_OFF")
+        apprv = await run_sql(is_approved, event.chat_id)
+        notifsoff = await run_sql(gvarstatus, "NOTIF_OFF")
 
         # Use user custom unapproved message
-        getmsg = gvarstatus("unapproved_msg")
+        getmsg = await run_sql(gvarstatus, "unapproved_msg")
         UNAPPROVED_MSG = getmsg if getmsg is not None else DEF_UNAPPROVED_MSG
         # This part basically is a sanity check
         # If the message that sent before is Unapproved Message
@@ -114,27 +114,27 @@ async def permitpm(event):
 @register(disable_edited=True, outgoing=True, disable_errors=True)
 async def auto_accept(event):
     """ Will approve automatically if you texted them first. """
-    if not PM_AUTO_BAN:
+    if not PM_AUTO_BAN or not event.is_private:
         return
-    self_user = await event.client.get_me()
+    self_user = await event.context.get_me()
     if (
-        event.is_private
-        and event.chat_id != 777000
+        event.chat_id != 777000
         and event.chat_id != self_user.id
-        and not (await event.get_sender()).bot
+        and not await event.context.sender_is_bot()
     ):
         try:
+            from userbot.modules.sql_helper import run_sql
             from userbot.modules.sql_helper.globals import gvarstatus
             from userbot.modules.sql_helper.pm_permit_sql import approve, is_approved
         except AttributeError:
             return
 
         # Use user custom unapproved message
-        get_message = gvarstatus("unapproved_msg")
+        get_message = await run_sql(gvarstatus, "unapproved_msg")
         UNAPPROVED_MSG = get_message if get_message is not None else DEF_UNAPPROVED_MSG
-        chat = await event.get_chat()
+        chat = await event.context.get_chat()
         if isinstance(chat, User):
-            if is_approved(event.chat_id) or chat.bot:
+            if await run_sql(is_approved, event.chat_id) or chat.bot:
                 return
             async for message in event.client.iter_messages(
                 event.chat_id, reverse=True, limit=1
@@ -144,11 +144,11 @@ async def auto_accept(event):
                     and message.sender_id == self_user.id
                 ):
                     try:
-                        approve(event.chat_id)
+                        await run_sql(approve, event.chat_id)
                     except IntegrityError:
                         return
 
-                if is_approved(event.chat_id) and BOTLOG:
+                if await run_sql(is_approved, event.chat_id) and BOTLOG:
                     await event.client.send_message(
                         BOTLOG_CHATID,
                         "#AUTO-APPROVED\n"
@@ -161,10 +161,11 @@ async def auto_accept(event):
 async def notifoff(noff_event):
     """ For .notifoff command, stop getting notifications from unapproved PMs. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.globals import addgvar
     except AttributeError:
         return await noff_event.edit("**Executando em modo não SQL!**")
-    addgvar("NOTIF_OFF", True)
+    await run_sql(addgvar, "NOTIF_OFF", True)
     await noff_event.edit("**Notificações de PMs não aprovados são silenciadas!**")
 
 
@@ -172,10 +173,11 @@ async def notifoff(noff_event):
 async def notifon(non_event):
     """ For .notifoff command, get notifications from unapproved PMs. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.globals import delgvar
     except AttributeError:
         return await non_event.edit("**Executando em modo não SQL!**")
-    delgvar("NOTIF_OFF")
+    await run_sql(delgvar, "NOTIF_OFF")
     await non_event.edit("**Notificações de PMs deixaram de ser silenciados!**")
 
 
@@ -183,6 +185,7 @@ async def notifon(non_event):
 async def approvepm(apprvpm):
     """ For .approve command, give someone the permissions to PM you. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.globals import gvarstatus
         from userbot.modules.sql_helper.pm_permit_sql import approve
     except AttributeError:
@@ -221,7 +224,7 @@ async def approvepm(apprvpm):
         uid = apprvpm.chat_id
 
     # Get user custom msg
-    getmsg = gvarstatus("unapproved_msg")
+    getmsg = await run_sql(gvarstatus, "unapproved_msg")
     UNAPPROVED_MSG = getmsg if getmsg is not None else DEF_UNAPPROVED_MSG
     async for message in apprvpm.client.iter_messages(
         apprvpm.chat_id, from_user="me", search=UNAPPROVED_MSG
@@ -229,7 +232,7 @@ async def approvepm(apprvpm):
         await message.delete()
 
     try:
-        approve(uid)
+        await run_sql(approve, uid)
     except IntegrityError:
         return await apprvpm.edit("**O usuário talvez já esteja aprovado.**")
 
@@ -245,6 +248,7 @@ async def approvepm(apprvpm):
 @register(outgoing=True, pattern=r"^\.disapprove(?:$| )(.*)")
 async def disapprovepm(disapprvpm):
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.pm_permit_sql import dissprove
     except BaseException:
         return await disapprvpm.edit("**Executando em modo não SQL!**")
@@ -254,7 +258,7 @@ async def disapprovepm(disapprvpm):
         replied_user = await disapprvpm.client.get_entity(reply.sender_id)
         aname = replied_user.id
         name0 = str(replied_user.first_name)
-        dissprove(aname)
+        await run_sql(dissprove, aname)
 
     elif disapprvpm.pattern_match.group(1):
         inputArgs = disapprvpm.pattern_match.group(1)
@@ -273,11 +277,11 @@ async def disapprovepm(disapprvpm):
             return await disapprvpm.edit("**Isso pode ser feito apenas com usuários.**")
 
         aname = user.id
-        dissprove(aname)
+        await run_sql(dissprove, aname)
         name0 = str(user.first_name)
 
     else:
-        dissprove(disapprvpm.chat_id)
+        await run_sql(dissprove, disapprvpm.chat_id)
         aname = await disapprvpm.client.get_entity(disapprvpm.chat_id)
         if not isinstance(aname, User):
             return await disapprvpm.edit("**Isso pode ser feito apenas com usuários.**")
@@ -314,9 +318,10 @@ async def blockpm(block):
         uid = block.chat_id
 
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.pm_permit_sql import dissprove
 
-        dissprove(uid)
+        await run_sql(dissprove, uid)
     except AttributeError:
         pass
 
@@ -350,6 +355,7 @@ async def add_pmsg(cust_msg):
     if not PM_AUTO_BAN:
         return await cust_msg.edit("Você precisa definir `PM_AUTO_BAN` para `True`")
     try:
+        from userbot.modules.sql_helper import run_sql
         import userbot.modules.sql_helper.globals as sql
     except AttributeError:
         await cust_msg.edit("**Executando em modo não SQL!**")
@@ -358,7 +364,7 @@ async def add_pmsg(cust_msg):
     await cust_msg.edit("**Processando...**")
     conf = cust_msg.pattern_match.group(1)
 
-    custom_message = sql.gvarstatus("unapproved_msg")
+    custom_message = await run_sql(sql.gvarstatus, "unapproved_msg")
 
     if conf.lower() == "set":
         message = await cust_msg.get_reply_message()
@@ -366,7 +372,7 @@ async def add_pmsg(cust_msg):
 
         # check and clear user unapproved message first
         if custom_message is not None:
-            sql.delgvar("unapproved_msg")
+            await run_sql(sql.delgvar, "unapproved_msg")
             status = "Updated"
 
         if not message:
@@ -376,7 +382,7 @@ async def add_pmsg(cust_msg):
         # eg: bold, underline, striketrough, link
         # for now all text are in monoscape
         msg = message.message  # get the plain text
-        sql.addgvar("unapproved_msg", msg)
+        await run_sql(sql.addgvar, "unapproved_msg", msg)
         await cust_msg.edit("**Mensagem salva como mensagem PMPermit.**")
 
         if BOTLOG:
@@ -389,7 +395,7 @@ async def add_pmsg(cust_msg):
             await cust_msg.edit("**Você ainda não definiu uma mensagem PMPermit personalizada.**")
 
         else:
-            sql.delgvar("unapproved_msg")
+            await run_sql(sql.delgvar, "unapproved_msg")
             await cust_msg.edit("**A mensagem PMPermit foi redefinida para o padrão.**")
     if conf.lower() == "get":
         if custom_message is not None:
@@ -19,7 +19,7 @@ from telethon.tl.functions.photos import (
 from telethon.tl.types import Channel, Chat, InputPhoto, MessageMediaPhoto, User
 
 from userbot import CMD_HELP, bot
-from userbot.events import register
+from userbot.events import SELF_USER, register
 
 # ====================== CONSTANT ===============================
 INVALID_MEDIA = "**A extensão da entidade de mídia é inválida.**"
@@ -60,6 +60,7 @@ async def update_name(name):
         lastname = namesplit[1]
 
     await name.client(UpdateProfileRequest(first_name=firstname, last_name=lastname))
+    SELF_USER.invalidate()
     await name.edit(NAME_OK)
 
 
@@ -105,6 +106,7 @@ async def update_username(username):
     newusername = username.pattern_match.group(1)
     try:
         await username.client(UpdateUsernameRequest(newusername))
+        SELF_USER.invalidate()
         await username.edit(USERNAME_SUCCESS)
     except UsernameOccupiedError:
         await username.edit(USERNAME_TAKEN)
@@ -9,11 +9,12 @@
 import io
 import os
 
-import requests
+import aiohttp
 from telethon.tl.types import MessageMediaPhoto
 
 from userbot import CMD_HELP, REM_BG_API_KEY, TEMP_DOWNLOAD_DIRECTORY
 from userbot.events import register
+from userbot.utils import http_post
 
 
 @register(outgoing=True, pattern=r"^\.rbg(?: |$)(.*)")
@@ -76,16 +77,14 @@ async def ReTrieveFile(input_file_name):
     headers = {
         "X-API-Key": REM_BG_API_KEY,
     }
-    files = {
-        "image_file": (input_file_name, open(input_file_name, "rb")),
-    }
-    return requests.post(
-        "https://api.remove.bg/v1.0/removebg",
-        headers=headers,
-        files=files,
-        allow_redirects=True,
-        stream=True,
-    )
+    data = aiohttp.FormData()
+    with open(input_file_name, "rb") as image_file:
+        data.add_field("image_file", image_file, filename=input_file_name)
+        return await http_post(
+            "https://api.remove.bg/v1.0/removebg",
+            headers=headers,
+            data=data,
+        )
 
 
 async def ReTrieveURL(input_url):
@@ -93,12 +92,10 @@ async def ReTrieveURL(input_url):
         "X-API-Key": REM_BG_API_KEY,
     }
     data = {"image_url": input_url}
-    return requests.post(
+    return await http_post(
         "https://api.remove.bg/v1.0/removebg",
         headers=headers,
         data=data,
-        allow_redirects=True,
-        stream=True,
     )
 
 
@@ -10,23 +10,21 @@
 import io
 import os
 import shutil
-import urllib
+import urllib.parse
 
-import requests
+import aiohttp
 from bs4 import BeautifulSoup
 from PIL import Image
 
 from userbot import CMD_HELP, bot
 from userbot.events import register
-from userbot.utils import googleimagesdownload
+from userbot.utils import googleimagesdownload, http_get, http_post
 
-opener = urllib.request.build_opener()
 useragent = (
     "Mozilla/5.0 (Linux; Android 10; SM-G975F) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
     "Chrome/80.0.3987.149 Mobile Safari/537.36"
 )
-opener.addheaders = [("User-agent", useragent)]
 
 
 @register(outgoing=True, pattern=r"^\.reverse(?: |$)(\d*)")
@@ -58,8 +56,11 @@ async def okgoogle(img):
 
     # https://stackoverflow.com/questions/23270175/google-reverse-image-search-using-post-request#28792943
     searchUrl = "https://www.google.com/searchbyimage/upload"
-    multipart = {"encoded_image": (name, open(name, "rb")), "image_content": ""}
-    response = requests.post(searchUrl, files=multipart, allow_redirects=False)
+    multipart = aiohttp.FormData()
+    with open(name, "rb") as encoded_image:
+        multipart.add_field("encoded_image", encoded_image, filename=name)
+        multipart.add_field("image_content", "")
+        response = await http_post(searchUrl, data=multipart, allow_redirects=False)
     fetchUrl = response.headers["Location"]
 
     if response == 400:
@@ -135,7 +136,7 @@ async def okgoogle(img):
 async def ParseSauce(googleurl):
     """Parse/Scrape the HTML code for the info we want."""
 
-    source = opener.open(googleurl).read()
+    source = (await http_get(googleurl, headers={"User-Agent": useragent})).content
     soup = BeautifulSoup(source, "html.parser")
     results = {"similar_images": "", "best_guess": ""}
 
@@ -6,12 +6,12 @@
 """ Userbot module containing various scrapers. """
 
 import asyncio
+import io
 import json
 import os
 import re
 import shutil
 import time
-from asyncio import sleep
 from urllib.parse import quote_plus
 
 import asyncurban
@@ -20,7 +20,6 @@ from emoji import get_emoji_regexp
 from google_trans_new import LANGUAGES, google_translator
 from gtts import gTTS
 from gtts.lang import tts_langs
-from requests import get
 from search_engine_parser import GoogleSearch
 from telethon.tl.types import DocumentAttributeAudio, DocumentAttributeVideo
 from wikipedia import summary
@@ -30,11 +29,13 @@ from youtube_search import YoutubeSearch
 
 from userbot import BOTLOG, BOTLOG_CHATID, CMD_HELP
 from userbot.events import register
-from userbot.modules.upload_download import get_video_thumb
-from userbot.utils import chrome, googleimagesdownload, progress
+from userbot.utils import BROWSERS, googleimagesdownload, http_get, track_progress
 from userbot.utils.FastTelethon import upload_file
+from userbot.utils.media import get_video_thumb
 
 CARBONLANG = "pt-br"
+# Seconds the export of a carbon may take to download.
+CARBON_TIMEOUT = 30
 
 
 @register(outgoing=True, pattern=r"^\.crblang (.*)")
@@ -44,6 +45,21 @@ async def setlang(prog):
     await prog.edit(f"Idioma para carbon.now.sh definido para {CARBONLANG}")
 
 
+def export_carbon(driver, download_dir, url):
+    """ Runs on a pooled browser, returns the png exported by carbon.now.sh,
+        or None if it isn't downloaded within CARBON_TIMEOUT. """
+    driver.get(url)
+    driver.find_element_by_css_selector('[data-cy="quick-export-button"]').click()
+    file_path = os.path.join(download_dir, "carbon.png")
+    deadline = time.monotonic() + CARBON_TIMEOUT
+    while not os.path.isfile(file_path):
+        if time.monotonic() > deadline:
+            return None
+        time.sleep(0.25)
+    with open(file_path, "rb") as file:
+        return file.read()
+
+
 @register(outgoing=True, pattern=r"^\.carbon")
 async def carbon_api(e):
     """ A Wrapper for carbon.now.sh """
@@ -58,44 +74,28 @@ async def carbon_api(e):
         pcode = str(textx.message)  # Importing message to module
     code = quote_plus(pcode)  # Converting to urlencoded
     await e.edit("**Processing...\n25%**")
-    dl_path = "./.carbon/"
-    file_path = dl_path + "carbon.png"
-    if os.path.isfile(file_path):
-        os.remove(file_path)
     url = CARBON.format(code=code, lang=CARBONLANG)
-    driver = await chrome()
-    driver.get(url)
     await e.edit("**Processando...\n50%**")
-    driver.command_executor._commands["send_command"] = (
-        "POST",
-        "/session/$sessionId/chromium/send_command",
-    )
-    params = {
-        "cmd": "Page.setDownloadBehavior",
-        "params": {"behavior": "allow", "downloadPath": dl_path},
-    }
-    driver.execute("send_command", params)
-    driver.find_element_by_css_selector('[data-cy="quick-export-button"]').click()
-    await e.edit("**Processando...\n75%**")
-    # Waiting for downloading
-    while not os.path.isfile(file_path):
-        await sleep(0.5)
+    try:
+        image = await BROWSERS.run(export_carbon, url)
+    except asyncio.TimeoutError:
+        image = None
+    if image is None:
+        return await e.edit("**O carbon.now.sh demorou demais para responder.**")
     await e.edit("**Processando...\n100%**")
     await e.edit("**Enviando...**")
-    await e.client.send_file(
-        e.chat_id,
-        file_path,
-        caption=(
-            "Feito usando [Carbon](https://carbon.now.sh/about/),"
-            "\num projeto de [Dawn Labs](https://dawnlabs.io/)"
-        ),
-        force_document=True,
-        reply_to=e.message.reply_to_msg_id,
-    )
-
-    os.remove(file_path)
-    driver.quit()
-    # Removing carbon.png after uploading
+    with io.BytesIO(image) as file:
+        file.name = "carbon.png"
+        await e.client.send_file(
+            e.chat_id,
+            file,
+            caption=(
+                "Feito usando [Carbon](https://carbon.now.sh/about/),"
+                "\num projeto de [Dawn Labs](https://dawnlabs.io/)"
+            ),
+            force_document=True,
+            reply_to=e.message.reply_to_msg_id,
+        )
     await e.delete()  # Deleting msg
 
 
@@ -160,7 +160,7 @@ async def moni(event):
             request_url = "https://api.exchangeratesapi.io/latest?base={}".format(
                 currency_from
             )
-            current_response = get(request_url).json()
+            current_response = (await http_get(request_url)).json()
             if currency_to in current_response["rates"]:
                 current_rate = float(current_response["rates"][currency_to])
                 rebmun = round(number * current_rate, 2)
@@ -325,14 +325,13 @@ async def text_to_speech(query):
     await query.edit("**Processando...**")
 
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.globals import gvarstatus
     except AttributeError:
         return await query.edit("**Executando em modo não SQL!**")
 
-    if gvarstatus("tts_lang") is not None:
-        target_lang = str(gvarstatus("tts_lang"))
-    else:
-        target_lang = "pt"
+    lang = await run_sql(gvarstatus, "tts_lang")
+    target_lang = str(lang) if lang is not None else "pt"
 
     try:
         gTTS(message, lang=target_lang)
@@ -366,7 +365,7 @@ async def imdb(e):
         movie_name = e.pattern_match.group(1)
         remove_space = movie_name.split(" ")
         final_name = "+".join(remove_space)
-        page = get(
+        page = await http_get(
             "https://www.imdb.com/find?ref_=nv_sr_fn&q=r" + final_name + "&s=all"
         )
         soup = BeautifulSoup(page.content, "lxml")
@@ -375,7 +374,7 @@ async def imdb(e):
         mov_link = (
             "http://www.imdb.com/" + odds[0].findNext("td").findNext("td").a["href"]
         )
-        page1 = get(mov_link)
+        page1 = await http_get(mov_link)
         soup = BeautifulSoup(page1.content, "lxml")
         if soup.find("div", "poster"):
             poster = soup.find("div", "poster").img["src"]
@@ -469,14 +468,13 @@ async def translateme(trans):
     translator = google_translator()
 
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.globals import gvarstatus
     except AttributeError:
         return await trans.edit("**Executando em modo não SQL!**")
 
-    if gvarstatus("trt_lang") is not None:
-        target_lang = str(gvarstatus("trt_lang"))
-    else:
-        target_lang = "pt"
+    lang = await run_sql(gvarstatus, "trt_lang")
+    target_lang = str(lang) if lang is not None else "pt"
 
     try:
         reply_text = translator.translate(deEmojify(message), lang_tgt=target_lang)
@@ -501,7 +499,8 @@ async def lang(value):
     util = value.pattern_match.group(1).lower()
 
     try:
-        from userbot.modules.sql_helper.globals import addgvar, delgvar, gvarstatus
+        from userbot.modules.sql_helper import run_sql
+        from userbot.modules.sql_helper.globals import addgvar
     except AttributeError:
         return await lang.edit("**Executando em modo não SQL!**")
 
@@ -514,9 +513,7 @@ async def lang(value):
                 f"**Código de idioma inválido!**\nCódigos de idioma disponíveis:\n\n`{LANGUAGES}`"
             )
 
-        if gvarstatus("trt_lang"):
-            delgvar("trt_lang")
-        addgvar("trt_lang", arg)
+        await run_sql(addgvar, "trt_lang", arg)
         LANG = LANGUAGES[arg]
 
     elif util == "tts":
@@ -528,9 +525,7 @@ async def lang(value):
                 f"**Código de idioma inválido!**\nCódigos de idioma disponíveis:\n\n`{tts_langs()}`"
             )
 
-        if gvarstatus("tts_lang"):
-            delgvar("tts_lang")
-        addgvar("tts_lang", arg)
+        await run_sql(addgvar, "tts_lang", arg)
         LANG = tts_langs()[arg]
 
     await value.edit(f"**Idioma de {scraper} mudou para {LANG.title()}.**")
@@ -669,25 +664,18 @@ async def download_video(v_url):
         return await v_url.edit("**Ocorreu um erro durante a extração de informações.**")
     except Exception as e:
         return await v_url.edit(f"{str(type(e)): {str(e)}}")
-    c_time = time.time()
     if song:
         await v_url.edit(f"**Preparando para fazer upload da música:**\n**{rip_data['title']}**")
-        with open(rip_data["id"] + ".mp3", "rb") as f:
-            result = await upload_file(
-                client=v_url.client,
-                file=f,
-                name=f"{rip_data['id']}.mp3",
-                progress_callback=lambda d, t: asyncio.get_event_loop().create_task(
-                    progress(
-                        d,
-                        t,
-                        v_url,
-                        c_time,
-                        "YouTube-DL - Upload",
-                        f"{rip_data['title']}.mp3",
-                    )
-                ),
-            )
+        async with track_progress(
+            v_url, "YouTube-DL - Upload", f"{rip_data['title']}.mp3"
+        ) as prog:
+            with open(rip_data["id"] + ".mp3", "rb") as f:
+                result = await upload_file(
+                    client=v_url.client,
+                    file=f,
+                    name=f"{rip_data['id']}.mp3",
+                    progress_callback=prog.update,
+                )
         img_extensions = ["jpg", "jpeg", "webp"]
         img_filenames = [
             fn_img
@@ -714,22 +702,16 @@ async def download_video(v_url):
     elif video:
         await v_url.edit(f"**Preparando para enviar vídeo:**\n**{rip_data['title']}**")
         thumb_image = await get_video_thumb(rip_data["id"] + ".mp4", "thumb.png")
-        with open(rip_data["id"] + ".mp4", "rb") as f:
-            result = await upload_file(
-                client=v_url.client,
-                file=f,
-                name=f"{rip_data['id']}.mp4",
-                progress_callback=lambda d, t: asyncio.get_event_loop().create_task(
-                    progress(
-                        d,
-                        t,
-                        v_url,
-                        c_time,
-                        "YouTube-DL - Upload",
-                        f"{rip_data['title']}.mp4",
-                    )
-                ),
-            )
+        async with track_progress(
+            v_url, "YouTube-DL - Upload", f"{rip_data['title']}.mp4"
+        ) as prog:
+            with open(rip_data["id"] + ".mp4", "rb") as f:
+                result = await upload_file(
+                    client=v_url.client,
+                    file=f,
+                    name=f"{rip_data['id']}.mp4",
+                    progress_callback=prog.update,
+                )
         await v_url.client.send_file(
             v_url.chat_id,
             result,
@@ -7,52 +7,56 @@
 # License: MPL and OSSRPL
 
 import io
-from asyncio import sleep
+from asyncio import TimeoutError, sleep
 from re import match
 
 from userbot import CMD_HELP
 from userbot.events import register
-from userbot.utils import chrome, options
+from userbot.utils import BROWSERS
+
+PAGE_SIZE_JS = (
+    "return [Math.max(document.body.scrollHeight, document.body.offsetHeight, "
+    "document.documentElement.clientHeight, document.documentElement.scrollHeight, "
+    "document.documentElement.offsetHeight), "
+    "Math.max(document.body.scrollWidth, document.body.offsetWidth, "
+    "document.documentElement.clientWidth, document.documentElement.scrollWidth, "
+    "document.documentElement.offsetWidth)];"
+)
+
+
+def open_page(driver, link):
+    """ Loads link and fits the window to the whole page, returns its size. """
+    driver.get(link)
+    height, width = driver.execute_script(PAGE_SIZE_JS)
+    driver.set_window_size(width + 125, height + 125)
+    return height, width
 
 
 @register(pattern=r"^\.ss (.*)", outgoing=True)
 async def capture(url):
     """ For .ss command, capture a website's screenshot and send the photo. """
     await url.edit("**Processando...**")
-    chrome_options = await options()
-    chrome_options.add_argument("--test-type")
-    chrome_options.add_argument("--ignore-certificate-errors")
-    chrome_options.arguments.remove("--window-size=1920x1080")
-    driver = await chrome(chrome_options=chrome_options)
     input_str = url.pattern_match.group(1)
     link_match = match(r"\bhttps?://.*\.\S+", input_str)
     if link_match:
         link = link_match.group()
     else:
         return await url.edit("**Preciso de um link válido para fazer capturas de tela.**")
-    driver.get(link)
-    height = driver.execute_script(
-        "return Math.max(document.body.scrollHeight, document.body.offsetHeight, "
-        "document.documentElement.clientHeight, document.documentElement.scrollHeight, "
-        "document.documentElement.offsetHeight);"
-    )
-    width = driver.execute_script(
-        "return Math.max(document.body.scrollWidth, document.body.offsetWidth, "
-        "document.documentElement.clientWidth, document.documentElement.scrollWidth, "
-        "document.documentElement.offsetWidth);"
-    )
-    driver.set_window_size(width + 125, height + 125)
-    wait_for = height / 1000
-    await url.edit(
-        "**Gerando captura de tela da página...**"
-        f"\nAltura da página = {height}px"
-        f"\nLargura da página = {width}px"
-        f"\nEsperando ({int(wait_for)}s) para a página carregar."
-    )
-    await sleep(int(wait_for))
-    im_png = driver.get_screenshot_as_png()
-    # saves screenshot of entire page
-    driver.quit()
+    try:
+        async with BROWSERS.job() as browser:
+            height, width = await browser.run(open_page, link)
+            wait_for = height / 1000
+            await url.edit(
+                "**Gerando captura de tela da página...**"
+                f"\nAltura da página = {height}px"
+                f"\nLargura da página = {width}px"
+                f"\nEsperando ({int(wait_for)}s) para a página carregar."
+            )
+            await sleep(int(wait_for))
+            # saves screenshot of entire page
+            im_png = await browser.run(lambda driver: driver.get_screenshot_as_png())
+    except TimeoutError:
+        return await url.edit("**A página demorou demais para carregar.**")
     message_id = url.message.id
     if url.reply_to_msg_id:
         message_id = url.reply_to_msg_id
@@ -8,30 +8,30 @@ from sqlalchemy.orm.exc import UnmappedInstanceError
 
 from userbot import BOTLOG_CHATID, CMD_HELP
 from userbot.events import register
+from userbot.utils import send_saved_message
 
 
 @register(outgoing=True, pattern=r"^\$\w*", ignore_unsafe=True, disable_errors=True)
 async def on_snip(event):
     """ Snips logic. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.snips_sql import get_snip
     except AttributeError:
         return
     name = event.text[1:]
-    snip = get_snip(name)
+    snip = await run_sql(get_snip, name)
     message_id_to_reply = event.message.reply_to_msg_id
     if not message_id_to_reply:
         message_id_to_reply = None
     if snip:
         if snip.f_mesg_id:
-            msg_o = await event.client.get_messages(
-                entity=BOTLOG_CHATID, ids=int(snip.f_mesg_id)
-            )
-            await event.client.send_message(
-                event.chat_id,
-                msg_o.message,
-                reply_to=message_id_to_reply,
-                file=msg_o.media,
+            await send_saved_message(
+                event.client,
+                snip.f_mesg_id,
+                lambda text, media: event.client.send_message(
+                    event.chat_id, text, reply_to=message_id_to_reply, file=media
+                ),
             )
             await event.delete()
         elif snip.reply:
@@ -45,6 +45,7 @@ async def on_snip(event):
 async def on_snip_save(event):
     """ For .snip command, saves snips for future use. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.snips_sql import add_snip
     except AttributeError:
         return await event.edit("**Executando em modo não SQL!**")
@@ -73,7 +74,7 @@ async def on_snip_save(event):
         string = rep_msg.text
     success = "**Snip {} com sucesso. Use** `${}` **em qualquer lugar para usá-lo**"
     try:
-        if add_snip(keyword, string, msg_id) is False:
+        if await run_sql(add_snip, keyword, string, msg_id) is False:
             await event.edit(success.format("atualizado", keyword))
         else:
             await event.edit(success.format("salvo", keyword))
@@ -85,12 +86,13 @@ async def on_snip_save(event):
 async def on_snip_list(event):
     """ For .snips command, lists snips saved by you. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.snips_sql import get_snips
     except AttributeError:
         return await event.edit("**Executando em modo não SQL!**")
 
     message = "**Nenhum snip disponível no momento.**"
-    all_snips = get_snips()
+    all_snips = await run_sql(get_snips)
     for a_snip in all_snips:
         if message == "**Nenhum snip disponível no momento.**":
             message = "**Snips disponíveis:**\n\n"
@@ -102,11 +104,12 @@ async def on_snip_list(event):
 async def on_snip_delete(event):
     """ For .remsnip command, deletes a snip. """
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.snips_sql import remove_snip
     except AttributeError:
         return await event.edit("**Executando em modo não SQL!**")
     name = event.pattern_match.group(1)
-    if remove_snip(name) is True:
+    if await run_sql(remove_snip, name) is True:
         await event.edit(f"**Snip excluído com sucesso:** `{name}`")
     else:
         await event.edit(f"**Não foi possível encontrar o snip:** `{name}`")
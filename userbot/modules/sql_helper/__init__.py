@@ -1,17 +1,124 @@
-from sqlalchemy import create_engine
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import and_, bindparam, create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.util import LRUCache
 
 from userbot import DB_URI
 
+# Connections kept open to the database, and extra ones opened under load.
+# The query threads never need more than POOL_SIZE at once.
+POOL_SIZE = 5
+MAX_OVERFLOW = 5
+# Seconds before a connection is replaced, so the server never drops it first.
+POOL_RECYCLE = 1800
+# Compiled write statements kept, see STATEMENTS.
+STATEMENT_CACHE_SIZE = 500
+
 BASE = declarative_base()
 
+_executor = ThreadPoolExecutor(POOL_SIZE, thread_name_prefix="sql")
+
+
+def create() -> Engine:
+    options = {"pool_pre_ping": True}
+    if make_url(DB_URI).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_recycle=POOL_RECYCLE
+        )
+    return create_engine(DB_URI, **options)
+
 
 def start() -> scoped_session:
-    engine = create_engine(DB_URI)
-    BASE.metadata.bind = engine
-    BASE.metadata.create_all(engine)
-    return scoped_session(sessionmaker(bind=engine, autoflush=False))
+    BASE.metadata.bind = ENGINE
+    BASE.metadata.create_all(ENGINE)
+    return scoped_session(sessionmaker(bind=ENGINE, autoflush=False))
 
 
+ENGINE = create()
+# Engine of the core statements below. They are built once per table, so
+# their compiled form is reused instead of compiling each write again.
+STATEMENTS = ENGINE.execution_options(compiled_cache=LRUCache(STATEMENT_CACHE_SIZE))
 SESSION = start()
+
+_statements = {}
+
+
+def _statement(kind, table, keys):
+    try:
+        return _statements[kind, table, keys]
+    except KeyError:
+        pass
+    if kind == "delete":
+        statement = table.delete().where(
+            and_(*(table.c[key] == bindparam(key) for key in keys))
+        )
+    elif kind == "insert":
+        statement = table.insert()
+    elif ENGINE.dialect.name == "postgresql":
+        statement = postgresql.insert(table)
+        columns = [column.name for column in table.c if column.name not in keys]
+        if columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=keys,
+                set_={column: statement.excluded[column] for column in columns},
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=keys)
+    elif ENGINE.dialect.name == "sqlite":
+        replace = len(keys) < len(table.c)
+        statement = table.insert().prefix_with("OR REPLACE" if replace else "OR IGNORE")
+    else:
+        statement = None
+    _statements[kind, table, keys] = statement
+    return statement
+
+
+def _primary_key(table):
+    return tuple(column.name for column in table.primary_key)
+
+
+def upsert(table, values, keys=None):
+    """
+    Inserts a row of table, replacing the row with the same keys, in a single
+    INSERT ... ON CONFLICT statement. keys defaults to the primary key, other
+    keys and databases without such a statement fall back to a delete and an
+    insert in one transaction.
+    """
+    keys = tuple(keys or _primary_key(table))
+    statement = None
+    if keys == _primary_key(table):
+        statement = _statement("upsert", table, keys)
+    with STATEMENTS.begin() as conn:
+        if statement is None:
+            conn.execute(
+                _statement("delete", table, keys), {key: values[key] for key in keys}
+            )
+            statement = _statement("insert", table, ())
+        conn.execute(statement, values)
+
+
+def insert(table, values):
+    """ Inserts a row of table, raising IntegrityError if its key is taken. """
+    with STATEMENTS.begin() as conn:
+        conn.execute(_statement("insert", table, ()), values)
+
+
+def delete(table, **keys):
+    """ Deletes the rows of table matching keys in a single statement,
+        returns whether any was deleted. """
+    statement = _statement("delete", table, tuple(sorted(keys)))
+    with STATEMENTS.begin() as conn:
+        return conn.execute(statement, keys).rowcount > 0
+
+
+async def run_sql(func, *args, **kwargs):
+    """ Runs a blocking sql_helper call on the database thread pool, so
+        slow queries don't hold up the event loop. """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(_executor, lambda: func(*args, **kwargs))
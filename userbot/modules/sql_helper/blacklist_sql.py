@@ -1,10 +1,12 @@
 try:
-    from userbot.modules.sql_helper import BASE, SESSION
+    from userbot.modules.sql_helper import BASE, SESSION, delete, insert
 except ImportError:
     raise AttributeError
 
 from sqlalchemy import Column, String
 
+from userbot import DB_CACHE
+
 
 class Blacklist(BASE):
     __tablename__ = "blacklist"
@@ -17,6 +19,23 @@ class Blacklist(BASE):
 Blacklist.__table__.create(checkfirst=True)
 
 
+def _load_blacklist():
+    try:
+        return frozenset(int(row.chat_id) for row in SESSION.query(Blacklist).all())
+    finally:
+        SESSION.close()
+
+
+# Chat IDs checked by the event router, kept in sync with the table below.
+BLACKLIST = _load_blacklist()
+
+
+def is_blacklisted(chat_id):
+    if not DB_CACHE:
+        return chat_id in _load_blacklist()
+    return chat_id in BLACKLIST
+
+
 def get_blacklist():
     try:
         return SESSION.query(Blacklist).all()
@@ -27,18 +46,19 @@ def get_blacklist():
 
 
 def add_blacklist(chat_id):
-    adder = Blacklist(str(chat_id))
-    SESSION.add(adder)
-    SESSION.commit()
+    global BLACKLIST
+    insert(Blacklist.__table__, {"chat_id": str(chat_id)})
+    BLACKLIST = BLACKLIST | {int(chat_id)}
 
 
 def del_blacklist(chat_id):
-    rem = SESSION.query(Blacklist).get(str(chat_id))
-    if rem:
-        SESSION.delete(rem)
-        SESSION.commit()
+    global BLACKLIST
+    if delete(Blacklist.__table__, chat_id=str(chat_id)):
+        BLACKLIST = BLACKLIST - {int(chat_id)}
 
 
 def del_blacklist_all():
+    global BLACKLIST
     SESSION.execute("""TRUNCATE TABLE blacklist""")
     SESSION.commit()
+    BLACKLIST = frozenset()
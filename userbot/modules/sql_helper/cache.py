@@ -0,0 +1,64 @@
+import threading
+from collections import OrderedDict
+
+from userbot import DB_CACHE
+
+# Entries kept by caches holding per-chat data.
+PER_CHAT_SIZE = 512
+
+_ALL = object()
+CACHES = {}
+
+
+class TableCache:
+    """ Keeps query results of one table until a write to it invalidates them. """
+
+    def __init__(self, table, maxsize=None):
+        self.table = table
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        # Queries run on several threads. Bumped by every invalidate, so a
+        # result loaded before a write is never stored after it.
+        self._lock = threading.Lock()
+        self._generation = 0
+        CACHES[table] = self
+
+    def get(self, key, loader):
+        """ Returns the cached result for key, calling loader on a miss.
+            Exceptions raised by loader are never cached. """
+        if not DB_CACHE:
+            return loader()
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                generation = self._generation
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return value
+        value = loader()
+        with self._lock:
+            if generation == self._generation:
+                self._data[key] = value
+                if self.maxsize and len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return value
+
+    def invalidate(self, key=_ALL):
+        with self._lock:
+            self._generation += 1
+            if key is _ALL:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+def cache_stats():
+    return {table: cache.stats() for table, cache in CACHES.items()}
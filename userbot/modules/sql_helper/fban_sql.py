@@ -1,5 +1,5 @@
 try:
-    from userbot.modules.sql_helper import BASE, SESSION
+    from userbot.modules.sql_helper import BASE, SESSION, delete, insert
 except ImportError:
     raise AttributeError
 
@@ -27,16 +27,11 @@ def get_flist():
 
 
 def add_flist(chat_id, fed_name):
-    adder = Fban(str(chat_id), fed_name)
-    SESSION.add(adder)
-    SESSION.commit()
+    insert(Fban.__table__, {"chat_id": str(chat_id), "fed_name": fed_name})
 
 
 def del_flist(chat_id):
-    rem = SESSION.query(Fban).get(str(chat_id))
-    if rem:
-        SESSION.delete(rem)
-        SESSION.commit()
+    delete(Fban.__table__, chat_id=str(chat_id))
 
 
 def del_flist_all():
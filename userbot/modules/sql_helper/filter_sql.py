@@ -1,9 +1,11 @@
 try:
-    from userbot.modules.sql_helper import BASE, SESSION
+    from userbot.modules.sql_helper import BASE, SESSION, delete, upsert
 except ImportError:
     raise AttributeError
 from sqlalchemy import Column, Numeric, String, UnicodeText
 
+from userbot.modules.sql_helper.cache import PER_CHAT_SIZE, TableCache
+
 
 class Filters(BASE):
     __tablename__ = "filters"
@@ -28,6 +30,8 @@ class Filters(BASE):
 
 Filters.__table__.create(checkfirst=True)
 
+FILTERS = TableCache("filters", PER_CHAT_SIZE)
+
 
 def get_filter(chat_id, keyword):
     try:
@@ -36,34 +40,38 @@ def get_filter(chat_id, keyword):
         SESSION.close()
 
 
-def get_filters(chat_id):
+def _get_filters(chat_id):
     try:
-        return SESSION.query(Filters).filter(Filters.chat_id == str(chat_id)).all()
+        return SESSION.query(Filters).filter(Filters.chat_id == chat_id).all()
     finally:
         SESSION.close()
 
 
+def get_filters(chat_id):
+    chat_id = str(chat_id)
+    return FILTERS.get(chat_id, lambda: _get_filters(chat_id))
+
+
 def add_filter(chat_id, keyword, reply, f_mesg_id):
-    to_check = get_filter(chat_id, keyword)
-    if not to_check:
-        adder = Filters(str(chat_id), keyword, reply, f_mesg_id)
-        SESSION.add(adder)
-        SESSION.commit()
-        return True
-    rem = SESSION.query(Filters).get((str(chat_id), keyword))
-    SESSION.delete(rem)
-    SESSION.commit()
-    adder = Filters(str(chat_id), keyword, reply, f_mesg_id)
-    SESSION.add(adder)
-    SESSION.commit()
-    return False
+    """ Saves a filter, returns True if it is new and False if it replaced
+        an existing one. """
+    chat_id = str(chat_id)
+    new = all(filt.keyword != keyword for filt in get_filters(chat_id))
+    upsert(
+        Filters.__table__,
+        {
+            "chat_id": chat_id,
+            "keyword": keyword,
+            "reply": reply,
+            "f_mesg_id": f_mesg_id,
+        },
+    )
+    FILTERS.invalidate(chat_id)
+    return new
 
 
 def remove_filter(chat_id, keyword):
-    to_check = get_filter(chat_id, keyword)
-    if not to_check:
-        return False
-    rem = SESSION.query(Filters).get((str(chat_id), keyword))
-    SESSION.delete(rem)
-    SESSION.commit()
-    return True
+    removed = delete(Filters.__table__, chat_id=str(chat_id), keyword=keyword)
+    if removed:
+        FILTERS.invalidate(str(chat_id))
+    return removed
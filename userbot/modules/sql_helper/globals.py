@@ -1,10 +1,12 @@
 try:
-    from userbot.modules.sql_helper import BASE, SESSION
+    from userbot.modules.sql_helper import BASE, SESSION, delete, upsert
 except ImportError:
     raise AttributeError
 
 from sqlalchemy import Column, String, UnicodeText
 
+from userbot.modules.sql_helper.cache import TableCache
+
 
 class Globals(BASE):
     __tablename__ = "globals"
@@ -18,34 +20,36 @@ class Globals(BASE):
 
 Globals.__table__.create(checkfirst=True)
 
+GLOBALS = TableCache("globals")
+
+
+def _gvarstatus(variable):
+    try:
+        row = SESSION.query(Globals).filter(Globals.variable == variable).first()
+        return row.value if row else None
+    finally:
+        SESSION.close()
+
 
 def gvarstatus(variable):
+    variable = str(variable)
     try:
-        return (
-            SESSION.query(Globals)
-            .filter(Globals.variable == str(variable))
-            .first()
-            .value
-        )
+        return GLOBALS.get(variable, lambda: _gvarstatus(variable))
     except BaseException:
         return None
-    finally:
-        SESSION.close()
 
 
 def addgvar(variable, value):
-    if SESSION.query(Globals).filter(Globals.variable == str(variable)).one_or_none():
-        delgvar(variable)
-    adder = Globals(str(variable), value)
-    SESSION.add(adder)
-    SESSION.commit()
+    # The primary key includes value, so the old value can't be replaced by
+    # ON CONFLICT and is deleted in the same transaction instead.
+    upsert(
+        Globals.__table__,
+        {"variable": str(variable), "value": value},
+        keys=("variable",),
+    )
+    GLOBALS.invalidate(str(variable))
 
 
 def delgvar(variable):
-    rem = (
-        SESSION.query(Globals)
-        .filter(Globals.variable == str(variable))
-        .delete(synchronize_session="fetch")
-    )
-    if rem:
-        SESSION.commit()
+    if delete(Globals.__table__, variable=str(variable)):
+        GLOBALS.invalidate(str(variable))
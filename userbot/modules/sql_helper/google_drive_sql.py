@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Text
+from sqlalchemy import BigInteger, Column, String, Text, UnicodeText
 
-from userbot.modules.sql_helper import BASE, SESSION
+from userbot.modules.sql_helper import BASE, SESSION, delete, upsert
 
 
 class GoogleDriveCreds(BASE):
@@ -12,18 +12,26 @@ class GoogleDriveCreds(BASE):
         self.user = user
 
 
-GoogleDriveCreds.__table__.create(checkfirst=True)
+class GoogleDriveUpload(BASE):
+    __tablename__ = "gdrive_uploads"
+    file_path = Column(UnicodeText, primary_key=True)
+    uri = Column(UnicodeText, nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    mtime = Column(BigInteger, nullable=False)
+    offset = Column(BigInteger, nullable=False)
+    parent_id = Column(String)
+    mime_type = Column(String)
 
+    def __init__(self, file_path):
+        self.file_path = file_path
 
-def save_credentials(user, credentials):
-    saved_credentials = SESSION.query(GoogleDriveCreds).get(user)
-    if not saved_credentials:
-        saved_credentials = GoogleDriveCreds(user)
 
-    saved_credentials.credentials = credentials
+GoogleDriveCreds.__table__.create(checkfirst=True)
+GoogleDriveUpload.__table__.create(checkfirst=True)
 
-    SESSION.add(saved_credentials)
-    SESSION.commit()
+
+def save_credentials(user, credentials):
+    upsert(GoogleDriveCreds.__table__, {"user": user, "credentials": credentials})
     return True
 
 
@@ -40,8 +48,39 @@ def get_credentials(user):
 
 
 def clear_credentials(user):
-    saved_credentials = SESSION.query(GoogleDriveCreds).get(user)
-    if saved_credentials:
-        SESSION.delete(saved_credentials)
-        SESSION.commit()
+    if delete(GoogleDriveCreds.__table__, user=user):
         return True
+
+
+def save_upload(file_path, uri, file_size, mtime, offset, parent_id, mime_type):
+    upsert(
+        GoogleDriveUpload.__table__,
+        {
+            "file_path": file_path,
+            "uri": uri,
+            "file_size": file_size,
+            "mtime": mtime,
+            "offset": offset,
+            "parent_id": parent_id,
+            "mime_type": mime_type,
+        },
+    )
+    return True
+
+
+def get_upload(file_path):
+    try:
+        return SESSION.query(GoogleDriveUpload).get(file_path)
+    finally:
+        SESSION.close()
+
+
+def get_uploads():
+    try:
+        return SESSION.query(GoogleDriveUpload).all()
+    finally:
+        SESSION.close()
+
+
+def clear_upload(file_path):
+    return delete(GoogleDriveUpload.__table__, file_path=file_path)
@@ -1,10 +1,13 @@
 try:
-    from userbot.modules.sql_helper import BASE, SESSION
+    from userbot.modules.sql_helper import BASE, SESSION, delete, upsert
 except ImportError:
     raise AttributeError
 
 from sqlalchemy import Column, String
 
+from userbot import DB_CACHE
+from userbot.modules.sql_helper.cache import TableCache
+
 
 class KRead(BASE):
     __tablename__ = "kread"
@@ -16,24 +19,47 @@ class KRead(BASE):
 
 KRead.__table__.create(checkfirst=True)
 
+KREAD = TableCache("kread")
 
-def is_kread():
+
+def _load_kread():
+    try:
+        return {int(row.groupid) for row in SESSION.query(KRead)}
+    finally:
+        SESSION.close()
+
+
+# Chat IDs checked by keep_read, kept in sync with the table.
+KREAD_CHATS = _load_kread()
+
+
+def is_chat_kread(chat_id):
+    if not DB_CACHE:
+        return chat_id in _load_kread()
+    return chat_id in KREAD_CHATS
+
+
+def _is_kread():
     try:
         return SESSION.query(KRead).all()
-    except BaseException:
-        return None
     finally:
         SESSION.close()
 
 
+def is_kread():
+    try:
+        return KREAD.get(None, _is_kread)
+    except BaseException:
+        return None
+
+
 def kread(chat):
-    adder = KRead(str(chat))
-    SESSION.add(adder)
-    SESSION.commit()
+    upsert(KRead.__table__, {"groupid": str(chat)})
+    KREAD.invalidate()
+    KREAD_CHATS.add(int(chat))
 
 
 def unkread(chat):
-    rem = SESSION.query(KRead).get(str(chat))
-    if rem:
-        SESSION.delete(rem)
-        SESSION.commit()
+    if delete(KRead.__table__, groupid=str(chat)):
+        KREAD.invalidate()
+        KREAD_CHATS.discard(int(chat))
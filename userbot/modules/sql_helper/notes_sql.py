@@ -1,9 +1,11 @@
 try:
-    from userbot.modules.sql_helper import BASE, SESSION
+    from userbot.modules.sql_helper import BASE, SESSION, delete, upsert
 except ImportError:
     raise AttributeError
 from sqlalchemy import Column, Numeric, String, UnicodeText
 
+from userbot.modules.sql_helper.cache import PER_CHAT_SIZE, TableCache
+
 
 class Notes(BASE):
     __tablename__ = "notes"
@@ -21,42 +23,52 @@ class Notes(BASE):
 
 Notes.__table__.create(checkfirst=True)
 
+NOTES = TableCache("notes", PER_CHAT_SIZE)
 
-def get_note(chat_id, keyword):
+
+def _get_notes(chat_id):
     try:
-        return SESSION.query(Notes).get((str(chat_id), keyword))
+        return {
+            note.keyword: note
+            for note in SESSION.query(Notes).filter(Notes.chat_id == chat_id)
+        }
     finally:
         SESSION.close()
 
 
+def _chat_notes(chat_id):
+    chat_id = str(chat_id)
+    return NOTES.get(chat_id, lambda: _get_notes(chat_id))
+
+
+def get_note(chat_id, keyword):
+    return _chat_notes(chat_id).get(keyword)
+
+
 def get_notes(chat_id):
-    try:
-        return SESSION.query(Notes).filter(Notes.chat_id == str(chat_id)).all()
-    finally:
-        SESSION.close()
+    return list(_chat_notes(chat_id).values())
 
 
 def add_note(chat_id, keyword, reply, f_mesg_id):
-    to_check = get_note(chat_id, keyword)
-    if not to_check:
-        adder = Notes(str(chat_id), keyword, reply, f_mesg_id)
-        SESSION.add(adder)
-        SESSION.commit()
-        return True
-    rem = SESSION.query(Notes).get((str(chat_id), keyword))
-    SESSION.delete(rem)
-    SESSION.commit()
-    adder = Notes(str(chat_id), keyword, reply, f_mesg_id)
-    SESSION.add(adder)
-    SESSION.commit()
-    return False
+    """ Saves a note, returns True if it is new and False if it replaced
+        an existing one. """
+    chat_id = str(chat_id)
+    new = get_note(chat_id, keyword) is None
+    upsert(
+        Notes.__table__,
+        {
+            "chat_id": chat_id,
+            "keyword": keyword,
+            "reply": reply,
+            "f_mesg_id": f_mesg_id,
+        },
+    )
+    NOTES.invalidate(chat_id)
+    return new
 
 
 def rm_note(chat_id, keyword):
-    to_check = get_note(chat_id, keyword)
-    if not to_check:
-        return False
-    rem = SESSION.query(Notes).get((str(chat_id), keyword))
-    SESSION.delete(rem)
-    SESSION.commit()
-    return True
+    removed = delete(Notes.__table__, chat_id=str(chat_id), keyword=keyword)
+    if removed:
+        NOTES.invalidate(str(chat_id))
+    return removed
@@ -1,9 +1,11 @@
 try:
-    from userbot.modules.sql_helper import BASE, SESSION
+    from userbot.modules.sql_helper import BASE, SESSION, delete, insert
 except ImportError:
     raise AttributeError
 from sqlalchemy import Column, String
 
+from userbot.modules.sql_helper.cache import PER_CHAT_SIZE, TableCache
+
 
 class PMPermit(BASE):
     __tablename__ = "pmpermit"
@@ -15,24 +17,29 @@ class PMPermit(BASE):
 
 PMPermit.__table__.create(checkfirst=True)
 
+APPROVED = TableCache("pmpermit", PER_CHAT_SIZE)
+
+
+def _is_approved(chat_id):
+    try:
+        return SESSION.query(PMPermit).get(chat_id)
+    finally:
+        SESSION.close()
+
 
 def is_approved(chat_id):
+    chat_id = str(chat_id)
     try:
-        return SESSION.query(PMPermit).filter(PMPermit.chat_id == str(chat_id)).one()
+        return APPROVED.get(chat_id, lambda: _is_approved(chat_id))
     except BaseException:
         return None
-    finally:
-        SESSION.close()
 
 
 def approve(chat_id):
-    adder = PMPermit(str(chat_id))
-    SESSION.add(adder)
-    SESSION.commit()
+    insert(PMPermit.__table__, {"chat_id": str(chat_id)})
+    APPROVED.invalidate(str(chat_id))
 
 
 def dissprove(chat_id):
-    rem = SESSION.query(PMPermit).get(str(chat_id))
-    if rem:
-        SESSION.delete(rem)
-        SESSION.commit()
+    if delete(PMPermit.__table__, chat_id=str(chat_id)):
+        APPROVED.invalidate(str(chat_id))
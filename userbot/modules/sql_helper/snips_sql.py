@@ -1,10 +1,12 @@
 try:
-    from userbot.modules.sql_helper import BASE, SESSION
+    from userbot.modules.sql_helper import BASE, SESSION, delete, upsert
 except ImportError:
     raise AttributeError
 
 from sqlalchemy import Column, Numeric, UnicodeText
 
+from userbot.modules.sql_helper.cache import TableCache
+
 
 class Snips(BASE):
     __tablename__ = "snips"
@@ -20,42 +22,37 @@ class Snips(BASE):
 
 Snips.__table__.create(checkfirst=True)
 
+SNIPS = TableCache("snips")
 
-def get_snip(keyword):
+
+def _get_snips():
     try:
-        return SESSION.query(Snips).get(keyword)
+        return {snip.snip: snip for snip in SESSION.query(Snips)}
     finally:
         SESSION.close()
 
 
+def get_snip(keyword):
+    return SNIPS.get(None, _get_snips).get(keyword)
+
+
 def get_snips():
-    try:
-        return SESSION.query(Snips).all()
-    finally:
-        SESSION.close()
+    return list(SNIPS.get(None, _get_snips).values())
 
 
 def add_snip(keyword, reply, f_mesg_id):
-    to_check = get_snip(keyword)
-    if not to_check:
-        adder = Snips(keyword, reply, f_mesg_id)
-        SESSION.add(adder)
-        SESSION.commit()
-        return True
-    rem = SESSION.query(Snips).filter(Snips.snip == keyword)
-    SESSION.delete(rem)
-    SESSION.commit()
-    adder = Snips(keyword, reply, f_mesg_id)
-    SESSION.add(adder)
-    SESSION.commit()
-    return False
+    """ Saves a snip, returns True if it is new and False if it replaced
+        an existing one. """
+    new = get_snip(keyword) is None
+    upsert(
+        Snips.__table__, {"snip": keyword, "reply": reply, "f_mesg_id": f_mesg_id}
+    )
+    SNIPS.invalidate()
+    return new
 
 
 def remove_snip(keyword):
-    to_check = get_snip(keyword)
-    if not to_check:
-        return False
-    rem = SESSION.query(Snips).filter(Snips.snip == keyword)
-    rem.delete()
-    SESSION.commit()
-    return True
+    removed = delete(Snips.__table__, snip=keyword)
+    if removed:
+        SNIPS.invalidate()
+    return removed
@@ -1,10 +1,13 @@
 try:
-    from userbot.modules.sql_helper import BASE, SESSION
+    from userbot.modules.sql_helper import BASE, SESSION, delete, upsert
 except ImportError:
     raise AttributeError
 
 from sqlalchemy import Column, String
 
+from userbot import DB_CACHE
+from userbot.modules.sql_helper.cache import PER_CHAT_SIZE, TableCache
+
 
 class Mute(BASE):
     __tablename__ = "muted"
@@ -18,24 +21,48 @@ class Mute(BASE):
 
 Mute.__table__.create(checkfirst=True)
 
+MUTED = TableCache("muted", PER_CHAT_SIZE)
+
+
+def _load_muted():
+    try:
+        return {(int(row.chat_id), int(row.sender)) for row in SESSION.query(Mute)}
+    finally:
+        SESSION.close()
+
+
+# (chat_id, sender_id) pairs checked by muter, kept in sync with the table.
+MUTED_USERS = _load_muted()
+
+
+def is_user_muted(chat_id, sender_id):
+    if not DB_CACHE:
+        return (chat_id, sender_id) in _load_muted()
+    return (chat_id, sender_id) in MUTED_USERS
+
+
+def _is_muted(chat_id):
+    try:
+        return SESSION.query(Mute).filter(Mute.chat_id == chat_id).all()
+    finally:
+        SESSION.close()
+
 
 def is_muted(chat_id):
+    chat_id = str(chat_id)
     try:
-        return SESSION.query(Mute).filter(Mute.chat_id == str(chat_id)).all()
+        return MUTED.get(chat_id, lambda: _is_muted(chat_id))
     except BaseException:
         return None
-    finally:
-        SESSION.close()
 
 
 def mute(chat_id, sender):
-    adder = Mute(str(chat_id), str(sender))
-    SESSION.add(adder)
-    SESSION.commit()
+    upsert(Mute.__table__, {"chat_id": str(chat_id), "sender": str(sender)})
+    MUTED.invalidate(str(chat_id))
+    MUTED_USERS.add((int(chat_id), int(sender)))
 
 
 def unmute(chat_id, sender):
-    rem = SESSION.query(Mute).get(((str(chat_id)), (str(sender))))
-    if rem:
-        SESSION.delete(rem)
-        SESSION.commit()
+    if delete(Mute.__table__, chat_id=str(chat_id), sender=str(sender)):
+        MUTED.invalidate(str(chat_id))
+        MUTED_USERS.discard((int(chat_id), int(sender)))
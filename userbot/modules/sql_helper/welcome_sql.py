@@ -1,9 +1,11 @@
 try:
-    from userbot.modules.sql_helper import BASE, SESSION
+    from userbot.modules.sql_helper import BASE, SESSION, STATEMENTS, delete, upsert
 except ImportError:
     raise AttributeError
 
-from sqlalchemy import BigInteger, Column, Numeric, String, UnicodeText
+from sqlalchemy import BigInteger, Column, Numeric, String, UnicodeText, bindparam
+
+from userbot.modules.sql_helper.cache import PER_CHAT_SIZE, TableCache
 
 
 class Welcome(BASE):
@@ -22,50 +24,65 @@ class Welcome(BASE):
 
 Welcome.__table__.create(checkfirst=True)
 
+WELCOMES = TableCache("welcome", PER_CHAT_SIZE)
 
-def get_welcome(chat_id):
+_UPDATE_PREVIOUS = (
+    Welcome.__table__.update()
+    .where(Welcome.chat_id == bindparam("chat"))
+    .values(previous_welcome=bindparam("previous_welcome"))
+)
+
+
+def _get_welcome(chat_id):
     try:
-        return SESSION.query(Welcome).get(str(chat_id))
+        return SESSION.query(Welcome).get(chat_id)
     finally:
         SESSION.close()
 
 
+def get_welcome(chat_id):
+    chat_id = str(chat_id)
+    return WELCOMES.get(chat_id, lambda: _get_welcome(chat_id))
+
+
 def get_current_welcome_settings(chat_id):
     try:
-        return SESSION.query(Welcome).filter(Welcome.chat_id == str(chat_id)).one()
+        return get_welcome(chat_id)
     except BaseException:
         return None
-    finally:
-        SESSION.close()
 
 
 def add_welcome_setting(chat_id, previous_welcome, reply, f_mesg_id):
-    to_check = get_welcome(chat_id)
-    if not to_check:
-        adder = Welcome(chat_id, previous_welcome, reply, f_mesg_id)
-        SESSION.add(adder)
-        SESSION.commit()
-        return True
-    rem = SESSION.query(Welcome).get(str(chat_id))
-    SESSION.delete(rem)
-    SESSION.commit()
-    adder = Welcome(chat_id, previous_welcome, reply, f_mesg_id)
-    SESSION.commit()
-    return False
+    """ Saves the welcome of a chat, returns True if it had none and False
+        if it replaced the previous one. """
+    chat_id = str(chat_id)
+    new = get_welcome(chat_id) is None
+    upsert(
+        Welcome.__table__,
+        {
+            "chat_id": chat_id,
+            "previous_welcome": previous_welcome,
+            "reply": reply,
+            "f_mesg_id": f_mesg_id,
+        },
+    )
+    WELCOMES.invalidate(chat_id)
+    return new
 
 
 def rm_welcome_setting(chat_id):
     try:
-        rem = SESSION.query(Welcome).get(str(chat_id))
-        if rem:
-            SESSION.delete(rem)
-            SESSION.commit()
-            return True
+        removed = delete(Welcome.__table__, chat_id=str(chat_id))
     except BaseException:
         return False
+    if removed:
+        WELCOMES.invalidate(str(chat_id))
+        return True
 
 
 def update_previous_welcome(chat_id, previous_welcome):
-    row = SESSION.query(Welcome).get(str(chat_id))
-    row.previous_welcome = previous_welcome
-    SESSION.commit()
+    with STATEMENTS.begin() as conn:
+        conn.execute(
+            _UPDATE_PREVIOUS, chat=str(chat_id), previous_welcome=previous_welcome
+        )
+    WELCOMES.invalidate(str(chat_id))
@@ -8,10 +8,8 @@
 import io
 import math
 import random
-import urllib.request
 from os import remove
 
-import requests
 from bs4 import BeautifulSoup as bs
 from PIL import Image
 from telethon.tl.functions.messages import GetStickerSetRequest
@@ -24,6 +22,7 @@ from telethon.tl.types import (
 
 from userbot import CMD_HELP, bot
 from userbot.events import register
+from userbot.utils import http_get
 
 KANGING_STR = [
     "Usando alquimia para clonar esse sticker...",
@@ -117,10 +116,8 @@ async def kang(args):
             packnick += " (Animated)"
             cmd = "/newanimated"
 
-        response = urllib.request.urlopen(
-            urllib.request.Request(f"http://t.me/addstickers/{packname}")
-        )
-        htmlstr = response.read().decode("utf8").split("\n")
+        response = await http_get(f"http://t.me/addstickers/{packname}")
+        htmlstr = response.content.decode("utf8").split("\n")
 
         if (
             "  A <strong>Telegram</strong> user has created the <strong>Sticker&nbsp;Set</strong>."
@@ -359,7 +356,7 @@ async def cb_sticker(event):
     if not query:
         return await event.edit("**Passe uma consulta para pesquisar!**")
     await event.edit("**Procurando pacote de stickers...**")
-    text = requests.get("https://combot.org/telegram/stickers?q=" + query).text
+    text = (await http_get("https://combot.org/telegram/stickers?q=" + query)).text
     soup = bs(text, "lxml")
     results = soup.find_all("div", {"class": "sticker-pack__header"})
     if not results:
@@ -4,17 +4,16 @@
 import json
 import os
 
-import requests
-
 from userbot import CMD_HELP, TEMP_DOWNLOAD_DIRECTORY
 from userbot.events import register
+from userbot.utils import http_get
 
 
 @register(outgoing=True, pattern=r"^\.ts(?: |$)(.*)")
 async def torrent(event):
     await event.edit("**Procurando...**")
     query = event.pattern_match.group(1)
-    response = requests.get(f"https://api.sumanjay.cf/torrent/?query={query}")
+    response = await http_get(f"https://api.sumanjay.cf/torrent/?query={query}")
     try:
         ts = json.loads(response.text)
     except json.decoder.JSONDecodeError:
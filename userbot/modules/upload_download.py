@@ -9,23 +9,18 @@
 """ Userbot module which contains everything related to
      downloading/uploading from/to the server. """
 
-import asyncio
-import math
 import os
-import time
 from datetime import datetime
 from urllib.parse import unquote_plus
 
-from hachoir.metadata import extractMetadata
-from hachoir.parser import createParser
-from pySmartDL import SmartDL
-from requests import get
-from telethon.tl.types import DocumentAttributeAudio, DocumentAttributeVideo
+import aiohttp
 
 from userbot import CMD_HELP, LOGS, TEMP_DOWNLOAD_DIRECTORY
 from userbot.events import register
-from userbot.utils import humanbytes, progress, run_cmd
+from userbot.utils import track_progress
+from userbot.utils.downloader import download_url
 from userbot.utils.FastTelethon import download_file, upload_file
+from userbot.utils.media import forget_media, media_info, probe_media
 
 
 @register(pattern=r"\.download(?: |$)(.*)", outgoing=True)
@@ -49,50 +44,19 @@ async def download(target_file):
                 if not os.path.isdir(os.path.join(TEMP_DOWNLOAD_DIRECTORY, head)):
                     os.makedirs(os.path.join(TEMP_DOWNLOAD_DIRECTORY, head))
                     file_name = os.path.join(head, tail)
+        downloaded_file_name = TEMP_DOWNLOAD_DIRECTORY + "" + file_name
         try:
-            url = get(url).url
-        except BaseException:
+            async with track_progress(target_file, "URL - Download", file_name) as prog:
+                await download_url(url, downloaded_file_name, prog.update)
+        except (aiohttp.InvalidURL, ValueError):
             return await target_file.edit("**Este não é um link válido.**")
-        downloaded_file_name = TEMP_DOWNLOAD_DIRECTORY + "" + file_name
-        downloader = SmartDL(url, downloaded_file_name, progress_bar=False)
-        downloader.start(blocking=False)
-        c_time = time.time()
-        display_message = None
-        while not downloader.isFinished():
-            status = downloader.get_status().capitalize()
-            total_length = downloader.filesize or None
-            downloaded = downloader.get_dl_size()
-            now = time.time()
-            diff = now - c_time
-            percentage = downloader.get_progress() * 100
-            speed = downloader.get_speed()
-            progress_str = "[{}{}] `{}%`".format(
-                "".join("●" for _ in range(math.floor(percentage / 10))),
-                "".join("○" for _ in range(10 - math.floor(percentage / 10))),
-                round(percentage, 2),
-            )
-
-            estimated_total_time = downloader.get_eta(human=True)
-            try:
-                current_message = (
-                    f"**Nome:** `{file_name}`\n"
-                    f"\n**{status}...** | {progress_str}"
-                    f"\n{humanbytes(downloaded)} de {humanbytes(total_length)}"
-                    f" @ {humanbytes(speed)}"
-                    f"\n**Tempo Estimado:** {estimated_total_time}"
-                )
-
-                if round(diff % 15.00) == 0 and current_message != display_message:
-                    await target_file.edit(current_message)
-                    display_message = current_message
-            except Exception as e:
-                LOGS.info(str(e))
-        if downloader.isSuccessful():
+        except Exception as e:
+            LOGS.info(str(e))
+            await target_file.edit(f"**URL incorreto**\n{url}")
+        else:
             await target_file.edit(
                 f"**Baixado para** `{downloaded_file_name}` **com sucesso!**"
             )
-        else:
-            await target_file.edit(f"**URL incorreto**\n{url}")
     elif replied:
         if not replied.media:
             return await target_file.edit("**Responda a mídia ou arquivo.**")
@@ -112,24 +76,17 @@ async def download(target_file):
                             "video_" + datetime.now().isoformat("_", "seconds") + ".mp4"
                         )
                 outdir = TEMP_DOWNLOAD_DIRECTORY + filename
-                c_time = time.time()
                 start_time = datetime.now()
-                with open(outdir, "wb") as f:
-                    result = await download_file(
-                        client=target_file.client,
-                        location=file,
-                        out=f,
-                        progress_callback=lambda d, t: asyncio.get_event_loop().create_task(
-                            progress(
-                                d,
-                                t,
-                                target_file,
-                                c_time,
-                                "Telegram - Download",
-                                input_str,
-                            )
-                        ),
-                    )
+                async with track_progress(
+                    target_file, "Telegram - Download", filename
+                ) as prog:
+                    with open(outdir, "wb") as f:
+                        result = await download_file(
+                            client=target_file.client,
+                            location=file,
+                            out=f,
+                            progress_callback=prog.update,
+                        )
             else:
                 start_time = datetime.now()
                 result = await target_file.client.download_media(
@@ -151,89 +108,38 @@ async def download(target_file):
         await target_file.edit("**Veja** `.help download` **para mais informações.**")
 
 
-async def get_video_thumb(file, output):
-    """ Get video thumbnail """
-    command = ["ffmpeg", "-i", file, "-ss", "00:00:01.000", "-vframes", "1", output]
-    t_resp, e_resp = await run_cmd(command)
-    if os.path.lexists(output):
-        return output
-    LOGS.info(t_resp)
-    LOGS.info(e_resp)
-    return None
-
-
 @register(pattern=r"^\.upload (.*)", outgoing=True)
 async def upload(event):
     await event.edit("**Processando...**")
     input_str = event.pattern_match.group(1)
     if os.path.exists(input_str):
         if os.path.isfile(input_str):
-            c_time = time.time()
             start_time = datetime.now()
             file_name = os.path.basename(input_str)
-            thumb = None
-            attributes = []
-            with open(input_str, "rb") as f:
-                result = await upload_file(
-                    client=event.client,
-                    file=f,
-                    name=file_name,
-                    progress_callback=lambda d, t: asyncio.get_event_loop().create_task(
-                        progress(d, t, event, c_time, "Telegram - Upload", input_str)
-                    ),
-                )
-            up_time = (datetime.now() - start_time).seconds
-            if input_str.lower().endswith(("mp4", "mkv", "webm")):
-                thumb = await get_video_thumb(input_str, "thumb_image.jpg")
-                metadata = extractMetadata(createParser(input_str))
-                duration = 0
-                width = 0
-                height = 0
-                if metadata.has("duration"):
-                    duration = metadata.get("duration").seconds
-                if metadata.has("width"):
-                    width = metadata.get("width")
-                if metadata.has("height"):
-                    height = metadata.get("height")
-                attributes = [
-                    DocumentAttributeVideo(
-                        duration=duration,
-                        w=width,
-                        h=height,
-                        round_message=False,
-                        supports_streaming=True,
-                    )
-                ]
-            elif input_str.lower().endswith(("mp3", "flac", "wav")):
-                metadata = extractMetadata(createParser(input_str))
-                duration = 0
-                artist = ""
-                title = ""
-                if metadata.has("duration"):
-                    duration = metadata.get("duration").seconds
-                if metadata.has("title"):
-                    title = metadata.get("title")
-                if metadata.has("artist"):
-                    artist = metadata.get("artist")
-                attributes = [
-                    DocumentAttributeAudio(
-                        duration=duration,
-                        title=title,
-                        performer=artist,
+            probe_media(input_str)
+            async with track_progress(event, "Telegram - Upload", file_name) as prog:
+                with open(input_str, "rb") as f:
+                    result = await upload_file(
+                        client=event.client,
+                        file=f,
+                        name=file_name,
+                        progress_callback=prog.update,
                     )
-                ]
-            await event.client.send_file(
-                event.chat_id,
-                result,
-                thumb=thumb,
-                caption=file_name,
-                force_document=False,
-                allow_cache=False,
-                reply_to=event.message.id,
-                attributes=attributes,
-            )
-            if thumb is not None:
-                os.remove(thumb)
+            up_time = (datetime.now() - start_time).seconds
+            info = await media_info(input_str)
+            try:
+                await event.client.send_file(
+                    event.chat_id,
+                    result,
+                    thumb=info.thumb,
+                    caption=file_name,
+                    force_document=False,
+                    allow_cache=False,
+                    reply_to=event.message.id,
+                    attributes=info.attributes,
+                )
+            finally:
+                forget_media(input_str)
             await event.edit(f"**Enviado com sucesso em {up_time} segundos.**")
         elif os.path.isdir(input_str):
             start_time = datetime.now()
@@ -244,10 +150,13 @@ async def upload(event):
             if not lst_files:
                 return await event.edit(f"`{input_str}` **está vazia.**")
             await event.edit(f"**Achados** `{len(lst_files)}` **arquivos. Enviando...**")
-            for files in sorted(lst_files):
+            lst_files.sort()
+            for index, files in enumerate(lst_files):
                 file_name = os.path.basename(files)
-                thumb = None
-                attributes = []
+                # Probe the next file while this one is sent.
+                probe_media(files)
+                if index + 1 < len(lst_files):
+                    probe_media(lst_files[index + 1])
                 msg = await event.reply(f"**Enviando** `{files}`**...**")
                 with open(files, "rb") as f:
                     result = await upload_file(
@@ -255,57 +164,20 @@ async def upload(event):
                         file=f,
                         name=file_name,
                     )
-                if file_name.lower().endswith(("mp4", "mkv", "webm")):
-                    thumb = await get_video_thumb(files, "thumb_image.jpg")
-                    metadata = extractMetadata(createParser(files))
-                    duration = 0
-                    width = 0
-                    height = 0
-                    if metadata.has("duration"):
-                        duration = metadata.get("duration").seconds
-                    if metadata.has("width"):
-                        width = metadata.get("width")
-                    if metadata.has("height"):
-                        height = metadata.get("height")
-                    attributes = [
-                        DocumentAttributeVideo(
-                            duration=duration,
-                            w=width,
-                            h=height,
-                            round_message=False,
-                            supports_streaming=True,
-                        )
-                    ]
-                elif file_name.lower().endswith(("mp3", "flac", "wav")):
-                    metadata = extractMetadata(createParser(files))
-                    duration = 0
-                    title = ""
-                    artist = ""
-                    if metadata.has("duration"):
-                        duration = metadata.get("duration").seconds
-                    if metadata.has("title"):
-                        title = metadata.get("title")
-                    if metadata.has("artist"):
-                        artist = metadata.get("artist")
-                    attributes = [
-                        DocumentAttributeAudio(
-                            duration=duration,
-                            title=title,
-                            performer=artist,
-                        )
-                    ]
-                await event.client.send_file(
-                    event.chat_id,
-                    result,
-                    thumb=thumb,
-                    caption=file_name,
-                    force_document=False,
-                    allow_cache=False,
-                    attributes=attributes,
-                )
+                info = await media_info(files)
+                try:
+                    await event.client.send_file(
+                        event.chat_id,
+                        result,
+                        thumb=info.thumb,
+                        caption=file_name,
+                        force_document=False,
+                        allow_cache=False,
+                        attributes=info.attributes,
+                    )
+                finally:
+                    forget_media(files)
                 await msg.delete()
-                if thumb is not None:
-                    os.remove(thumb)
 
             await event.delete()
             up_time = (datetime.now() - start_time).seconds
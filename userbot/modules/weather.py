@@ -11,12 +11,12 @@ from datetime import datetime
 from pytz import country_names as c_n
 from pytz import country_timezones as c_tz
 from pytz import timezone as tz
-from requests import get
 
 from userbot import CMD_HELP
 from userbot import OPEN_WEATHER_MAP_APPID as OWM_API
 from userbot import WEATHER_DEFCITY
 from userbot.events import register
+from userbot.utils import http_get
 
 # ===== CONSTANT =====
 DEFCITY = WEATHER_DEFCITY or None
@@ -81,10 +81,10 @@ async def get_weather(weather):
             CITY = newcity[0].strip() + "," + countrycode.strip()
 
     url = f"https://api.openweathermap.org/data/2.5/weather?q={CITY}&appid={APPID}"
-    request = get(url)
+    request = await http_get(url)
     result = json.loads(request.text)
 
-    if request.status_code != 200:
+    if request.status != 200:
         return await weather.edit("**País inválido.**")
 
     cityname = result["name"]
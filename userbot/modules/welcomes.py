@@ -1,19 +1,21 @@
 from telethon.events import ChatAction
 
 from userbot import BOTLOG_CHATID, CLEAN_WELCOME, CMD_HELP, LOGS, bot
-from userbot.events import register
+from userbot.events import SELF_USER, register
+from userbot.utils import send_saved_message
 
 
 @bot.on(ChatAction)
 async def welcome_to_chat(event):
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.welcome_sql import (
             get_current_welcome_settings,
             update_previous_welcome,
         )
     except AttributeError:
         return
-    cws = get_current_welcome_settings(event.chat_id)
+    cws = await run_sql(get_current_welcome_settings, event.chat_id)
     if cws:
         """user_added=True,
         user_joined=True,
@@ -29,7 +31,7 @@ async def welcome_to_chat(event):
                     LOGS.warning(str(e))
             a_user = await event.get_user()
             chat = await event.get_chat()
-            me = await event.client.get_me()
+            me = await SELF_USER.get(event.client)
 
             title = chat.title or "este chat"
             participants = await event.client.get_participants(chat)
@@ -45,41 +47,43 @@ async def welcome_to_chat(event):
             my_last = me.last_name
             my_fullname = f"{my_first} {my_last}" if my_last else my_first
             my_username = f"@{me.username}" if me.username else my_mention
-            file_media = None
-            current_saved_welcome_message = None
-            if cws:
-                if cws.f_mesg_id:
-                    msg_o = await event.client.get_messages(
-                        entity=BOTLOG_CHATID, ids=int(cws.f_mesg_id)
-                    )
-                    file_media = msg_o.media
-                    current_saved_welcome_message = msg_o.message
-                elif cws.reply:
-                    current_saved_welcome_message = cws.reply
-            current_message = await event.reply(
-                current_saved_welcome_message.format(
-                    mention=mention,
-                    title=title,
-                    count=count,
-                    first=first,
-                    last=last,
-                    fullname=fullname,
-                    username=username,
-                    userid=userid,
-                    my_first=my_first,
-                    my_last=my_last,
-                    my_fullname=my_fullname,
-                    my_username=my_username,
-                    my_mention=my_mention,
-                ),
-                file=file_media,
-            )
-            update_previous_welcome(event.chat_id, current_message.id)
+
+            def send_welcome(current_saved_welcome_message, file_media):
+                return event.reply(
+                    current_saved_welcome_message.format(
+                        mention=mention,
+                        title=title,
+                        count=count,
+                        first=first,
+                        last=last,
+                        fullname=fullname,
+                        username=username,
+                        userid=userid,
+                        my_first=my_first,
+                        my_last=my_last,
+                        my_fullname=my_fullname,
+                        my_username=my_username,
+                        my_mention=my_mention,
+                    ),
+                    file=file_media,
+                )
+
+            if cws.f_mesg_id:
+                current_message = await send_saved_message(
+                    event.client, cws.f_mesg_id, send_welcome
+                )
+            else:
+                current_message = await send_welcome(cws.reply, None)
+            if current_message:
+                await run_sql(
+                    update_previous_welcome, event.chat_id, current_message.id
+                )
 
 
 @register(outgoing=True, pattern=r"^\.setwelcome(?: |$)(.*)")
 async def save_welcome(event):
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.welcome_sql import add_welcome_setting
     except AttributeError:
         return await event.edit("**Executando em modo não SQL!**")
@@ -106,7 +110,7 @@ async def save_welcome(event):
         rep_msg = await event.get_reply_message()
         string = rep_msg.text
     success = "**Nota de boas vindas {} para este chat.**"
-    if add_welcome_setting(event.chat_id, 0, string, msg_id) is True:
+    if await run_sql(add_welcome_setting, event.chat_id, 0, string, msg_id) is True:
         await event.edit(success.format("salva"))
     else:
         await event.edit(success.format("atualizada"))
@@ -115,20 +119,22 @@ async def save_welcome(event):
 @register(outgoing=True, pattern=r"^\.checkwelcome$")
 async def show_welcome(event):
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.welcome_sql import get_current_welcome_settings
     except AttributeError:
         return await event.edit("**Executando em modo não SQL!**")
-    cws = get_current_welcome_settings(event.chat_id)
+    cws = await run_sql(get_current_welcome_settings, event.chat_id)
     if not cws:
         return await event.edit("**Nenhuma mensagem de boas-vindas salva aqui.**")
     if cws.f_mesg_id:
-        msg_o = await event.client.get_messages(
-            entity=BOTLOG_CHATID, ids=int(cws.f_mesg_id)
-        )
         await event.edit(
             "**No momento, estou dando as boas-vindas a novos usuários com esta nota de boas-vindas.**"
         )
-        await event.reply(msg_o.message, file=msg_o.media)
+        await send_saved_message(
+            event.client,
+            cws.f_mesg_id,
+            lambda text, media: event.reply(text, file=media),
+        )
     elif cws.reply:
         await event.edit(
             "**No momento, estou dando as boas-vindas a novos usuários com esta nota de boas-vindas.**"
@@ -139,10 +145,11 @@ async def show_welcome(event):
 @register(outgoing=True, pattern=r"^\.rmwelcome$")
 async def del_welcome(event):
     try:
+        from userbot.modules.sql_helper import run_sql
         from userbot.modules.sql_helper.welcome_sql import rm_welcome_setting
     except AttributeError:
         return await event.edit("**Executando em modo não SQL!**")
-    if rm_welcome_setting(event.chat_id) is True:
+    if await run_sql(rm_welcome_setting, event.chat_id) is True:
         await event.edit("**Nota de boas-vindas excluída deste bate-papo.**")
     else:
         await event.edit("**Não acho que eu tenha uma nota de boas-vindas aqui?**")
@@ -7,13 +7,20 @@
 
 import asyncio
 import os
-import time
-import zipfile
+import shutil
 from datetime import date
 
-from userbot import CMD_HELP, TEMP_DOWNLOAD_DIRECTORY, ZIP_DOWNLOAD_DIRECTORY, bot
+from userbot import (
+    CMD_HELP,
+    TEMP_DOWNLOAD_DIRECTORY,
+    ZIP_COMPRESSION_LEVEL,
+    ZIP_DOWNLOAD_DIRECTORY,
+    bot,
+)
 from userbot.events import register
-from userbot.utils import progress
+from userbot.utils import track_progress
+from userbot.utils.archive import ArchiveWriter, is_compressed
+from userbot.utils.FastTelethon import stream_file, upload_file
 
 # ====================
 today = date.today()
@@ -34,37 +41,44 @@ async def _(event):
     mone = await event.edit("**Processando...**")
     if not os.path.isdir(TEMP_DOWNLOAD_DIRECTORY):
         os.makedirs(TEMP_DOWNLOAD_DIRECTORY)
-    if event.reply_to_msg_id:
-        reply_message = await event.get_reply_message()
-        try:
-            c_time = time.time()
-            downloaded_file_name = await bot.download_media(
-                reply_message,
-                TEMP_DOWNLOAD_DIRECTORY,
-                progress_callback=lambda d, t: asyncio.get_event_loop().create_task(
-                    progress(d, t, mone, c_time, "Zip - Download")
-                ),
-            )
-            directory_name = downloaded_file_name
-            await event.edit(
-                f"Baixado para `{directory_name}`" "\nCompactando arquivo..."
-            )
-        except Exception as e:  # pylint:disable=C0103,W0703
-            await mone.edit(str(e))
-    zipfile.ZipFile(directory_name + ".zip", "w", zipfile.ZIP_DEFLATED).write(
-        directory_name
-    )
-    c_time = time.time()
-    await bot.send_file(
-        event.chat_id,
-        directory_name + ".zip",
-        force_document=True,
-        allow_cache=False,
-        reply_to=event.message.id,
-        progress_callback=lambda d, t: asyncio.get_event_loop().create_task(
-            progress(d, t, mone, c_time, "Zip - Upload")
-        ),
-    )
+    reply_message = await event.get_reply_message()
+    media = reply_message.file
+    if media is None:
+        await event.edit("**Responda a um arquivo para compactá-lo.**")
+        return
+    file_name = media.name or f"arquivo{media.ext or ''}"
+    archive_name = file_name + ".zip"
+    archive_path = os.path.join(TEMP_DOWNLOAD_DIRECTORY, archive_name)
+    # The file goes straight from the download into the archive, only the
+    # archive is written to disk.
+    try:
+        async with track_progress(mone, "Zip - Compactando", file_name) as prog:
+            if reply_message.document:
+                chunks = stream_file(bot, reply_message.document, prog.update)
+            else:
+                chunks = bot.iter_download(reply_message.media)
+            async with ArchiveWriter(archive_path, ZIP_COMPRESSION_LEVEL) as archive:
+                await archive.add_stream(
+                    file_name, chunks, store=is_compressed(file_name, media.mime_type)
+                )
+        async with track_progress(mone, "Zip - Upload", archive_name) as prog:
+            with open(archive_path, "rb") as f:
+                result = await upload_file(
+                    client=bot, file=f, name=archive_name, progress_callback=prog.update
+                )
+        await bot.send_file(
+            event.chat_id,
+            result,
+            force_document=True,
+            allow_cache=False,
+            reply_to=event.message.id,
+        )
+    except Exception as e:  # pylint:disable=C0103,W0703
+        await mone.edit(str(e))
+        return
+    finally:
+        if os.path.exists(archive_path):
+            os.remove(archive_path)
     await event.edit("**Feito!**")
     await asyncio.sleep(7)
     await event.delete()
@@ -88,14 +102,12 @@ async def addzip(add):
     if add.reply_to_msg_id:
         reply_message = await add.get_reply_message()
         try:
-            c_time = time.time()
-            downloaded_file_name = await bot.download_media(
-                reply_message,
-                ZIP_DOWNLOAD_DIRECTORY,
-                progress_callback=lambda d, t: asyncio.get_event_loop().create_task(
-                    progress(d, t, mone, c_time, "Zip - Download")
-                ),
-            )
+            async with track_progress(mone, "Zip - Download") as prog:
+                downloaded_file_name = await bot.download_media(
+                    reply_message,
+                    ZIP_DOWNLOAD_DIRECTORY,
+                    progress_callback=prog.update,
+                )
             success = str(downloaded_file_name).replace("./zips/", "")
             await add.edit(f"`{success}` adicionado com sucesso à lista.")
         except Exception as e:  # pylint:disable=C0103,W0703
@@ -112,21 +124,27 @@ async def upload_zip(up):
     input_str = up.pattern_match.group(1)
     curdate = today.strftime("%m%d%y")
     title = str(input_str) if input_str else "zipfile" + f"{curdate}"
-    zipf = zipfile.ZipFile(title + ".zip", "w", zipfile.ZIP_DEFLATED)
-    zipdir(ZIP_DOWNLOAD_DIRECTORY, zipf)
-    zipf.close()
-    c_time = time.time()
-    await bot.send_file(
-        up.chat_id,
-        title + ".zip",
-        force_document=True,
-        allow_cache=False,
-        reply_to=up.message.id,
-        progress_callback=lambda d, t: asyncio.get_event_loop().create_task(
-            progress(d, t, mone, c_time, "Zip - Upload", input_str)
-        ),
-    )
-    os.rmdir(ZIP_DOWNLOAD_DIRECTORY)
+    archive_name = title + ".zip"
+    try:
+        async with ArchiveWriter(archive_name, ZIP_COMPRESSION_LEVEL) as archive:
+            await zipdir(ZIP_DOWNLOAD_DIRECTORY, archive)
+        async with track_progress(mone, "Zip - Upload", archive_name) as prog:
+            with open(archive_name, "rb") as f:
+                result = await upload_file(
+                    client=bot, file=f, name=archive_name, progress_callback=prog.update
+                )
+        await bot.send_file(
+            up.chat_id,
+            result,
+            force_document=True,
+            allow_cache=False,
+            reply_to=up.message.id,
+        )
+    finally:
+        if os.path.exists(archive_name):
+            os.remove(archive_name)
+    # The files are kept until the archive is sent.
+    shutil.rmtree(ZIP_DOWNLOAD_DIRECTORY)
     await up.delete()
 
 
@@ -139,12 +157,11 @@ async def remove_dir(rm):
     await rm.edit("**Lista zip removida.**")
 
 
-def zipdir(path, ziph):
-    # ziph is zipfile handle
+async def zipdir(path, archive):
     for root, _, files in os.walk(path):
         for file in files:
-            ziph.write(os.path.join(root, file))
-            os.remove(os.path.join(root, file))
+            file_path = os.path.join(root, file)
+            await archive.add_file(file_path, file_path, store=is_compressed(file))
 
 
 CMD_HELP.update(
@@ -0,0 +1,135 @@
+# Copyright (C) 2019 The Raphielscape Company LLC.
+#
+# Licensed under the Raphielscape Public License, Version 1.c (the "License");
+# you may not use this file except in compliance with the License.
+#
+""" Userbot startup.
+ Connects once and runs the startup checks concurrently on that
+ connection, timing every phase. """
+
+import asyncio
+import sys
+from platform import python_version
+from time import perf_counter
+
+from telethon import version
+from telethon.errors.rpcerrorlist import PhoneNumberInvalidError
+
+from userbot import (
+    ALIVE_NAME,
+    BOTLOG,
+    BOTLOG_CHATID,
+    LBOT_VERSION,
+    LOGS,
+    LOGSPAMMER,
+    STARTED,
+    bot,
+)
+from userbot.events import ERRORS
+
+INVALID_PH = (
+    "\nErro: número de telefone inválido."
+    "\nDica: número de prefixo com código do país"
+    "\nou verifique o seu número de telefone e tente novamente."
+)
+INVALID_BOTLOG = (
+    "BOTLOG_CHATID não é uma variável válida "
+    " Verifique suas VARS ou arquivo config.env."
+)
+
+
+class StartupTimer:
+    """ Wall time spent in each startup phase. """
+
+    def __init__(self, started):
+        self.started = started
+        self.last = started
+        self.phases = []
+
+    def mark(self, phase):
+        """ Ends a phase, which started when the previous one ended. """
+        now = perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        LOGS.info(
+            "Inicialização em %.2f s (%s)",
+            self.last - self.started,
+            ", ".join(f"{phase}: {elapsed:.2f} s" for phase, elapsed in self.phases),
+        )
+
+
+TIMER = StartupTimer(STARTED)
+
+
+def validate_config():
+    """ Returns what is wrong with the logging config, None if nothing. """
+    if not BOTLOG_CHATID and LOGSPAMMER:
+        return (
+            "Você deve configurar a variável BOTLOG_CHATID nas variáveis "
+            "config.env, para que o registro dos logs de erro funcione."
+        )
+    if not BOTLOG_CHATID and BOTLOG:
+        return (
+            "Você deve configurar a variável BOTLOG_CHATID nas variáveis "
+            "config.env, para que o recurso de registro do userbot funcione."
+        )
+    return None
+
+
+async def check_botlog_chatid():
+    if not (BOTLOG and LOGSPAMMER):
+        return True
+    entity = await bot.get_entity(BOTLOG_CHATID)
+    if entity.default_banned_rights.send_messages:
+        LOGS.info(
+            "Sua conta não tem permissão para enviar mensagens para BOTLOG_CHATID. "
+            " Verifique se você digitou o ID do bate-papo corretamente."
+        )
+        return False
+    return True
+
+
+async def send_alive_status():
+    if BOTLOG_CHATID and LOGSPAMMER:
+        DEFAULTUSER = ALIVE_NAME or "Defina a ConfigVar `ALIVE_NAME`!"
+        message = (
+            f"👾 **LBot**   ➡️  `{LBOT_VERSION}` \n"
+            f"⚙️ **Telethon**      ➡️  `{version.__version__}` \n"
+            f"🐍 **Python**         ➡️  `{python_version()}` \n"
+            f"👤 **Usuário**       ➡️   `{DEFAULTUSER}` "
+            "\n\n__Userbot iniciado__ ☑️"
+        )
+        await bot.send_message(BOTLOG_CHATID, message)
+        return True
+
+
+async def run_checks():
+    """ Every startup request at once, over the connection already open. """
+    botlog, _, _ = await asyncio.gather(
+        check_botlog_chatid(),
+        send_alive_status(),
+        ERRORS.load_git_log(),
+        return_exceptions=True,
+    )
+    return botlog is True
+
+
+def start():
+    """ Validates the config, connects and runs the startup checks. """
+    TIMER.mark("importação")
+    error = validate_config()
+    if error is not None:
+        LOGS.info(error)
+        sys.exit(1)
+    try:
+        bot.start()
+    except PhoneNumberInvalidError:
+        print(INVALID_PH)
+        sys.exit(1)
+    TIMER.mark("conexão")
+    if not bot.loop.run_until_complete(run_checks()):
+        LOGS.info(INVALID_BOTLOG)
+        sys.exit(1)
+    TIMER.mark("verificações")
@@ -3,16 +3,28 @@
 > Copyright (C) 2019 Tulir Asokan - https://github.com/tulir/mautrix-telegram
 """
 import asyncio
+import contextlib
 import hashlib
 import inspect
+import json
 import logging
 import math
 import os
-from collections import defaultdict
-from typing import AsyncGenerator, Awaitable, BinaryIO, DefaultDict, Optional, Union
+import time
+from collections import defaultdict, deque
+from typing import (
+    AsyncGenerator,
+    BinaryIO,
+    Callable,
+    DefaultDict,
+    Optional,
+    Union,
+)
+from weakref import WeakKeyDictionary
 
 from telethon import TelegramClient, helpers, utils
 from telethon.crypto import AuthKey
+from telethon.errors import RPCError
 from telethon.network import MTProtoSender
 from telethon.tl.alltlobjects import LAYER
 from telethon.tl.functions import InvokeWithLayerRequest
@@ -46,243 +58,387 @@ TypeLocation = Union[
     InputPhotoFileLocation,
 ]
 
-filename = ""
-
-
-def stream_file(file_to_stream: BinaryIO, chunk_size=1024):
-    while True:
-        data_read = file_to_stream.read(chunk_size)
-        if not data_read:
-            break
-        yield data_read
-
+# Senders open at once across every transfer and DC, transfers beyond it
+# wait in line for one to be given back.
+MAX_CONNECTIONS = 20
+# Workers of a single transfer, so a big file alone can use the whole budget.
+MAX_TRANSFER_CONNECTIONS = 20
+# Seconds an unused sender stays open for the next transfer.
+IDLE_TIMEOUT = 60
+
+# Where the saved parts of unfinished big uploads are recorded.
+UPLOAD_STATE_DIR = os.path.join("data", "uploads")
+# Seconds the parts of an unfinished upload are trusted to still be on telegram.
+UPLOAD_STATE_TTL = 6 * 60 * 60
+
+
+class UploadState:
+    """Parts of a big upload already saved by telegram, kept on disk so an
+    interrupted upload of the same file resumes instead of restarting."""
+
+    path: str
+    file_size: int
+    mtime: float
+    file_id: Optional[int]
+    part_size: Optional[int]
+    done: set[int]
+    save_every: int = 32
+
+    def __init__(self, file_path: str, file_size: int, mtime: float) -> None:
+        key = hashlib.sha1(os.path.abspath(file_path).encode()).hexdigest()
+        self.path = os.path.join(UPLOAD_STATE_DIR, f"{key}.json")
+        self.file_size = file_size
+        self.mtime = mtime
+        self.file_id = None
+        self.part_size = None
+        self.done = set()
+        self._unsaved = 0
+
+    @classmethod
+    def load(cls, file_path: str) -> "UploadState":
+        stat = os.stat(file_path)
+        state = cls(file_path, stat.st_size, stat.st_mtime)
+        try:
+            with open(state.path) as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return state
+        if (
+            data.get("size") == state.file_size
+            and data.get("mtime") == state.mtime
+            and time.time() - data.get("updated", 0) < UPLOAD_STATE_TTL
+        ):
+            state.file_id = data["file_id"]
+            state.part_size = data["part_size"]
+            state.done = set(data["done"])
+        return state
+
+    def mark_done(self, part: int) -> None:
+        self.done.add(part)
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.save()
+
+    def save(self) -> None:
+        os.makedirs(UPLOAD_STATE_DIR, exist_ok=True)
+        data = {
+            "size": self.file_size,
+            "mtime": self.mtime,
+            "file_id": self.file_id,
+            "part_size": self.part_size,
+            "done": sorted(self.done),
+            "updated": time.time(),
+        }
+        with open(f"{self.path}.tmp", "w") as fp:
+            json.dump(data, fp)
+        os.replace(f"{self.path}.tmp", self.path)
+        self._unsaved = 0
+
+    def discard(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class SenderPool:
+    """Authorized senders of every DC, shared by all transfers of a client.
+    At most `limit` are open at once. A transfer leases one for each part
+    and gives it back right after, so concurrent transfers take turns in
+    the order they asked and split the connections between them."""
 
-class DownloadSender:
-    sender: MTProtoSender
-    request: GetFileRequest
-    remaining: int
-    stride: int
+    client: TelegramClient
+    limit: int
+    open: int
 
-    def __init__(
-        self,
-        sender: MTProtoSender,
-        file: TypeLocation,
-        offset: int,
-        limit: int,
-        stride: int,
-        count: int,
-    ) -> None:
-        self.sender = sender
-        self.request = GetFileRequest(file, offset=offset, limit=limit)
-        self.stride = stride
-        self.remaining = count
+    def __init__(self, client: TelegramClient, limit: int = MAX_CONNECTIONS) -> None:
+        self.client = client
+        self.limit = limit
+        self.open = 0
+        self._idle: DefaultDict[int, list[MTProtoSender]] = defaultdict(list)
+        self._timers: dict[MTProtoSender, asyncio.TimerHandle] = {}
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+        # Cross-DC authorization is exported once per DC, not per sender.
+        self._auth_keys: dict[int, AuthKey] = {}
+        self._auth_locks: DefaultDict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def acquire(self, dc_id: int) -> MTProtoSender:
+        self._drop_cancelled()
+        if not self._waiters:
+            sender = self._pop_idle(dc_id)
+            if sender is not None:
+                return sender
+            if self.open < self.limit or self._close_idle():
+                self.open += 1
+                return await self._open(dc_id)
+        future = self.client.loop.create_future()
+        self._waiters.append((dc_id, future))
+        try:
+            sender = await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                # Already gone if a release skipped it before this ran.
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove((dc_id, future))
+            else:
+                # Handed over just as the wait was cancelled.
+                self._hand_over(future.result(), dc_id)
+            raise
+        if sender is None:
+            # A slot was freed, the sender has to be opened.
+            return await self._open(dc_id)
+        return sender
 
-    async def next(self) -> Optional[bytes]:
-        if not self.remaining:
+    def release(self, dc_id: int, sender: MTProtoSender, broken: bool = False) -> None:
+        """Gives a sender back, closing it if a request failed on it."""
+        if broken or not sender.is_connected():
+            self._discard(sender)
+        else:
+            self._hand_over(sender, dc_id)
+
+    def _hand_over(self, sender: Optional[MTProtoSender], dc_id: int) -> None:
+        """Passes a sender, or the slot of a closed one when sender is None,
+        to the first transfer in line, or keeps it idle. A sender goes to
+        the first transfer on its DC if any, so it isn't reopened elsewhere."""
+        waiter = self._pop_waiter(None if sender is None else dc_id)
+        if waiter is not None:
+            waiter_dc, future = waiter
+            if sender is not None and waiter_dc != dc_id:
+                self._disconnect(sender)
+                sender = None
+            if sender is None:
+                self.open += 1
+            future.set_result(sender)
+        elif sender is not None:
+            self._idle[dc_id].append(sender)
+            self._timers[sender] = self.client.loop.call_later(
+                IDLE_TIMEOUT, self._expire, dc_id, sender
+            )
+        if sender is None:
+            self.open -= 1
+
+    def _drop_cancelled(self) -> None:
+        """Drops waiters cancelled in this loop iteration, which remove
+        themselves only once their task runs again."""
+        while self._waiters and self._waiters[0][1].done():
+            self._waiters.popleft()
+
+    def _pop_waiter(
+        self, dc_id: Optional[int]
+    ) -> Optional[tuple[int, asyncio.Future]]:
+        """Pops the first waiter on dc_id, else the first waiter of any DC."""
+        self._drop_cancelled()
+        if not self._waiters:
             return None
-        result = await self.sender.send(self.request)
-        self.remaining -= 1
-        self.request.offset += self.stride
-        return result.bytes
+        index = 0
+        if dc_id is not None:
+            for position, (waiter_dc, future) in enumerate(self._waiters):
+                if waiter_dc == dc_id and not future.done():
+                    index = position
+                    break
+        waiter = self._waiters[index]
+        del self._waiters[index]
+        return waiter
+
+    def _pop_idle(self, dc_id: int) -> Optional[MTProtoSender]:
+        idle = self._idle[dc_id]
+        while idle:
+            sender = idle.pop()
+            self._timers.pop(sender).cancel()
+            if sender.is_connected():
+                return sender
+            self.open -= 1
+            self._disconnect(sender)
+        return None
+
+    def _close_idle(self) -> bool:
+        """Closes an idle sender of any DC to make room for a new one."""
+        for dc_id, idle in self._idle.items():
+            if idle:
+                self._expire(dc_id, idle[0])
+                return True
+        return False
+
+    def _expire(self, dc_id: int, sender: MTProtoSender) -> None:
+        self._idle[dc_id].remove(sender)
+        self._timers.pop(sender).cancel()
+        self.open -= 1
+        self._disconnect(sender)
+
+    def _discard(self, sender: MTProtoSender) -> None:
+        self._disconnect(sender)
+        self._hand_over(None, 0)
+
+    def _disconnect(self, sender: MTProtoSender) -> None:
+        self.client.loop.create_task(sender.disconnect())
+
+    async def _open(self, dc_id: int) -> MTProtoSender:
+        """Connects a sender to dc_id. The caller already counted it in open."""
+        try:
+            return await self._connect(dc_id)
+        except BaseException:
+            self._hand_over(None, dc_id)
+            raise
+
+    async def _connect(self, dc_id: int) -> MTProtoSender:
+        if dc_id == self.client.session.dc_id:
+            return await self._create_sender(dc_id, self.client.session.auth_key)
+        async with self._auth_locks[dc_id]:
+            auth_key = self._auth_keys.get(dc_id)
+            if auth_key is not None:
+                return await self._create_sender(dc_id, auth_key)
+            sender = await self._create_sender(dc_id, None)
+            log.debug(f"Exportando autenticação para DC {dc_id}")
+            auth = await self.client(ExportAuthorizationRequest(dc_id))
+            self.client._init_request.query = ImportAuthorizationRequest(
+                id=auth.id, bytes=auth.bytes
+            )
+            await sender.send(InvokeWithLayerRequest(LAYER, self.client._init_request))
+            self._auth_keys[dc_id] = sender.auth_key
+            return sender
+
+    async def _create_sender(
+        self, dc_id: int, auth_key: Optional[AuthKey]
+    ) -> MTProtoSender:
+        dc = await self.client._get_dc(dc_id)
+        sender = MTProtoSender(auth_key, loggers=self.client._log)
+        await sender.connect(
+            self.client._connection(
+                dc.ip_address,
+                dc.port,
+                dc.id,
+                loggers=self.client._log,
+                proxy=self.client._proxy,
+            )
+        )
+        return sender
 
-    def disconnect(self) -> Awaitable[None]:
-        return self.sender.disconnect()
+    async def close(self) -> None:
+        senders = []
+        for dc_id, idle in self._idle.items():
+            while idle:
+                sender = idle.pop()
+                self._timers.pop(sender).cancel()
+                self.open -= 1
+                senders.append(sender.disconnect())
+        await asyncio.gather(*senders)
 
 
-class UploadSender:
-    sender: MTProtoSender
-    request: Union[SaveFilePartRequest, SaveBigFilePartRequest]
-    part_count: int
-    stride: int
-    previous: Optional[asyncio.Task]
-    loop: asyncio.AbstractEventLoop
+_pools: WeakKeyDictionary = WeakKeyDictionary()
 
-    def __init__(
-        self,
-        sender: MTProtoSender,
-        file_id: int,
-        part_count: int,
-        big: bool,
-        index: int,
-        stride: int,
-        loop: asyncio.AbstractEventLoop,
-    ) -> None:
-        self.sender = sender
-        self.part_count = part_count
-        if big:
-            self.request = SaveBigFilePartRequest(file_id, index, part_count, b"")
-        else:
-            self.request = SaveFilePartRequest(file_id, index, b"")
-        self.stride = stride
-        self.previous = None
-        self.loop = loop
-
-    async def next(self, data: bytes) -> None:
-        if self.previous:
-            await self.previous
-        self.previous = self.loop.create_task(self._next(data))
-
-    async def _next(self, data: bytes) -> None:
-        self.request.bytes = data
-        log.debug(
-            f"Sending file part {self.request.file_part}/{self.part_count}"
-            f" with {len(data)} bytes"
-        )
-        await self.sender.send(self.request)
-        self.request.file_part += self.stride
 
-    async def disconnect(self) -> None:
-        if self.previous:
-            await self.previous
-        return await self.sender.disconnect()
+def get_sender_pool(client: TelegramClient) -> SenderPool:
+    pool = _pools.get(client)
+    if pool is None:
+        pool = _pools[client] = SenderPool(client)
+    return pool
 
 
 class ParallelTransferrer:
+    """One transfer of a file, run by several workers that lease senders
+    from the pool of the client part by part."""
+
     client: TelegramClient
     loop: asyncio.AbstractEventLoop
     dc_id: int
-    senders: Optional[list[Union[DownloadSender, UploadSender]]]
-    auth_key: AuthKey
-    upload_ticker: int
+    pool: SenderPool
 
     def __init__(self, client: TelegramClient, dc_id: Optional[int] = None) -> None:
         self.client = client
         self.loop = self.client.loop
         self.dc_id = dc_id or self.client.session.dc_id
-        self.auth_key = (
-            None
-            if dc_id and self.client.session.dc_id != dc_id
-            else self.client.session.auth_key
-        )
-        self.senders = None
-        self.upload_ticker = 0
-
-    async def _cleanup(self) -> None:
-        await asyncio.gather(*[sender.disconnect() for sender in self.senders])
-        self.senders = None
+        self.pool = get_sender_pool(client)
 
     @staticmethod
     def _get_connection_count(
-        file_size: int, max_count: int = 20, full_size: int = 100 * 1024 * 1024
+        file_size: int,
+        max_count: int = MAX_TRANSFER_CONNECTIONS,
+        full_size: int = 100 * 1024 * 1024,
     ) -> int:
         if file_size > full_size:
             return max_count
-        return math.ceil((file_size / full_size) * max_count)
-
-    async def _init_download(
-        self, connections: int, file: TypeLocation, part_count: int, part_size: int
-    ) -> None:
-        minimum, remainder = divmod(part_count, connections)
-
-        def get_part_count() -> int:
-            nonlocal remainder
-            if remainder > 0:
-                remainder -= 1
-                return minimum + 1
-            return minimum
-
-        # The first cross-DC sender will export+import the authorization, so we always create it
-        # before creating any other senders.
-        self.senders = [
-            await self._create_download_sender(
-                file, 0, part_size, connections * part_size, get_part_count()
-            ),
-            *await asyncio.gather(
-                *[
-                    self._create_download_sender(
-                        file, i, part_size, connections * part_size, get_part_count()
-                    )
-                    for i in range(1, connections)
-                ]
-            ),
-        ]
-
-    async def _create_download_sender(
-        self,
-        file: TypeLocation,
-        index: int,
-        part_size: int,
-        stride: int,
-        part_count: int,
-    ) -> DownloadSender:
-        return DownloadSender(
-            await self._create_sender(),
-            file,
-            index * part_size,
-            part_size,
-            stride,
-            part_count,
-        )
-
-    async def _init_upload(
-        self, connections: int, file_id: int, part_count: int, big: bool
-    ) -> None:
-        self.senders = [
-            await self._create_upload_sender(file_id, part_count, big, 0, connections),
-            *await asyncio.gather(
-                *[
-                    self._create_upload_sender(file_id, part_count, big, i, connections)
-                    for i in range(1, connections)
-                ]
-            ),
-        ]
-
-    async def _create_upload_sender(
-        self, file_id: int, part_count: int, big: bool, index: int, stride: int
-    ) -> UploadSender:
-        return UploadSender(
-            await self._create_sender(),
-            file_id,
-            part_count,
-            big,
-            index,
-            stride,
-            loop=self.loop,
-        )
+        return max(1, math.ceil((file_size / full_size) * max_count))
+
+    async def _send(self, request):
+        sender = await self.pool.acquire(self.dc_id)
+        try:
+            result = await sender.send(request)
+        except RPCError:
+            self.pool.release(self.dc_id, sender)
+            raise
+        except BaseException:
+            # A dropped connection or a request cancelled halfway, the
+            # sender can't be trusted with the next one.
+            self.pool.release(self.dc_id, sender, broken=True)
+            raise
+        self.pool.release(self.dc_id, sender)
+        return result
+
+    async def _run(self, coros) -> None:
+        tasks = [self.loop.create_task(coro) for coro in coros]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
 
-    async def _create_sender(self) -> MTProtoSender:
-        dc = await self.client._get_dc(self.dc_id)
-        sender = MTProtoSender(self.auth_key, loggers=self.client._log)
-        await sender.connect(
-            self.client._connection(
-                dc.ip_address,
-                dc.port,
-                dc.id,
-                loggers=self.client._log,
-                proxy=self.client._proxy,
-            )
-        )
-        if not self.auth_key:
-            log.debug(f"Exportando autenticação para DC {self.dc_id}")
-            auth = await self.client(ExportAuthorizationRequest(self.dc_id))
-            self.client._init_request.query = ImportAuthorizationRequest(
-                id=auth.id, bytes=auth.bytes
-            )
-            await sender.send(InvokeWithLayerRequest(LAYER, self.client._init_request))
-            self.auth_key = sender.auth_key
-        return sender
+    @staticmethod
+    def upload_params(
+        file_size: int, part_size_kb: Optional[float] = None
+    ) -> tuple[int, int, bool]:
+        part_size = (part_size_kb or utils.get_appropriated_part_size(file_size)) * 1024
+        part_count = (file_size + part_size - 1) // part_size
+        is_large = file_size > 10 * 1024 * 1024
+        return part_size, part_count, is_large
 
-    async def init_upload(
+    async def upload(
         self,
         file_id: int,
         file_size: int,
+        parts: list[int],
+        read_part: Callable[[int], bytes],
+        part_done: Callable[[int, bytes], None],
         part_size_kb: Optional[float] = None,
         connection_count: Optional[int] = None,
-    ) -> tuple[int, int, bool]:
+    ) -> None:
+        """Reads parts in a worker thread and sends them through up to
+        connection_count senders at once. The queue holds one part per
+        worker, so memory stays bounded however fast the disk is."""
         connection_count = connection_count or self._get_connection_count(file_size)
-        print("contagem do init_upload é ", connection_count)
-        part_size = (part_size_kb or utils.get_appropriated_part_size(file_size)) * 1024
-        part_count = (file_size + part_size - 1) // part_size
-        is_large = file_size > 10 * 1024 * 1024
-        await self._init_upload(connection_count, file_id, part_count, is_large)
-        return part_size, part_count, is_large
-
-    async def upload(self, part: bytes) -> None:
-        await self.senders[self.upload_ticker].next(part)
-        self.upload_ticker = (self.upload_ticker + 1) % len(self.senders)
-
-    async def finish_upload(self) -> None:
-        await self._cleanup()
+        part_size, part_count, is_large = self.upload_params(file_size, part_size_kb)
+        log.debug(f"Iniciando upload paralelo: {connection_count} {part_count}")
+        queue: asyncio.Queue = asyncio.Queue(maxsize=connection_count)
+
+        async def produce() -> None:
+            for part in parts:
+                data = await self.loop.run_in_executor(None, read_part, part)
+                await queue.put((part, data))
+            for _ in range(connection_count):
+                await queue.put(None)
+
+        async def consume() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                part, data = item
+                log.debug(
+                    f"Sending file part {part}/{part_count} with {len(data)} bytes"
+                )
+                if is_large:
+                    request = SaveBigFilePartRequest(file_id, part, part_count, data)
+                else:
+                    request = SaveFilePartRequest(file_id, part, data)
+                await self._send(request)
+                part_done(part, data)
+
+        await self._run([produce()] + [consume() for _ in range(connection_count)])
+
+    async def _fetch(self, file: TypeLocation, offset: int, limit: int) -> bytes:
+        request = GetFileRequest(file, offset=offset, limit=limit)
+        return (await self._send(request)).bytes
 
     async def download(
         self,
@@ -291,70 +447,134 @@ class ParallelTransferrer:
         part_size_kb: Optional[float] = None,
         connection_count: Optional[int] = None,
     ) -> AsyncGenerator[bytes, None]:
+        """Yields the parts in order, fetching connection_count at a time."""
         connection_count = connection_count or self._get_connection_count(file_size)
-        print("contagem de download é ", connection_count)
-
         part_size = (part_size_kb or utils.get_appropriated_part_size(file_size)) * 1024
         part_count = math.ceil(file_size / part_size)
         log.debug(
             "Iniciando download paralelo: "
             f"{connection_count} {part_size} {part_count} {file!s}"
         )
-        await self._init_download(connection_count, file, part_count, part_size)
+        for first in range(0, part_count, connection_count):
+            tasks = [
+                self.loop.create_task(self._fetch(file, part * part_size, part_size))
+                for part in range(first, min(first + connection_count, part_count))
+            ]
+            try:
+                for part, task in enumerate(tasks, first):
+                    data = await task
+                    if not data:
+                        return
+                    yield data
+                    log.debug(f"Parte {part + 1} baixada")
+            finally:
+                for task in tasks:
+                    task.cancel()
+        log.debug("Download paralelo concluído")
+
+    async def download_to(
+        self,
+        file: TypeLocation,
+        file_size: int,
+        write_part: Callable[[int, bytes], None],
+        part_done: Optional[Callable[[int], None]] = None,
+        part_size_kb: Optional[float] = None,
+        connection_count: Optional[int] = None,
+    ) -> None:
+        """Downloads parts out of order: every worker takes the next missing
+        part as soon as it's free and write_part(offset, data) stores it
+        from a worker thread. Each worker holds at most one part."""
+        connection_count = connection_count or self._get_connection_count(file_size)
+        part_size = (part_size_kb or utils.get_appropriated_part_size(file_size)) * 1024
+        part_count = math.ceil(file_size / part_size)
+        log.debug(
+            "Iniciando download paralelo fora de ordem: "
+            f"{connection_count} {part_size} {part_count} {file!s}"
+        )
+        parts = iter(range(part_count))
+        written = []
 
-        part = 0
-        while part < part_count:
-            tasks = [self.loop.create_task(sender.next()) for sender in self.senders]
-            for task in tasks:
-                data = await task
+        async def worker() -> None:
+            for part in parts:
+                data = await self._fetch(file, part * part_size, part_size)
                 if not data:
-                    break
-                yield data
-                part += 1
-                log.debug(f"Parte {part} baixada")
-
-        log.debug("Download paralelo concluído, limpando conexões")
-        await self._cleanup()
-
-
-parallel_transfer_locks: DefaultDict[int, asyncio.Lock] = defaultdict(
-    lambda: asyncio.Lock()
-)
+                    raise ValueError(f"Parte {part} do arquivo veio vazia")
+                await self.loop.run_in_executor(
+                    None, write_part, part * part_size, data
+                )
+                written.append(len(data))
+                if part_done:
+                    part_done(len(data))
+
+        await self._run([worker() for _ in range(connection_count)])
+        if len(written) != part_count or sum(written) != file_size:
+            raise ValueError(
+                f"Download incompleto: {len(written)}/{part_count} partes, "
+                f"{sum(written)}/{file_size} bytes"
+            )
 
 
 async def _internal_transfer_to_telegram(
-    client: TelegramClient, response: BinaryIO, progress_callback: callable
+    client: TelegramClient,
+    response: BinaryIO,
+    filename: str,
+    progress_callback: callable,
 ) -> tuple[TypeInputFile, int]:
-    global filename
-    file_id = helpers.generate_random_long()
-    file_size = os.path.getsize(response.name)
+    state = UploadState.load(response.name)
+    file_size = state.file_size
+    resumed = state.file_id is not None
+    if not resumed:
+        state.file_id = helpers.generate_random_long()
+    file_id = state.file_id
 
     hash_md5 = hashlib.md5()
     uploader = ParallelTransferrer(client)
-    part_size, part_count, is_large = await uploader.init_upload(file_id, file_size)
-    buffer = bytearray()
-    for data in stream_file(response):
+    part_size_kb = state.part_size and state.part_size // 1024
+    part_size, part_count, is_large = uploader.upload_params(file_size, part_size_kb)
+    state.part_size = part_size
+    if not is_large:
+        # Small files are sent whole, their md5 must cover every part.
+        state.done.clear()
+    parts = [part for part in range(part_count) if part not in state.done]
+    if resumed and is_large:
+        log.info(
+            f"Resuming upload of {response.name}: "
+            f"{part_count - len(parts)}/{part_count} parts already sent"
+        )
+    uploaded = min(len(state.done) * part_size, file_size)
+    pending_callbacks = set()
+
+    def part_done(part: int, data: bytes) -> None:
+        nonlocal uploaded
+        uploaded += len(data)
+        if is_large:
+            state.mark_done(part)
         if progress_callback:
-            r = progress_callback(response.tell(), file_size)
+            r = progress_callback(uploaded, file_size)
             if inspect.isawaitable(r):
-                await r
+                task = asyncio.ensure_future(r)
+                pending_callbacks.add(task)
+                task.add_done_callback(pending_callbacks.discard)
+
+    def read_part(part: int) -> bytes:
+        # Only the upload producer reads, one whole part at a time and in order.
+        response.seek(part * part_size)
+        data = response.read(part_size)
         if not is_large:
             hash_md5.update(data)
-        if len(buffer) == 0 and len(data) == part_size:
-            await uploader.upload(data)
-            continue
-        new_len = len(buffer) + len(data)
-        if new_len >= part_size:
-            cutoff = part_size - len(buffer)
-            buffer.extend(data[:cutoff])
-            await uploader.upload(bytes(buffer))
-            buffer.clear()
-            buffer.extend(data[cutoff:])
-        else:
-            buffer.extend(data)
-    if len(buffer) > 0:
-        await uploader.upload(bytes(buffer))
-    await uploader.finish_upload()
+        return data
+
+    try:
+        await uploader.upload(
+            file_id, file_size, parts, read_part, part_done, part_size_kb
+        )
+    except BaseException:
+        if is_large:
+            state.save()
+        raise
+    if pending_callbacks:
+        await asyncio.gather(*pending_callbacks)
+    state.discard()
     if is_large:
         return InputFileBig(file_id, part_count, filename), file_size
     else:
@@ -369,25 +589,71 @@ async def download_file(
 ) -> BinaryIO:
     size = location.size
     dc_id, location = utils.get_input_location(location)
-    # We lock the transfers because telegram has connection count limits
     downloader = ParallelTransferrer(client, dc_id)
-    downloaded = downloader.download(location, size)
-    async for x in downloaded:
-        out.write(x)
+    try:
+        fd = out.fileno()
+    except (AttributeError, OSError):
+        fd = None
+    if fd is None or not hasattr(os, "pwrite"):
+        downloaded = downloader.download(location, size)
+        async for x in downloaded:
+            out.write(x)
+            if progress_callback:
+                r = progress_callback(out.tell(), size)
+                if inspect.isawaitable(r):
+                    await r
+        return out
+
+    out.flush()
+    os.ftruncate(fd, size)
+    received = 0
+    pending_callbacks = set()
+
+    def write_part(offset: int, data: bytes) -> None:
+        os.pwrite(fd, data, offset)
+
+    def part_done(length: int) -> None:
+        nonlocal received
+        received += length
         if progress_callback:
-            r = progress_callback(out.tell(), size)
+            r = progress_callback(received, size)
             if inspect.isawaitable(r):
-                await r
-
+                task = asyncio.ensure_future(r)
+                pending_callbacks.add(task)
+                task.add_done_callback(pending_callbacks.discard)
+
+    await downloader.download_to(location, size, write_part, part_done)
+    if pending_callbacks:
+        await asyncio.gather(*pending_callbacks)
+    out.seek(size)
     return out
 
 
+async def stream_file(
+    client: TelegramClient,
+    location: TypeLocation,
+    progress_callback: callable = None,
+) -> AsyncGenerator[bytes, None]:
+    """Yields the bytes of a file in order as the parallel download fetches
+    them, so they can be consumed without being written to disk."""
+    size = location.size
+    dc_id, location = utils.get_input_location(location)
+    received = 0
+    async for data in ParallelTransferrer(client, dc_id).download(location, size):
+        yield data
+        received += len(data)
+        if progress_callback:
+            r = progress_callback(received, size)
+            if inspect.isawaitable(r):
+                await r
+
+
 async def upload_file(
     client: TelegramClient,
     file: BinaryIO,
     name,
     progress_callback: callable = None,
 ) -> TypeInputFile:
-    global filename
-    filename = name
-    return (await _internal_transfer_to_telegram(client, file, progress_callback))[0]
+    return (
+        await _internal_transfer_to_telegram(client, file, name, progress_callback)
+    )[0]
@@ -14,7 +14,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from .chrome import chrome, options
+from .chrome import BROWSERS
 from .google_images_download import googleimagesdownload
-from .progress import progress
+from .http import close_session, fetch, get_session, http_get, http_post
+from .progress import PROGRESS, track_progress
+from .saved_media import get_saved_message, send_saved_message
 from .tools import human_to_bytes, humanbytes, md5, run_cmd, time_formatter
@@ -0,0 +1,125 @@
+""" Zip archives written by a worker thread, so compressing a big file
+    never blocks the event loop. Entries can be fed from an async stream,
+    such as a telegram download, without a copy of the source on disk. """
+
+import asyncio
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Formats that are already compressed, deflating them only costs time.
+COMPRESSED_EXTENSIONS = (
+    ".7z",
+    ".apk",
+    ".bz2",
+    ".gz",
+    ".jpeg",
+    ".jpg",
+    ".mkv",
+    ".mp3",
+    ".mp4",
+    ".ogg",
+    ".png",
+    ".rar",
+    ".webm",
+    ".webp",
+    ".xz",
+    ".zip",
+)
+COMPRESSED_MIME_TYPES = ("audio/", "image/jpeg", "image/png", "image/webp", "video/")
+# Chunks waiting to be compressed, per entry.
+MAX_PENDING_CHUNKS = 8
+READ_SIZE = 1024 * 1024
+
+
+def is_compressed(name, mime_type=None):
+    """ Whether a file is better stored than deflated. """
+    if mime_type and mime_type.startswith(COMPRESSED_MIME_TYPES):
+        return True
+    return name.lower().endswith(COMPRESSED_EXTENSIONS)
+
+
+class ArchiveWriter:
+    """
+    Zip archive at path. Every write runs on a single worker thread, in the
+    order it was asked. A level of 0 stores every entry, otherwise it is
+    the deflate level of the entries that aren't stored.
+    """
+
+    def __init__(self, path, level=6):
+        self.path = path
+        self.level = level
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="zip")
+        self._zip = zipfile.ZipFile(
+            path,
+            "w",
+            zipfile.ZIP_DEFLATED if level else zipfile.ZIP_STORED,
+            compresslevel=level or None,
+        )
+        self._default = self._zip.compression
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _compression(self, store):
+        return zipfile.ZIP_STORED if store else self._default
+
+    def _open(self, name, store):
+        self._zip.compression = self._compression(store)
+        try:
+            return self._zip.open(name, "w", force_zip64=True)
+        finally:
+            self._zip.compression = self._default
+
+    async def add_stream(self, name, chunks, store=False):
+        """ Adds an entry from an async iterator of bytes. The next chunks
+            keep arriving while the previous ones are compressed. """
+        queue = asyncio.Queue(MAX_PENDING_CHUNKS)
+
+        async def produce():
+            async for chunk in chunks:
+                await queue.put(chunk)
+            await queue.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        entry = await self._run(self._open, name, store)
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait(
+                    {getter, producer}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not getter.done() and producer.exception() is not None:
+                    # The stream failed before the end of the entry.
+                    getter.cancel()
+                    raise producer.exception()
+                chunk = await getter
+                if chunk is None:
+                    break
+                await self._run(entry.write, chunk)
+        finally:
+            producer.cancel()
+            await self._run(entry.close)
+
+    def _write(self, path, arcname, store):
+        self._zip.compression = self._compression(store)
+        try:
+            self._zip.write(path, arcname)
+        finally:
+            self._zip.compression = self._default
+
+    async def add_file(self, path, arcname=None, store=False):
+        await self._run(self._write, path, arcname or os.path.basename(path), store)
+
+    async def close(self):
+        try:
+            await self._run(self._zip.close)
+        finally:
+            self._executor.shutdown(wait=False)
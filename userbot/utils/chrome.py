@@ -14,30 +14,222 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+""" Headless chrome kept warm in a pool. Selenium calls block, so every job
+    runs on a worker thread, with a download directory of its own, a
+    timeout, and a browser that is replaced after MAX_BROWSER_JOBS jobs. """
+
+import asyncio
 import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 
-from userbot import CHROME_DRIVER, GOOGLE_CHROME_BIN, TEMP_DOWNLOAD_DIRECTORY
-
+from userbot import CHROME_DRIVER, GOOGLE_CHROME_BIN, LOGS, TEMP_DOWNLOAD_DIRECTORY
 
-async def chrome(chrome_options=None):
-    if chrome_options is None:
-        chrome_options = await options()
-    if not os.path.isdir(TEMP_DOWNLOAD_DIRECTORY):
-        os.mkdir(TEMP_DOWNLOAD_DIRECTORY)
-    prefs = {"download.default_directory": TEMP_DOWNLOAD_DIRECTORY}
-    chrome_options.add_experimental_option("prefs", prefs)
-    return webdriver.Chrome(executable_path=CHROME_DRIVER, options=chrome_options)
+# Browsers running jobs at once, and how many are started before the first
+# job so it skips chrome's cold start. Jobs beyond POOL_SIZE wait their turn.
+POOL_SIZE = 2
+WARM_BROWSERS = 1
+# Jobs a browser runs before it is replaced, so whatever a page leaks in it
+# doesn't pile up.
+MAX_BROWSER_JOBS = 25
+# Seconds a single call on a browser may take, it is killed after that.
+JOB_TIMEOUT = 60
+WINDOW_SIZE = (1920, 1080)
 
 
-async def options():
+def options():
     chrome_options = Options()
     chrome_options.binary_location = GOOGLE_CHROME_BIN
     chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--window-size=1920x1080")
+    chrome_options.add_argument("--window-size={}x{}".format(*WINDOW_SIZE))
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--test-type")
+    chrome_options.add_argument("--ignore-certificate-errors")
     return chrome_options
+
+
+def allow_downloads(driver, download_dir):
+    """ Sends the downloads of driver to download_dir, even when headless. """
+    params = {
+        "cmd": "Page.setDownloadBehavior",
+        "params": {"behavior": "allow", "downloadPath": download_dir},
+    }
+    driver.execute("send_command", params)
+
+
+class Browser:
+    """ A running chrome and the jobs it has done. """
+
+    def __init__(self):
+        chrome_options = options()
+        prefs = {"download.default_directory": TEMP_DOWNLOAD_DIRECTORY}
+        chrome_options.add_experimental_option("prefs", prefs)
+        self.driver = webdriver.Chrome(
+            executable_path=CHROME_DRIVER, options=chrome_options
+        )
+        self.driver.command_executor._commands["send_command"] = (
+            "POST",
+            "/session/$sessionId/chromium/send_command",
+        )
+        self.jobs = 0
+
+    def reset(self):
+        """ Leaves nothing of the last job for the next one. """
+        self.driver.get("about:blank")
+        self.driver.delete_all_cookies()
+        self.driver.set_window_size(*WINDOW_SIZE)
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            LOGS.warning("Falha ao fechar o chrome: %s", e)
+
+
+class BrowserJob:
+    """ A browser lent to a job by BrowserPool.job. """
+
+    def __init__(self, pool, browser, download_dir, timeout):
+        self.download_dir = download_dir
+        self.broken = False
+        self._pool = pool
+        self._browser = browser
+        self._timeout = timeout
+
+    async def run(self, func, *args):
+        """
+        Calls func(driver, *args) on a worker thread and returns its result.
+        Past the timeout the browser is quit, which makes the stuck selenium
+        call fail, and asyncio.TimeoutError is raised.
+        """
+        if self.broken:
+            raise RuntimeError("Browser closed by a failed call")
+        future = self._pool.submit(func, self._browser.driver, *args)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self._timeout)
+        except BaseException:
+            # The stuck call fails once its browser is gone, nobody awaits it.
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self.broken = True
+            await self._pool.discard(self._browser)
+            raise
+
+
+class BrowserPool:
+    """ Warm browsers and the queue of jobs waiting for one. """
+
+    def __init__(self, size=POOL_SIZE, max_jobs=MAX_BROWSER_JOBS):
+        self.size = size
+        self.max_jobs = max_jobs
+        # A thread per running job, plus one per browser being started or
+        # quit, which never waits behind a stuck job.
+        self._executor = ThreadPoolExecutor(size, thread_name_prefix="chrome")
+        self._spare = ThreadPoolExecutor(size, thread_name_prefix="chrome-spare")
+        self._slots = None
+        self._idle = []
+        self._starting = []
+
+    def submit(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self._executor, func, *args)
+
+    async def _spawn(self):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._spare, Browser)
+
+    def _start(self):
+        """ Starts a browser in the background, it joins the idle ones. """
+        task = asyncio.ensure_future(self._spawn())
+        self._starting.append(task)
+
+        def started(done):
+            self._starting.remove(done)
+            if done.cancelled():
+                return
+            if done.exception() is not None:
+                LOGS.warning("Falha ao iniciar o chrome: %s", done.exception())
+                return
+            self._idle.append(done.result())
+
+        task.add_done_callback(started)
+        return task
+
+    def warm(self, count=WARM_BROWSERS):
+        """ Starts browsers until count are idle or starting. """
+        if not os.path.exists(CHROME_DRIVER):
+            return
+        for _ in range(count - len(self._idle) - len(self._starting)):
+            self._start()
+
+    async def _take(self):
+        if self._idle:
+            return self._idle.pop()
+        if self._starting:
+            # Reuse a browser already on its way instead of a cold start.
+            await asyncio.wait([self._starting[0]])
+            if self._idle:
+                return self._idle.pop()
+        return await self._spawn()
+
+    async def discard(self, browser):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self._spare, browser.quit)
+
+    async def _give_back(self, browser):
+        browser.jobs += 1
+        if browser.jobs >= self.max_jobs:
+            asyncio.ensure_future(self.discard(browser))
+            self.warm()
+            return
+        try:
+            await asyncio.wait_for(self.submit(browser.reset), JOB_TIMEOUT)
+        except Exception as e:
+            LOGS.warning("Chrome descartado: %s", e)
+            asyncio.ensure_future(self.discard(browser))
+            self.warm()
+        else:
+            self._idle.append(browser)
+
+    async def close(self):
+        """ Quits the idle browsers, once those starting are up. """
+        if self._starting:
+            await asyncio.wait(list(self._starting))
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self.discard(browser) for browser in idle))
+
+    @asynccontextmanager
+    async def job(self, timeout=JOB_TIMEOUT):
+        """
+        Waits for a browser and lends it as a BrowserJob, with an empty
+        download directory that is removed afterwards. Every call of the
+        same job runs on the same page.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            browser = await self._take()
+            os.makedirs(TEMP_DOWNLOAD_DIRECTORY, exist_ok=True)
+            download_dir = tempfile.mkdtemp(dir=TEMP_DOWNLOAD_DIRECTORY)
+            job = BrowserJob(self, browser, download_dir, timeout)
+            try:
+                await job.run(allow_downloads, download_dir)
+                yield job
+            finally:
+                if not job.broken:
+                    await self._give_back(browser)
+                shutil.rmtree(download_dir, ignore_errors=True)
+
+    async def run(self, func, *args, timeout=JOB_TIMEOUT):
+        """ Runs func(driver, download_dir, *args) as a job of its own. """
+        async with self.job(timeout) as job:
+            return await job.run(func, job.download_dir, *args)
+
+
+BROWSERS = BrowserPool()
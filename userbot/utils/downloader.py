@@ -0,0 +1,196 @@
+""" Segmented http downloader. Files are fetched as parallel ranges over the
+    shared session into a .part file, and the ranges left are kept next to
+    it, so an interrupted download continues where it stopped. """
+
+import asyncio
+import inspect
+import json
+import math
+import os
+import re
+import time
+
+import aiohttp
+
+from .http import get_session
+
+# Ranges fetched at once, for servers that accept them.
+SEGMENTS = 8
+# Smallest range worth its own connection.
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+CHUNK_SIZE = 256 * 1024
+# Attempts for a range whose connection drops, and seconds between saves
+# of the ranges left.
+MAX_RETRIES = 3
+STATE_INTERVAL = 5
+TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+
+CONTENT_RANGE = re.compile(r"bytes \d+-\d+/(\d+)")
+
+
+class SegmentedDownload:
+    """ Download of url into path, see download_url. """
+
+    def __init__(self, url, path, progress_callback=None, segments=SEGMENTS):
+        self.url = url
+        self.path = path
+        self.part_path = path + ".part"
+        self.state_path = path + ".part.json"
+        self.progress_callback = progress_callback
+        self.segments = segments
+        self.size = None
+        self.validator = None
+        self.ranges = []
+        self.saved = 0
+
+    async def run(self):
+        session = get_session()
+        async with session.get(
+            self.url, headers={"Range": "bytes=0-0"}, timeout=TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            self.url = str(response.url)
+            self.validator = response.headers.get("ETag") or response.headers.get(
+                "Last-Modified"
+            )
+            if response.status == 200:
+                # No ranges, the answer already is the whole file
+                await self._stream(response)
+                return self.path
+            match = CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+            if match is not None and hasattr(os, "pwrite"):
+                self.size = int(match.group(1))
+        if self.size is None:
+            # Ranges of unknown total can't be split, fetch the whole file
+            async with session.get(self.url, timeout=TIMEOUT) as response:
+                response.raise_for_status()
+                await self._stream(response)
+            return self.path
+        self._load_state()
+        mode = "r+b" if os.path.exists(self.part_path) else "wb"
+        with open(self.part_path, mode) as file:
+            file.truncate(self.size)
+            fd = file.fileno()
+            tasks = [
+                asyncio.ensure_future(self._fetch(fd, rng)) for rng in self.ranges
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                self._save_state()
+                raise
+            if os.fstat(fd).st_size != self.size or any(
+                start <= end for start, end in self.ranges
+            ):
+                raise aiohttp.ClientPayloadError("download incompleto")
+        os.replace(self.part_path, self.path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        return self.path
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            state = None
+        if (
+            state is not None
+            and os.path.exists(self.part_path)
+            and state.get("size") == self.size
+            and state.get("validator") == self.validator
+        ):
+            self.ranges = state["ranges"]
+            return
+        count = max(1, min(self.segments, math.ceil(self.size / MIN_SEGMENT_SIZE)))
+        step = math.ceil(self.size / count)
+        self.ranges = [
+            [start, min(start + step, self.size) - 1]
+            for start in range(0, self.size, step)
+        ]
+
+    def _save_state(self):
+        self.saved = time.monotonic()
+        with open(self.state_path, "w") as file:
+            json.dump(
+                {"size": self.size, "validator": self.validator, "ranges": self.ranges},
+                file,
+            )
+
+    async def _fetch(self, fd, rng):
+        """ Fetches rng, a [next byte, last byte] pair moved as data arrives. """
+        loop = asyncio.get_event_loop()
+        attempt = 0
+        while rng[0] <= rng[1]:
+            start = rng[0]
+            try:
+                async with get_session().get(
+                    self.url,
+                    headers={"Range": f"bytes={rng[0]}-{rng[1]}"},
+                    timeout=TIMEOUT,
+                ) as response:
+                    response.raise_for_status()
+                    if response.status != 206:
+                        raise aiohttp.ClientPayloadError("o servidor ignorou o range")
+                    async for data in response.content.iter_chunked(CHUNK_SIZE):
+                        data = data[: rng[1] - rng[0] + 1]
+                        await loop.run_in_executor(None, os.pwrite, fd, data, rng[0])
+                        rng[0] += len(data)
+                        await self._progress()
+                    if rng[0] == start:
+                        raise aiohttp.ClientPayloadError("o servidor não enviou dados")
+            except (
+                aiohttp.ClientConnectionError,
+                aiohttp.ClientPayloadError,
+                asyncio.TimeoutError,
+            ):
+                # Only drops in a row count, a range that moved starts over
+                if rng[0] > start:
+                    attempt = 0
+                attempt += 1
+                if attempt > MAX_RETRIES:
+                    raise
+                await asyncio.sleep(attempt)
+
+    async def _progress(self):
+        if time.monotonic() - self.saved >= STATE_INTERVAL:
+            self._save_state()
+        if self.progress_callback is None:
+            return
+        left = sum(end - start + 1 for start, end in self.ranges if start <= end)
+        r = self.progress_callback(self.size - left, self.size)
+        if inspect.isawaitable(r):
+            await r
+
+    async def _stream(self, response):
+        """ Writes a whole response, when the server doesn't serve ranges. """
+        loop = asyncio.get_event_loop()
+        size = response.content_length
+        if response.headers.get("Content-Encoding", "identity") != "identity":
+            # Content-Length counts the encoded body, not the file
+            size = None
+        done = 0
+        with open(self.part_path, "wb") as file:
+            async for data in response.content.iter_chunked(CHUNK_SIZE):
+                await loop.run_in_executor(None, file.write, data)
+                done += len(data)
+                if self.progress_callback is not None:
+                    r = self.progress_callback(done, size or done)
+                    if inspect.isawaitable(r):
+                        await r
+        if size is not None and done != size:
+            raise aiohttp.ClientPayloadError("download incompleto")
+        os.replace(self.part_path, self.path)
+
+
+async def download_url(url, path, progress_callback=None, segments=SEGMENTS):
+    """
+    Downloads url into path and returns path. Servers that accept ranges
+    are read with up to segments connections at once, and an interrupted
+    download of the same file is resumed from its .part file.
+    progress_callback(current, total) may be a function or a coroutine.
+    """
+    return await SegmentedDownload(url, path, progress_callback, segments).run()
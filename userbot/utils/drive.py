@@ -0,0 +1,284 @@
+""" Async engine for the google drive api. The api client is blocking, so
+    every request runs on a bounded thread pool and each worker thread keeps
+    its own authorized httplib2 instance, which isn't safe to share. """
+
+import asyncio
+import json
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httplib2
+from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload
+
+# Threads running drive requests, shared by every command.
+MAX_DRIVE_THREADS = 8
+# Files uploaded or copied at once by a single directory task.
+MAX_CONCURRENT_FILES = 4
+# Attempts for a request refused by a rate limit or a server error.
+MAX_RETRIES = 5
+# Requests sent in a single batch, the most google accepts.
+MAX_BATCH_SIZE = 100
+# Fields listed by the tree walker.
+WALK_FIELDS = "id, name, mimeType, size"
+G_DRIVE_DIR_MIME_TYPE = "application/vnd.google-apps.folder"
+# Resumable upload chunks must be a multiple of 256 KiB. Their size follows
+# the throughput so each one takes about CHUNK_TARGET_TIME seconds.
+CHUNK_ALIGN = 256 * 1024
+MIN_CHUNK_SIZE = 4 * CHUNK_ALIGN
+MAX_CHUNK_SIZE = 256 * CHUNK_ALIGN
+FIRST_CHUNK_SIZE = 32 * CHUNK_ALIGN
+CHUNK_TARGET_TIME = 10
+
+RATE_LIMIT_REASONS = {"userRateLimitExceeded", "rateLimitExceeded"}
+
+_executor = ThreadPoolExecutor(MAX_DRIVE_THREADS, thread_name_prefix="gdrive")
+
+
+def error_reason(error):
+    """ Returns the reason google gave for a HttpError, if any. """
+    try:
+        details = json.loads(error.content.decode())["error"]
+        return details["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+def is_rate_limited(error):
+    status = error.resp.status
+    return status == 429 or (status == 403 and error_reason(error) in RATE_LIMIT_REASONS)
+
+
+def is_retryable(error):
+    return error.resp.status >= 500 or is_rate_limited(error)
+
+
+async def backoff(attempt):
+    """ Exponential backoff with jitter, as asked by the drive docs. """
+    await asyncio.sleep(min(2 ** attempt + random.random(), 64))
+
+
+class Throttle:
+    """
+    Caps how many files a task transfers at once. The cap is halved every
+    time google answers with a rate limit error and grows back by one after
+    each successful request.
+    """
+
+    def __init__(self, limit=MAX_CONCURRENT_FILES):
+        self.max_limit = limit
+        self.limit = limit
+        self.running = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.running < self.limit)
+            self.running += 1
+
+    async def __aexit__(self, *exc_info):
+        async with self._cond:
+            self.running -= 1
+            self._cond.notify_all()
+
+    def slow_down(self):
+        self.limit = max(1, self.limit // 2)
+
+    def speed_up(self):
+        if self.limit < self.max_limit:
+            self.limit += 1
+            asyncio.ensure_future(self._wake())
+
+    async def _wake(self):
+        async with self._cond:
+            self._cond.notify_all()
+
+
+class AdaptiveMediaUpload(MediaFileUpload):
+    """ Resumable file upload whose chunk size adapts to the throughput. """
+
+    def __init__(self, filename, mimetype=None):
+        super().__init__(
+            filename, mimetype=mimetype, chunksize=FIRST_CHUNK_SIZE, resumable=True
+        )
+        self.chunk_size = FIRST_CHUNK_SIZE
+
+    def chunksize(self):
+        return self.chunk_size
+
+    def adapt(self, sent, elapsed):
+        """ Moves the chunk size halfway to what would have taken
+            CHUNK_TARGET_TIME at the speed of the last chunk. """
+        if sent <= 0 or elapsed <= 0:
+            return
+        target = sent / elapsed * CHUNK_TARGET_TIME
+        size = int(self.chunk_size + target) // 2 // CHUNK_ALIGN * CHUNK_ALIGN
+        self.chunk_size = min(MAX_CHUNK_SIZE, max(MIN_CHUNK_SIZE, size))
+
+
+class Drive:
+    """ Google drive service whose requests are awaited instead of blocking. """
+
+    def __init__(self, creds, service):
+        self.creds = creds
+        self.service = service
+        self.throttle = Throttle()
+        self._local = threading.local()
+
+    @classmethod
+    async def create(cls, creds):
+        service = await run(build, "drive", "v3", credentials=creds, cache_discovery=False)
+        return cls(creds, service)
+
+    def files(self):
+        return self.service.files()
+
+    def permissions(self):
+        return self.service.permissions()
+
+    def new_http(self):
+        return AuthorizedHttp(self.creds, http=httplib2.Http())
+
+    def http(self):
+        """ Authorized http of the calling worker thread. """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = self.new_http()
+        return http
+
+    async def execute(self, request):
+        """ Runs a request on the pool, backing off on rate limits. """
+        return await self._retry(lambda: request.execute(http=self.http()))
+
+    async def next_chunk(self, request):
+        """ Sends the next chunk of a resumable upload. """
+        return await self._retry(lambda: request.next_chunk(http=self.http()))
+
+    async def _retry(self, func):
+        attempt = 0
+        while True:
+            try:
+                result = await run(func)
+            except HttpError as e:
+                if attempt >= MAX_RETRIES or not is_retryable(e):
+                    raise
+                if is_rate_limited(e):
+                    self.throttle.slow_down()
+                await backoff(attempt)
+                attempt += 1
+            else:
+                self.throttle.speed_up()
+                return result
+
+    async def execute_batch(self, requests):
+        """
+        Sends requests MAX_BATCH_SIZE at a time in http batches. Items refused
+        by a rate limit or a server error are sent again in the next round,
+        after a backoff and in smaller batches. Returns the responses in
+        order, with the HttpError in place of the items that failed.
+        """
+        results = [None] * len(requests)
+        pending = list(range(len(requests)))
+        batch_size = MAX_BATCH_SIZE
+        attempt = 0
+        while pending:
+            failed = []
+
+            def callback(request_id, response, exception):
+                index = int(request_id)
+                results[index] = exception if exception is not None else response
+                if exception is None:
+                    return
+                if (
+                    isinstance(exception, HttpError)
+                    and is_retryable(exception)
+                    and attempt < MAX_RETRIES
+                ):
+                    failed.append(index)
+
+            for start in range(0, len(pending), batch_size):
+                batch = self.service.new_batch_http_request(callback=callback)
+                for index in pending[start : start + batch_size]:
+                    batch.add(requests[index], request_id=str(index))
+                await self._retry(lambda: batch.execute(http=self.http()))
+            if not failed:
+                break
+            if any(is_rate_limited(results[index]) for index in failed):
+                self.throttle.slow_down()
+                batch_size = max(1, batch_size // 2)
+            await backoff(attempt)
+            attempt += 1
+            pending = sorted(failed)
+        return results
+
+    async def list_folders(self, folder_ids, fields=WALK_FIELDS):
+        """ Lists the children of many folders, batching one files.list
+            per folder and following their pages together. """
+        children = {folder_id: [] for folder_id in folder_ids}
+        pages = [(folder_id, None) for folder_id in folder_ids]
+        while pages:
+            responses = await self.execute_batch(
+                [
+                    self.files().list(
+                        supportsAllDrives=True,
+                        includeItemsFromAllDrives=True,
+                        q=f"'{folder_id}' in parents and (name contains '*')",
+                        spaces="drive",
+                        fields=f"nextPageToken, files({fields})",
+                        pageToken=page_token,
+                        pageSize=1000,
+                        corpora="allDrives",
+                        orderBy="folder, name",
+                    )
+                    for folder_id, page_token in pages
+                ]
+            )
+            next_pages = []
+            for (folder_id, _), response in zip(pages, responses):
+                if isinstance(response, Exception):
+                    raise response
+                children[folder_id].extend(response.get("files", []))
+                page_token = response.get("nextPageToken")
+                if page_token is not None:
+                    next_pages.append((folder_id, page_token))
+            pages = next_pages
+        return children
+
+    async def walk(self, folder_id, fields=WALK_FIELDS):
+        """ Walks a folder tree breadth first, yielding each level as the
+            {folder_id: children} dict returned by list_folders. """
+        level = [folder_id]
+        while level:
+            children = await self.list_folders(level, fields)
+            yield children
+            level = [
+                child["id"]
+                for files in children.values()
+                for child in files
+                if child.get("mimeType") == G_DRIVE_DIR_MIME_TYPE
+            ]
+
+    async def gather(self, *coros):
+        """ Awaits all coros, cancelling the rest as soon as one of them fails. """
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+
+async def run(func, *args, **kwargs):
+    """ Runs a blocking drive call on the drive thread pool. """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(_executor, lambda: func(*args, **kwargs))
+
+
+async def refresh_credentials(creds):
+    await run(creds.refresh, Request())
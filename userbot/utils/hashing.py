@@ -0,0 +1,75 @@
+""" Checksums of text, files and downloads. Every algorithm is fed in the
+    same pass over the data, and big inputs are hashed on a thread pool,
+    where hashlib runs without holding the GIL. """
+
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+ALGORITHMS = ("md5", "sha1", "sha256", "sha512")
+READ_SIZE = 4 * 1024 * 1024
+# Smaller inputs are hashed on the event loop, a thread costs more than that.
+THREAD_THRESHOLD = 256 * 1024
+
+_executor = ThreadPoolExecutor(len(ALGORITHMS), thread_name_prefix="hash")
+
+
+class MultiHasher:
+    """ Several hashlib hashes updated together. """
+
+    def __init__(self, algorithms=ALGORITHMS):
+        self.hashes = {name: hashlib.new(name) for name in algorithms}
+
+    def update(self, data):
+        for hash_ in self.hashes.values():
+            hash_.update(data)
+
+    async def update_async(self, data):
+        """ Hashes big data with every algorithm at once on the pool. """
+        if len(data) < THREAD_THRESHOLD:
+            self.update(data)
+            return
+        loop = asyncio.get_event_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(_executor, hash_.update, data)
+                for hash_ in self.hashes.values()
+            )
+        )
+
+    def hexdigests(self):
+        return {name: hash_.hexdigest() for name, hash_ in self.hashes.items()}
+
+
+def _hash_file(path, algorithms):
+    hasher = MultiHasher(algorithms)
+    buffer = bytearray(READ_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as file:
+        while True:
+            read = file.readinto(buffer)
+            if not read:
+                break
+            hasher.update(view[:read])
+    return hasher.hexdigests()
+
+
+async def hash_file(path, algorithms=ALGORITHMS):
+    """ Reads path once on the pool, returns {algorithm: hex digest}. """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(_executor, _hash_file, path, algorithms)
+
+
+async def hash_bytes(data, algorithms=ALGORITHMS):
+    hasher = MultiHasher(algorithms)
+    await hasher.update_async(data)
+    return hasher.hexdigests()
+
+
+async def hash_stream(chunks, algorithms=ALGORITHMS):
+    """ Hashes an async iterator of bytes, such as a telegram download,
+        as the chunks arrive. """
+    hasher = MultiHasher(algorithms)
+    async for chunk in chunks:
+        await hasher.update_async(chunk)
+    return hasher.hexdigests()
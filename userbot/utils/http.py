@@ -0,0 +1,113 @@
+""" Application wide aiohttp session, so every request shares one pool of
+    keep-alive connections instead of opening its own. """
+
+import asyncio
+import json
+
+import aiohttp
+
+# Connections open at once, in total and to a single host.
+MAX_CONNECTIONS = 100
+MAX_HOST_CONNECTIONS = 16
+# Seconds a resolved address is reused.
+DNS_CACHE_TTL = 300
+# Default limits of a request, callers may pass their own timeout.
+TIMEOUT = aiohttp.ClientTimeout(total=60, sock_connect=15)
+# Idempotent requests are tried again on these, after a short backoff.
+MAX_RETRIES = 2
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_session = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """ Returns the shared session, creating it on first use. """
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=MAX_CONNECTIONS,
+                limit_per_host=MAX_HOST_CONNECTIONS,
+                ttl_dns_cache=DNS_CACHE_TTL,
+            ),
+            timeout=TIMEOUT,
+            # Cookies of one command must not reach the requests of another,
+            # pass them explicitly where a site needs them.
+            cookie_jar=aiohttp.DummyCookieJar(),
+        )
+    return _session
+
+
+async def close_session():
+    if _session is not None and not _session.closed:
+        await _session.close()
+
+
+class Response:
+    """ Fully read answer of fetch, with the parts of requests' Response
+        the handlers use. """
+
+    def __init__(self, response, content):
+        self.status = response.status
+        self.ok = response.status < 400
+        self.reason = response.reason
+        self.url = str(response.url)
+        self.headers = response.headers
+        self.cookies = response.cookies
+        self.content = content
+        self.encoding = response.get_encoding() if content else "utf-8"
+        self._request_info = response.request_info
+        self._history = response.history
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise aiohttp.ClientResponseError(
+                self._request_info,
+                self._history,
+                status=self.status,
+                message=self.reason,
+                headers=self.headers,
+            )
+
+
+class _Retry(Exception):
+    pass
+
+
+async def fetch(method, url, retries=MAX_RETRIES, **kwargs) -> Response:
+    """
+    Sends a request through the shared session and reads the whole body.
+    GET-like requests are retried on connection errors, timeouts and the
+    statuses in RETRY_STATUSES. Takes the arguments of session.request.
+    """
+    method = method.upper()
+    if method not in RETRY_METHODS:
+        retries = 0
+    attempt = 0
+    while True:
+        try:
+            async with get_session().request(method, url, **kwargs) as response:
+                if response.status in RETRY_STATUSES and attempt < retries:
+                    raise _Retry
+                return Response(response, await response.read())
+        except (_Retry, aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= retries:
+                raise
+        attempt += 1
+        await asyncio.sleep(attempt)
+
+
+async def http_get(url, **kwargs) -> Response:
+    return await fetch("GET", url, **kwargs)
+
+
+async def http_post(url, **kwargs) -> Response:
+    return await fetch("POST", url, **kwargs)
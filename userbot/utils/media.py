@@ -0,0 +1,164 @@
+""" Thumbnail and metadata probing of files about to be sent. Probes run
+    while the file is still being uploaded, metadata parsing in a process
+    pool, and their results are kept until the file is sent. """
+
+import asyncio
+import hashlib
+import os
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from hachoir.metadata import extractMetadata
+from hachoir.parser import createParser
+from telethon.tl.types import DocumentAttributeAudio, DocumentAttributeVideo
+
+from userbot import LOGS, TEMP_DOWNLOAD_DIRECTORY
+
+from .tools import run_cmd
+
+VIDEO_EXTENSIONS = ("mp4", "mkv", "webm")
+AUDIO_EXTENSIONS = ("mp3", "flac", "wav")
+# Processes parsing metadata, and probes kept. Evicted probes take their
+# thumbnail with them.
+MAX_PROBE_WORKERS = 2
+MAX_CACHED_PROBES = 32
+THUMB_DIR = os.path.join(TEMP_DOWNLOAD_DIRECTORY, "thumbs")
+
+_executor = None
+_probes = OrderedDict()
+
+# Thumbnails left behind by an earlier run.
+shutil.rmtree(THUMB_DIR, ignore_errors=True)
+
+
+class MediaInfo:
+    """ What send_file needs to show a file as media. """
+
+    __slots__ = ("thumb", "attributes")
+
+    def __init__(self, thumb=None, attributes=None):
+        self.thumb = thumb
+        self.attributes = attributes or []
+
+
+async def get_video_thumb(file, output):
+    """ Get video thumbnail """
+    command = ["ffmpeg", "-i", file, "-ss", "00:00:01.000", "-vframes", "1", output]
+    t_resp, e_resp = await run_cmd(command)
+    if os.path.lexists(output):
+        return output
+    LOGS.info(t_resp)
+    LOGS.info(e_resp)
+    return None
+
+
+def _read_metadata(path):
+    """ Runs in a worker process, returns the fields the attributes use. """
+    parser = createParser(path)
+    if parser is None:
+        return {}
+    with parser:
+        metadata = extractMetadata(parser)
+    if metadata is None:
+        return {}
+    fields = {}
+    for key in ("duration", "width", "height", "title", "artist"):
+        if metadata.has(key):
+            fields[key] = metadata.get(key)
+    if "duration" in fields:
+        fields["duration"] = fields["duration"].seconds
+    return fields
+
+
+async def read_metadata(path):
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(MAX_PROBE_WORKERS)
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(_executor, _read_metadata, path)
+
+
+async def _probe(path, key):
+    name = path.lower()
+    if name.endswith(VIDEO_EXTENSIONS):
+        os.makedirs(THUMB_DIR, exist_ok=True)
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        thumb, fields = await asyncio.gather(
+            get_video_thumb(path, os.path.join(THUMB_DIR, f"{digest}.jpg")),
+            read_metadata(path),
+        )
+        video = DocumentAttributeVideo(
+            duration=fields.get("duration", 0),
+            w=fields.get("width", 0),
+            h=fields.get("height", 0),
+            round_message=False,
+            supports_streaming=True,
+        )
+        return MediaInfo(thumb, [video])
+    if name.endswith(AUDIO_EXTENSIONS):
+        fields = await read_metadata(path)
+        audio = DocumentAttributeAudio(
+            duration=fields.get("duration", 0),
+            title=fields.get("title", ""),
+            performer=fields.get("artist", ""),
+        )
+        return MediaInfo(None, [audio])
+    return MediaInfo()
+
+
+def _remove_thumb(task):
+    if not task.cancelled() and task.exception() is None:
+        thumb = task.result().thumb
+        if thumb is not None and os.path.exists(thumb):
+            os.remove(thumb)
+
+
+def _evict(task):
+    """ Removes the thumbnail of a dropped probe, once it has one. """
+    if task.done():
+        _remove_thumb(task)
+    else:
+        task.add_done_callback(_remove_thumb)
+
+
+def _forget(key, task):
+    if task.cancelled() or task.exception() is not None:
+        if _probes.get(key) is task:
+            del _probes[key]
+
+
+def probe_media(path):
+    """
+    Starts probing path for its thumbnail and attributes, and returns the
+    task doing it. A probe of the same path, size and mtime is reused, so
+    a file can be probed ahead of its turn.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+    task = _probes.get(key)
+    if task is not None and task.done() and not task.cancelled():
+        thumb = task.exception() is None and task.result().thumb
+        if thumb and not os.path.exists(thumb):
+            task = None
+    if task is None:
+        task = asyncio.ensure_future(_probe(path, key))
+        task.add_done_callback(lambda done: _forget(key, done))
+        _probes[key] = task
+        while len(_probes) > MAX_CACHED_PROBES:
+            _evict(_probes.popitem(last=False)[1])
+    else:
+        _probes.move_to_end(key)
+    return task
+
+
+async def media_info(path):
+    """ Waits for the probe of path, started by probe_media if it wasn't. """
+    return await asyncio.shield(probe_media(path))
+
+
+def forget_media(path):
+    """ Drops the probes of path and their thumbnails, once it was sent. """
+    path = os.path.abspath(path)
+    for key in [key for key in _probes if key[0] == path]:
+        _evict(_probes.pop(key))
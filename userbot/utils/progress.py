@@ -14,47 +14,210 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import math
 import time
 
-from telethon.errors.rpcerrorlist import MessageNotModifiedError
+from telethon.errors.rpcerrorlist import FloodWaitError, MessageNotModifiedError
 
 from .exceptions import CancelProcess
 from .tools import humanbytes, time_formatter
 
+# Edits sent by the renderer, on average and in a burst.
+EDITS_PER_SECOND = 0.5
+EDIT_BURST = 5
+# Shortest time between two edits of the same message.
+MIN_EDIT_INTERVAL = 8
+# How often pending progress is looked at and speeds are sampled.
+TICK = 1
+# Weight of the latest sample in the speed average.
+SPEED_ALPHA = 0.3
 
-async def progress(current, total, event, start, prog_type, is_cancelled=False):
-    now = time.time()
-    diff = now - start
-    if is_cancelled is True:
-        raise CancelProcess
 
-    if round(diff % 15.00) == 0 or current == total:
-        percentage = current * 100 / total
-        speed = current / diff
-        elapsed_time = round(diff)
-        eta = round((total - current) / speed)
+class TokenBucket:
+    """ Allows rate edits per second on average, bursts of up to capacity. """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+        if now < self.paused_until or self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def pause(self, seconds):
+        """ Telegram asked to wait, spend nothing until then. """
+        self.paused_until = time.monotonic() + seconds
+        self.tokens = 0
+
+
+class ProgressTracker:
+    """
+    Progress of one transfer shown in one message. update() is cheap enough
+    to be a progress_callback: it only stores the numbers, the edits are
+    sent by the renderer. Use it with async with, so no edit lands after
+    the message the caller sends once the transfer is over.
+    """
+
+    def __init__(self, renderer, event, prog_type, file_name=None, cancelled=None):
+        self.renderer = renderer
+        self.event = event
+        self.prog_type = prog_type
+        self.file_name = file_name
+        self.cancelled = cancelled
         if "upload" in prog_type.lower():
-            status = "Enviando"
+            self.status = "Enviando"
         elif "download" in prog_type.lower():
-            status = "Baixando"
+            self.status = "Baixando"
+        else:
+            self.status = "Status"
+        self.start = time.monotonic()
+        self.current = 0
+        self.total = 0
+        self.speed = None
+        self.last_sample = None
+        self.last_edit = 0
+        self.shown = None
+        self.editing = None
+
+    def update(self, current, total):
+        if self.cancelled is not None and self.cancelled():
+            raise CancelProcess
+        self.current = current
+        self.total = total
+
+    def sample(self, now):
+        """ Folds the speed since the last sample into the average. The
+            first sample only sets the baseline, a resumed transfer doesn't
+            start at zero. """
+        if self.last_sample is None:
+            self.last_sample = (now, self.current)
+            return
+        then, done = self.last_sample
+        if now <= then:
+            return
+        speed = (self.current - done) / (now - then)
+        if self.speed is None:
+            self.speed = speed
         else:
-            status = "Status"
+            self.speed = SPEED_ALPHA * speed + (1 - SPEED_ALPHA) * self.speed
+        self.last_sample = (now, self.current)
+
+    def render(self, now):
+        total = self.total or 0
+        percentage = self.current * 100 / total if total else 0
+        speed = self.speed or 0
+        elapsed_time = round(now - self.start)
+        eta = round((total - self.current) / speed) if speed > 0 else 0
         progress_str = "**{}:** `[{}{}]` **{}%**".format(
-            status,
+            self.status,
             "".join("●" for _ in range(math.floor(percentage / 10))),
             "".join("○" for _ in range(10 - math.floor(percentage / 10))),
             round(percentage, 2),
         )
-
-        tmp = (
+        name = f"`{self.file_name}`\n" if self.file_name else ""
+        return (
+            f"**{self.prog_type}**\n\n{name}"
             f"{progress_str}\n"
-            f"{humanbytes(current)} de {humanbytes(total)}"
-            f" @ {humanbytes(speed)}\n"
+            f"{humanbytes(self.current)} de {humanbytes(total)}"
+            f" @ {humanbytes(speed)}/s\n"
             f"**Tempo Estimado:** {time_formatter(eta)}\n"
             f"**Duração:** {time_formatter(elapsed_time)}"
         )
+
+    async def __aenter__(self):
+        self.renderer.add(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        self.renderer.remove(self)
+        if self.editing is not None:
+            await asyncio.wait([self.editing])
+
+
+class ProgressRenderer:
+    """
+    Single task sending the progress edits of every running transfer. The
+    messages that waited the longest go first, as long as the token bucket
+    allows, and a FloodWaitError pauses the bucket instead of the transfer.
+    """
+
+    def __init__(self):
+        self.trackers = []
+        self.bucket = TokenBucket(EDITS_PER_SECOND, EDIT_BURST)
+        self._task = None
+
+    def track(self, event, prog_type, file_name=None, cancelled=None):
+        return ProgressTracker(self, event, prog_type, file_name, cancelled)
+
+    def add(self, tracker):
+        self.trackers.append(tracker)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def remove(self, tracker):
+        if tracker in self.trackers:
+            self.trackers.remove(tracker)
+
+    async def edit(self, event, text):
+        """ Edits event, waiting for the bucket first. """
+        while not self.bucket.take():
+            await asyncio.sleep(TICK)
+        await self._send(event, text)
+
+    async def _send(self, event, text):
         try:
-            await event.edit(f"**{prog_type}**\n\n{tmp}")
+            await event.edit(text)
+        except FloodWaitError as e:
+            self.bucket.pause(e.seconds)
         except MessageNotModifiedError:
             pass
+
+    async def _edit(self, tracker, text):
+        tracker.shown = text
+        try:
+            await self._send(tracker.event, text)
+        except Exception:
+            pass
+
+    async def _run(self):
+        while self.trackers:
+            await asyncio.sleep(TICK)
+            now = time.monotonic()
+            for tracker in self.trackers:
+                tracker.sample(now)
+            due = [
+                tracker
+                for tracker in self.trackers
+                if now - tracker.last_edit >= MIN_EDIT_INTERVAL
+                and (tracker.editing is None or tracker.editing.done())
+            ]
+            for tracker in sorted(due, key=lambda tracker: tracker.last_edit):
+                text = tracker.render(now)
+                if text == tracker.shown:
+                    continue
+                if not self.bucket.take():
+                    break
+                tracker.last_edit = now
+                tracker.editing = asyncio.ensure_future(self._edit(tracker, text))
+
+
+PROGRESS = ProgressRenderer()
+
+
+def track_progress(event, prog_type, file_name=None, cancelled=None):
+    """ Shortcut for PROGRESS.track, see ProgressTracker. """
+    return PROGRESS.track(event, prog_type, file_name, cancelled)
@@ -0,0 +1,52 @@
+""" Cache of the messages saved in BOTLOG_CHATID by filters, notes, snips
+    and welcomes, so replying with them doesn't cost a get_messages call. """
+
+from collections import OrderedDict
+
+from telethon.errors.rpcerrorlist import FileReferenceExpiredError
+from telethon.utils import get_input_media
+
+from userbot import BOTLOG_CHATID
+
+# Saved messages kept in memory, least recently used are dropped first.
+MAX_SAVED_MEDIA = 512
+
+_saved = OrderedDict()
+
+
+async def get_saved_message(client, msg_id, refresh=False):
+    """ Returns (text, media) of a saved message, or None if it was deleted. """
+    msg_id = int(msg_id)
+    if not refresh and msg_id in _saved:
+        _saved.move_to_end(msg_id)
+        return _saved[msg_id]
+    msg = await client.get_messages(entity=BOTLOG_CHATID, ids=msg_id)
+    if msg is None:
+        _saved.pop(msg_id, None)
+        return None
+    media = msg.media
+    if media is not None:
+        try:
+            media = get_input_media(media)
+        except TypeError:
+            pass
+    _saved[msg_id] = (msg.message, media)
+    _saved.move_to_end(msg_id)
+    if len(_saved) > MAX_SAVED_MEDIA:
+        _saved.popitem(last=False)
+    return _saved[msg_id]
+
+
+async def send_saved_message(client, msg_id, send):
+    """ Calls send(text, media) with a saved message, fetching it again once
+        if telegram reports that its file reference expired. """
+    saved = await get_saved_message(client, msg_id)
+    if saved is None:
+        return None
+    try:
+        return await send(*saved)
+    except FileReferenceExpiredError:
+        saved = await get_saved_message(client, msg_id, refresh=True)
+        if saved is None:
+            return None
+        return await send(*saved)
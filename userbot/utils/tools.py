@@ -16,17 +16,14 @@
 
 
 import asyncio
-import hashlib
 import re
 from typing import Union
 
+from .hashing import hash_file
+
 
 async def md5(fname: str) -> str:
-    hash_md5 = hashlib.md5()
-    with open(fname, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+    return (await hash_file(fname, ("md5",)))["md5"]
 
 
 def humanbytes(size: Union[int, float]) -> str: